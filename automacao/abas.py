@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+
+async def abrir_abas_reinf(context, pagina_principal, quantidade):
+    """
+    Abre abas extra no mesmo contexto (mesma sessão e cookies) já autenticado,
+    todas apontando para a página do EFD-Reinf aberta na aba principal.
+    Devolve a lista de abas, começando pela principal.
+    """
+    paginas = [pagina_principal]
+    for numero in range(2, quantidade + 1):
+        nova_aba = await context.new_page()
+        await nova_aba.goto(pagina_principal.url)
+        await nova_aba.locator("#frmApp").wait_for(state="attached")
+        print(f"Aba {numero} aberta no EFD-Reinf.")
+        paginas.append(nova_aba)
+    return paginas
+
+
+async def despachar_em_abas(paginas, eventos, registrar, limite_concorrencia=None):
+    """
+    Distribui os eventos R2010 pelas abas, processando vários ao mesmo tempo.
+
+    - paginas: abas já posicionadas no EFD-Reinf (ver abrir_abas_reinf)
+    - eventos: gerador assíncrono com as listas de notas de cada evento
+    - registrar: corrotina registrar(pagina, cadastros) que faz o preenchimento
+    - limite_concorrencia: máximo de eventos em andamento ao mesmo tempo
+      (por omissão, um por aba)
+
+    Um erro num evento é mostrado e contado, mas não interrompe as outras abas.
+    Devolve um dicionário com o total de notas com sucesso, com falha e já
+    enviadas antes (ver contar_resultado).
+    """
+    numero_da_aba = {pagina: indice for indice, pagina in enumerate(paginas, 1)}
+    limite = min(limite_concorrencia or len(paginas), len(paginas))
+    abas_livres = asyncio.Queue()
+    for pagina in paginas[:limite]:
+        abas_livres.put_nowait(pagina)
+
+    resumo = {"sucesso": 0, "falha": 0, "ja_enviadas": 0}
+    inicio = time.perf_counter()
+
+    async def processar(pagina, cadastros):
+        try:
+            contar_resultado(resumo, cadastros, await registrar(pagina, cadastros))
+        except Exception as e:
+            resumo["falha"] += len(cadastros)
+            numeros = ", ".join(str(c.get("NUMERO DA NF")) for c in cadastros)
+            print(
+                f"ERRO na aba {numero_da_aba[pagina]} ao registar a(s) NF(s) "
+                f"{numeros}: {e}"
+            )
+        finally:
+            abas_livres.put_nowait(pagina)
+
+    tarefas = []
+    async for cadastros in eventos:
+        # O evento já foi lido da fonte; espera aqui por uma aba livre, por isso
+        # nunca há mais do que `limite` eventos retirados e ainda por enviar
+        pagina = await abas_livres.get()
+        tarefas.append(asyncio.create_task(processar(pagina, cadastros)))
+    await asyncio.gather(*tarefas)
+
+    imprimir_vazao(resumo, time.perf_counter() - inicio, limite)
+    return resumo
+
+
+async def registrar_em_serie(pagina, eventos, registrar):
+    """
+    Registra os eventos um a um na mesma aba. Como em despachar_em_abas, um
+    erro num evento é mostrado e contado e o lote continua no seguinte.
+    """
+    resumo = {"sucesso": 0, "falha": 0, "ja_enviadas": 0}
+    inicio = time.perf_counter()
+    async for cadastros in eventos:
+        try:
+            contar_resultado(resumo, cadastros, await registrar(pagina, cadastros))
+        except Exception as e:
+            resumo["falha"] += len(cadastros)
+            numeros = ", ".join(str(c.get("NUMERO DA NF")) for c in cadastros)
+            print(f"ERRO ao registar a(s) NF(s) {numeros}: {e}")
+    imprimir_vazao(resumo, time.perf_counter() - inicio, 1)
+    return resumo
+
+
+def contar_resultado(resumo, cadastros, enviadas):
+    """
+    Soma ao resumo um evento que terminou sem erro. enviadas é o que registrar
+    devolveu: quantas notas foram de facto enviadas (o diário não volta a
+    enviar as que já têm rascunho), ou None para todas.
+    """
+    if enviadas is None:
+        enviadas = len(cadastros)
+    resumo["sucesso"] += enviadas
+    resumo["ja_enviadas"] += len(cadastros) - enviadas
+
+
+def imprimir_vazao(resumo, duracao, num_abas):
+    """
+    Mostra quantas notas foram registadas e o ritmo em notas por minuto. As já
+    enviadas numa execução anterior aparecem à parte e não contam para o ritmo.
+    """
+    total = resumo["sucesso"] + resumo["falha"]
+    if total:
+        print(
+            f"\n{resumo['sucesso']} notas registadas e {resumo['falha']} com erro "
+            f"em {duracao:.1f} s ({total / duracao * 60:.1f} notas/minuto, "
+            f"{num_abas} aba(s))."
+        )
+    if resumo["ja_enviadas"]:
+        print(
+            f"{resumo['ja_enviadas']} notas já enviadas numa execução anterior "
+            "(ignoradas)."
+        )
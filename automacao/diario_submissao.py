@@ -0,0 +1,188 @@
+import sqlite3  # Base de dados local, já incluída no Python
+from datetime import datetime
+
+from automacao.r2010 import RascunhoIncerto
+from extratores.armazenamento import chave_nf  # Chave de cada nota no diário
+
+# --- CONFIGURAÇÃO ---
+CAMINHO_DIARIO = "diario_submissao.sqlite3"
+
+# Estados possíveis de cada nota no diário
+PENDENTE = "pendente"
+EM_ANDAMENTO = "em_andamento"
+RASCUNHO_SALVO = "rascunho_salvo"
+FALHOU = "falhou"
+# O salvar rascunho falhou a meio: o portal pode ter gravado o rascunho ou não
+VERIFICAR_NO_PORTAL = "verificar_no_portal"
+# Recusada pela validação antes do envio (ver extratores/validacao.py)
+REJEITADA = "rejeitada"
+
+
+def _agora():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class DiarioSubmissao:
+    """
+    Diário persistente (SQLite) do estado de submissão de cada nota no EFD-Reinf.
+
+    Cada mudança de estado é gravada no disco na hora, para que, depois de uma
+    falha, a execução seguinte saiba exatamente quais notas já têm rascunho
+    salvo e não as volte a criar.
+    """
+
+    def __init__(self, caminho=CAMINHO_DIARIO):
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS submissoes (
+                chave TEXT PRIMARY KEY,
+                numero_nf TEXT,
+                cnpj_fornecedor TEXT,
+                codigo_verificacao TEXT,
+                estado TEXT NOT NULL,
+                mensagem TEXT,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                criado_em TEXT NOT NULL,
+                atualizado_em TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS historico (
+                chave TEXT NOT NULL,
+                estado TEXT NOT NULL,
+                mensagem TEXT,
+                registrado_em TEXT NOT NULL
+            );
+            """)
+
+    def registrar(self, cadastro):
+        """Inclui a nota como pendente, se ainda não estiver no diário."""
+        agora = _agora()
+        self.conexao.execute(
+            "INSERT OR IGNORE INTO submissoes "
+            "(chave, numero_nf, cnpj_fornecedor, codigo_verificacao, estado, criado_em, atualizado_em) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                chave_nf(cadastro),
+                str(cadastro.get("NUMERO DA NF")),
+                str(cadastro.get("CNPJ FORNECEDOR")),
+                str(cadastro.get("CODIGO DE VERIFICAÇÃO")),
+                PENDENTE,
+                agora,
+                agora,
+            ),
+        )
+        self.conexao.commit()
+
+    def estado(self, cadastro):
+        """Devolve o estado atual da nota, ou None se ela nunca foi vista."""
+        linha = self.conexao.execute(
+            "SELECT estado FROM submissoes WHERE chave = ?", (chave_nf(cadastro),)
+        ).fetchone()
+        return linha[0] if linha else None
+
+    def situacao(self, cadastro):
+        """Devolve (estado, mensagem) da nota, ou None se ela nunca foi vista."""
+        return self.conexao.execute(
+            "SELECT estado, mensagem FROM submissoes WHERE chave = ?",
+            (chave_nf(cadastro),),
+        ).fetchone()
+
+    def marcar(self, cadastro, estado, mensagem=None):
+        """Grava o novo estado da nota (e o histórico) imediatamente no disco."""
+        chave = chave_nf(cadastro)
+        agora = _agora()
+        self.conexao.execute(
+            "UPDATE submissoes SET estado = ?, mensagem = ?, atualizado_em = ?, "
+            "tentativas = tentativas + ? WHERE chave = ?",
+            (estado, mensagem, agora, 1 if estado == EM_ANDAMENTO else 0, chave),
+        )
+        self.conexao.execute(
+            "INSERT INTO historico VALUES (?, ?, ?, ?)",
+            (chave, estado, mensagem, agora),
+        )
+        self.conexao.commit()
+
+    def rejeitar(self, cadastro, motivo):
+        """
+        Inclui a nota (se preciso) e marca-a como recusada pela validação.
+        Uma nota que já tem (ou pode ter) rascunho no portal mantém o estado:
+        a rejeição fica só no histórico, para que com_diario não a volte a
+        enviar depois de corrigida.
+        """
+        self.registrar(cadastro)
+        if self.estado(cadastro) in (RASCUNHO_SALVO, VERIFICAR_NO_PORTAL):
+            self.conexao.execute(
+                "INSERT INTO historico VALUES (?, ?, ?, ?)",
+                (chave_nf(cadastro), REJEITADA, motivo, _agora()),
+            )
+            self.conexao.commit()
+            return
+        self.marcar(cadastro, REJEITADA, motivo)
+
+    def fechar(self):
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+
+def com_diario(diario, registrar, retomar=True):
+    """
+    Envolve a corrotina registrar(pagina, cadastros) com o registo no diário.
+    cadastros é a lista de notas de um evento R2010 (uma só, sem agrupamento).
+
+    Com retomar=True, notas que já têm rascunho salvo são retiradas do evento,
+    para que reiniciar depois de uma falha não crie rascunhos duplicados. O
+    mesmo para as marcadas "verificar_no_portal": só depois de conferidas no
+    EFD-Reinf devem ser reenviadas (com retomar=False).
+    Devolve quantas notas foram de facto enviadas (0 se todas já estavam),
+    para que o resumo não conte as ignoradas como registadas.
+    """
+
+    async def registrar_com_diario(pagina, cadastros):
+        pendentes = []
+        for cadastro in cadastros:
+            diario.registrar(cadastro)
+            estado_anterior = diario.estado(cadastro)
+
+            if retomar and estado_anterior == RASCUNHO_SALVO:
+                print(
+                    f"NF {cadastro.get('NUMERO DA NF')} já tem rascunho salvo. A ignorar."
+                )
+                continue
+            if retomar and estado_anterior == VERIFICAR_NO_PORTAL:
+                print(
+                    f"NF {cadastro.get('NUMERO DA NF')} pode ter rascunho salvo "
+                    "(falha ao salvar numa execução anterior). Confira no portal. "
+                    "A ignorar."
+                )
+                continue
+            if estado_anterior == EM_ANDAMENTO:
+                print(
+                    f"AVISO: a NF {cadastro.get('NUMERO DA NF')} ficou a meio numa execução "
+                    "anterior. Confira no portal se não há um rascunho duplicado."
+                )
+            pendentes.append(cadastro)
+
+        if not pendentes:
+            return 0
+
+        for cadastro in pendentes:
+            diario.marcar(cadastro, EM_ANDAMENTO)
+        try:
+            await registrar(pagina, pendentes)
+        except RascunhoIncerto as e:
+            for cadastro in pendentes:
+                diario.marcar(cadastro, VERIFICAR_NO_PORTAL, str(e))
+            raise
+        except Exception as e:
+            for cadastro in pendentes:
+                diario.marcar(cadastro, FALHOU, str(e))
+            raise
+        for cadastro in pendentes:
+            diario.marcar(cadastro, RASCUNHO_SALVO)
+        return len(pendentes)
+
+    return registrar_com_diario
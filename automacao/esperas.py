@@ -0,0 +1,94 @@
+import re
+import time
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from rastreamento import RASTREADOR
+
+# --- CONFIGURAÇÃO ---
+# Botões do EFD-Reinf que disparam uma chamada ao servidor e a resposta que a
+# confirma: data-testid -> (métodos HTTP aceites, regex do URL do endpoint).
+# Só contam respostas de XHR/fetch ao endpoint do próprio passo: o keep-alive
+# do e-CAC e outras consultas da página não confirmam nada.
+# Com o regex em None o endpoint ainda não foi confirmado no portal real e o
+# botão só é clicado (o Playwright espera depois pelo campo seguinte). Para
+# ligar a espera, copie o URL do pedido do separador Rede do DevTools.
+ESPERAS_REINF = {
+    # Cria o evento com o cabeçalho (período, estabelecimento, prestador)
+    "botao_continuar": (("POST", "PUT"), None),
+    # Inclui a nota fiscal no evento
+    "botao_salvar_nfs": (("POST", "PUT"), None),
+    # Grava o tipo de serviço da nota
+    "botao_salvar_info_tpserv": (("POST", "PUT"), None),
+    # Salva o evento como rascunho
+    "botao_salvar_rascunho": (("POST", "PUT"), None),
+}
+# Tempo máximo (ms) à espera da resposta depois do clique
+TEMPO_MAXIMO_RESPOSTA = 15000
+
+
+def usar_esperas(esperas):
+    """
+    Liga a espera pela resposta nos passos indicados (data-testid -> (métodos,
+    regex do URL)), ex.: os endpoints do portal simulado ou os do portal real
+    depois de confirmados.
+    """
+    ESPERAS_REINF.update(esperas)
+
+
+def _confirma(metodos, padrao_url):
+    """Monta o filtro de respostas para os métodos e o URL indicados."""
+    padrao_url = re.compile(padrao_url)
+
+    def filtro(resposta):
+        pedido = resposta.request
+        if pedido.resource_type not in ("xhr", "fetch"):
+            return False
+        if pedido.method not in metodos:
+            return False
+        return padrao_url.search(resposta.url) is not None
+
+    return filtro
+
+
+async def clicar_e_aguardar_resposta(locator, testid):
+    """
+    Clica no botão e só devolve quando chegar a resposta do servidor que
+    confirma a ação (ver ESPERAS_REINF), nem antes nem depois.
+
+    Se o portal responder com erro (HTTP 4xx/5xx), levanta uma exceção em vez
+    de seguir para o passo seguinte com o formulário num estado incerto.
+    Se nenhuma resposta chegar dentro do tempo máximo, também levanta uma
+    exceção. Passos sem endpoint confirmado (regex None) são só clicados.
+    """
+    metodos, padrao_url = ESPERAS_REINF.get(testid, ((), None))
+    if padrao_url is None:
+        await locator.click()
+        return None
+    confirma = _confirma(metodos, padrao_url)
+
+    clicou = False
+    inicio = time.perf_counter()
+    try:
+        async with locator.page.expect_response(
+            confirma, timeout=TEMPO_MAXIMO_RESPOSTA
+        ) as informacao_resposta:
+            await locator.click()
+            clicou = True
+        resposta = await informacao_resposta.value
+    except PlaywrightTimeoutError as e:
+        if not clicou:
+            raise  # O próprio clique falhou: isso é um erro de verdade
+        raise RuntimeError(
+            f"'{testid}' não teve resposta do servidor em "
+            f"{TEMPO_MAXIMO_RESPOSTA / 1000:.0f} s."
+        ) from e
+
+    # Tempo entre o clique e a resposta, no perfil da execução
+    RASTREADOR.adicionar(f"resposta {testid}", time.perf_counter() - inicio)
+    if not resposta.ok:
+        raise RuntimeError(
+            f"O portal respondeu HTTP {resposta.status} ao clicar em '{testid}' "
+            f"({resposta.url})."
+        )
+    return resposta
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+import re
+
+# --- CONFIGURAÇÃO ---
+# Tipos de recurso (request.resource_type do Playwright) que a automação não usa
+TIPOS_BLOQUEADOS = {"image", "font", "media"}
+# Pedidos bloqueados pelo URL, qualquer que seja o tipo (estatísticas, anúncios...)
+PADROES_BLOQUEADOS = [
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"doubleclick\.net",
+    r"hotjar\.com",
+    r"clarity\.ms",
+]
+# Exceções à lista de bloqueio: estes URLs passam sempre (ex.: o captcha do login)
+PADROES_PERMITIDOS = [r"captcha"]
+# Nunca bloqueados: as páginas (incluindo o iframe #frmApp). Scripts, estilos e
+# chamadas XHR/fetch só são bloqueados se o URL estiver em PADROES_BLOQUEADOS.
+TIPOS_SEMPRE_PERMITIDOS = {"document"}
+# Tamanho conhecido de cada recurso (medido no modo "medir"), para estimar os
+# bytes poupados quando o mesmo recurso é bloqueado em execuções seguintes
+CAMINHO_TAMANHOS = "tamanhos_recursos.json"
+
+MEDIR = "medir"
+BLOQUEAR = "bloquear"
+
+
+def _sem_parametros(url):
+    return url.split("?", 1)[0].split("#", 1)[0]
+
+
+class FiltroRecursos:
+    """
+    Filtro de pedidos do contexto do navegador (e-CAC e iframe do EFD-Reinf).
+
+    - modo "medir": nada é bloqueado; conta os pedidos e bytes que o filtro
+      bloquearia e guarda o tamanho de cada recurso em CAMINHO_TAMANHOS
+    - modo "bloquear": aborta os pedidos da lista de bloqueio e estima os
+      bytes poupados com os tamanhos medidos antes
+
+    Atenção: com uma rota instalada o Playwright desliga a cache HTTP do
+    navegador, por isso meça (modo "medir" vs "bloquear") antes de deixar o
+    filtro ligado por omissão.
+    """
+
+    def __init__(
+        self,
+        modo=BLOQUEAR,
+        tipos_bloqueados=TIPOS_BLOQUEADOS,
+        padroes_bloqueados=PADROES_BLOQUEADOS,
+        padroes_permitidos=PADROES_PERMITIDOS,
+        caminho_tamanhos=CAMINHO_TAMANHOS,
+    ):
+        if modo not in (MEDIR, BLOQUEAR):
+            raise ValueError(f"Modo de filtro desconhecido: {modo!r}")
+        self.modo = modo
+        self.tipos_bloqueados = set(tipos_bloqueados)
+        self.padroes_bloqueados = [re.compile(p) for p in padroes_bloqueados]
+        self.padroes_permitidos = [re.compile(p) for p in padroes_permitidos]
+        self.caminho_tamanhos = caminho_tamanhos
+        self.tamanhos = {}
+        if os.path.exists(caminho_tamanhos):
+            with open(caminho_tamanhos, encoding="utf-8") as ficheiro:
+                self.tamanhos = json.load(ficheiro)
+
+        self.total_pedidos = 0
+        self.total_bytes = 0
+        # Pedidos (e bytes) bloqueados, ou que seriam bloqueados no modo "medir",
+        # por tipo de recurso
+        self.filtrados = {}
+        self.bytes_filtrados = 0
+        self.filtrados_sem_tamanho = 0
+        self._medicoes = set()
+
+    def deve_bloquear(self, pedido):
+        """Decide pelo tipo de recurso e pelo URL se o pedido seria bloqueado."""
+        if pedido.resource_type in TIPOS_SEMPRE_PERMITIDOS:
+            return False
+        url = pedido.url
+        if any(padrao.search(url) for padrao in self.padroes_permitidos):
+            return False
+        if any(padrao.search(url) for padrao in self.padroes_bloqueados):
+            return True
+        return pedido.resource_type in self.tipos_bloqueados
+
+    async def instalar(self, context):
+        """Liga o filtro a todas as abas (atuais e futuras) do contexto."""
+        if self.modo == BLOQUEAR:
+            await context.route("**/*", self._tratar_rota)
+        context.on("requestfinished", self._ao_terminar_pedido)
+        print(f"Filtro de recursos ligado (modo '{self.modo}').")
+
+    async def _tratar_rota(self, route):
+        pedido = route.request
+        if self.deve_bloquear(pedido):
+            self._contar_filtrado(pedido)
+            tamanho = self.tamanhos.get(_sem_parametros(pedido.url))
+            if tamanho is None:
+                self.filtrados_sem_tamanho += 1
+            else:
+                self.bytes_filtrados += tamanho
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    def _contar_filtrado(self, pedido):
+        tipo = pedido.resource_type
+        self.filtrados[tipo] = self.filtrados.get(tipo, 0) + 1
+
+    def _ao_terminar_pedido(self, pedido):
+        # sizes() é assíncrono: medimos numa tarefa e esperamos por todas no fim
+        tarefa = asyncio.ensure_future(self._medir(pedido))
+        self._medicoes.add(tarefa)
+        tarefa.add_done_callback(self._medicoes.discard)
+
+    async def _medir(self, pedido):
+        try:
+            tamanhos = await pedido.sizes()
+        except Exception:
+            return  # A aba pode ter fechado entretanto
+        tamanho = tamanhos["responseBodySize"] + tamanhos["responseHeadersSize"]
+        self.total_pedidos += 1
+        self.total_bytes += tamanho
+        if self.modo == MEDIR and self.deve_bloquear(pedido):
+            self._contar_filtrado(pedido)
+            self.bytes_filtrados += tamanho
+            self.tamanhos[_sem_parametros(pedido.url)] = tamanho
+
+    async def finalizar(self):
+        """Espera as últimas medições, grava os tamanhos e mostra o relatório."""
+        if self._medicoes:
+            await asyncio.gather(*self._medicoes, return_exceptions=True)
+        if self.modo == MEDIR:
+            with open(self.caminho_tamanhos, "w", encoding="utf-8") as ficheiro:
+                json.dump(self.tamanhos, ficheiro, indent=1)
+        self.imprimir_relatorio()
+
+    def imprimir_relatorio(self):
+        quantidade = sum(self.filtrados.values())
+        por_tipo = ", ".join(
+            f"{total} {tipo}" for tipo, total in sorted(self.filtrados.items())
+        )
+        kb_filtrados = self.bytes_filtrados / 1024
+        if self.modo == MEDIR:
+            print(
+                f"\nFiltro de recursos (medição): {self.total_pedidos} pedidos, "
+                f"{self.total_bytes / 1024:.0f} KB recebidos. O modo 'bloquear' "
+                f"pouparia {quantidade} pedidos ({por_tipo or 'nenhum'}) e "
+                f"{kb_filtrados:.0f} KB."
+            )
+        else:
+            aviso = ""
+            if self.filtrados_sem_tamanho:
+                aviso = (
+                    f"; {self.filtrados_sem_tamanho} sem tamanho conhecido "
+                    "(corra uma vez no modo 'medir' para os estimar)"
+                )
+            print(
+                f"\nFiltro de recursos: {quantidade} pedidos bloqueados "
+                f"({por_tipo or 'nenhum'}), cerca de {kb_filtrados:.0f} KB "
+                f"poupados{aviso}. Passaram {self.total_pedidos} pedidos "
+                f"({self.total_bytes / 1024:.0f} KB)."
+            )
@@ -0,0 +1,92 @@
+# --- CONFIGURAÇÃO ---
+# Com True, cada secção do formulário é preenchida numa única chamada ao navegador.
+# Com False, volta ao caminho antigo: um fill/select_option por campo.
+PREENCHIMENTO_RAPIDO = True
+
+# Corre dentro do iframe: preenche todos os campos de uma vez e devolve a lista
+# dos data-testid que não puderam ser preenchidos (para o caminho de reserva).
+# Campos escondidos ou desativados contam como falha: a secção ainda não foi
+# mostrada (ou vai ser redesenhada) e o caminho de reserva espera que o campo
+# esteja pronto, em vez de escrever num elemento que o SPA vai descartar.
+# O valor é aplicado pelo "setter" nativo do elemento, para que frameworks como
+# Angular/React percebam a mudança, e depois disparamos input/change/blur como
+# faria um utilizador a escrever.
+_SCRIPT_PREENCHIMENTO = """
+(corpo, valores) => {
+    const documento = corpo.ownerDocument;
+    const digitos = (texto) => texto.replace(/\\D/g, "");
+    const visivel = (elemento) => elemento.checkVisibility
+        ? elemento.checkVisibility({ checkOpacity: true, checkVisibilityCSS: true })
+        : elemento.getClientRects().length > 0;
+    const falhas = [];
+    for (const [testid, valor] of Object.entries(valores)) {
+        const campo = documento.querySelector(`[data-testid="${testid}"]`);
+        if (!campo || !visivel(campo) || campo.matches(":disabled") || campo.readOnly) {
+            falhas.push(testid);
+            continue;
+        }
+        if (campo.tagName === "SELECT") {
+            if (![...campo.options].some((opcao) => opcao.value === valor)) {
+                falhas.push(testid);
+                continue;
+            }
+            campo.value = valor;
+        } else {
+            const prototipo = campo.tagName === "TEXTAREA"
+                ? HTMLTextAreaElement.prototype
+                : HTMLInputElement.prototype;
+            Object.getOwnPropertyDescriptor(prototipo, "value").set.call(campo, valor);
+        }
+        campo.dispatchEvent(new Event("input", { bubbles: true }));
+        campo.dispatchEvent(new Event("change", { bubbles: true }));
+        campo.dispatchEvent(new FocusEvent("blur"));
+        // Campos com máscara reformatam o valor (ex.: CNPJ com pontos), por isso
+        // também aceitamos quando os dígitos coincidem.
+        const aceite = campo.value === valor
+            || (digitos(valor) !== "" && digitos(campo.value) === digitos(valor));
+        if (!aceite) {
+            falhas.push(testid);
+        }
+    }
+    return falhas;
+}
+"""
+
+
+async def preencher_campo(frame_locator, testid, valor, select=False):
+    """Caminho antigo: um fill (ou select_option) com as esperas do Playwright."""
+    campo = frame_locator.locator(f'[data-testid="{testid}"]')
+    if select:
+        await campo.select_option(value=valor)
+    else:
+        await campo.fill(valor)
+
+
+async def preencher_secao(frame_locator, valores, selects=()):
+    """
+    Preenche uma secção do formulário dentro do iframe.
+
+    - valores: dicionário {data-testid: valor}, preenchido pela ordem dada
+    - selects: data-testid dos campos <select> (usam select_option no caminho antigo)
+
+    Primeiro tenta tudo numa só avaliação no iframe; os campos que resistirem
+    (ainda não visíveis, desativados, máscara que rejeitou o valor...) são
+    preenchidos de novo, um a um, pelo caminho antigo.
+    """
+    valores = {
+        testid: "" if valor is None else str(valor) for testid, valor in valores.items()
+    }
+
+    if PREENCHIMENTO_RAPIDO:
+        falhas = await frame_locator.locator("body").evaluate(
+            _SCRIPT_PREENCHIMENTO, valores
+        )
+        if falhas:
+            print(f"  Preenchimento campo a campo para: {', '.join(falhas)}")
+    else:
+        falhas = list(valores)
+
+    for testid in falhas:
+        await preencher_campo(
+            frame_locator, testid, valores[testid], select=testid in selects
+        )
@@ -0,0 +1,235 @@
+import re
+
+from automacao.esperas import clicar_e_aguardar_resposta
+from automacao.preenchimento_rapido import preencher_secao
+from rastreamento import passo, registro
+
+# --- CONFIGURAÇÃO ---
+PERIODO_APURACAO = (
+    "09/2025"  # alterar depois para o usuario inserir ou pegar do mes atual
+)
+CNPJ_ESTABELECIMENTO = "00394494013700"  # CNPJ PRF
+# Menu do EFD-Reinf de onde parte cada evento (também usado para repor a aba)
+TESTID_MENU_PRINCIPAL = "menu_retencoes_previdenciarias_series_r2000_e_r3000"
+
+
+class RascunhoIncerto(Exception):
+    """
+    Falha no clique em "Salvar rascunho" ou depois dele: o portal pode já ter
+    gravado o rascunho, por isso a nota não é repetida automaticamente.
+    """
+
+
+def chave_evento(cadastro, periodo, cnpj_estabelecimento):
+    """
+    Notas com o mesmo período, estabelecimento e fornecedor cabem num único
+    evento R2010. O CNPJ é comparado só pelos dígitos.
+    """
+    cnpj_fornecedor = re.sub(r"\D", "", str(cadastro.get("CNPJ FORNECEDOR") or ""))
+    return (periodo, cnpj_estabelecimento, cnpj_fornecedor)
+
+
+def agrupar_por_evento(
+    lista_de_cadastros,
+    periodo=PERIODO_APURACAO,
+    cnpj_estabelecimento=CNPJ_ESTABELECIMENTO,
+):
+    """
+    Agrupa as notas por (período, CNPJ do estabelecimento, CNPJ do fornecedor).
+    Devolve uma lista de grupos (listas de notas), na ordem em que cada
+    fornecedor aparece pela primeira vez.
+    """
+    grupos = {}
+    for cadastro in lista_de_cadastros:
+        grupos.setdefault(
+            chave_evento(cadastro, periodo, cnpj_estabelecimento), []
+        ).append(cadastro)
+    return list(grupos.values())
+
+
+async def abrir_evento_r2010(
+    frame_locator, cnpj_fornecedor_nf, periodo, cnpj_estabelecimento
+):
+    """
+    Abre o menu R2010, inclui um novo evento e preenche o cabeçalho
+    (período, estabelecimento e prestador) até à secção de notas fiscais.
+    """
+    # -----------------------------------------------------
+    # ABRINDO O MENU PARA ACESSAR "RETENÇÃO DE CONTRIBUIÇÃO PREVIDENCIÁRIA TOMADORES DE SERVIÇOS (R2010)"
+    menu_principal_locator = frame_locator.locator(
+        f'[data-testid="{TESTID_MENU_PRINCIPAL}"]'
+    )
+    with passo("menu_hover"):
+        await menu_principal_locator.hover()
+    print("Menu aberto com sucesso!")
+    testid_item_submenu = (
+        "menu_retencao_contribuicao_previdenciaria_tomadores_de_servicos_r2010"
+    )
+    item_submenu_locator = frame_locator.locator(
+        f'[data-testid="{testid_item_submenu}"]'
+    )
+    with passo("menu_r2010"):
+        await item_submenu_locator.click()
+    print("Opção 'Retenção Contribuição Previdenciária...' clicada com sucesso!")
+    # -----------------------------------------------------
+    # ACESSANDO AO BOTÃO DE INCLUIR NOVO EVENTO
+    testid_do_botao = "botao_evento_incluir_novo"
+    botao_incluir = frame_locator.locator(f'[data-testid="{testid_do_botao}"]')
+    with passo("botao_evento_incluir_novo"):
+        await botao_incluir.click()
+    print("Botão '+ Incluir novo evento' clicado com sucesso!")
+    # -----------------------------------------------------
+    # PREENCHIMENTO DO FORMULÁRIO
+    # CAMPOS "PERÍODO DE APURAÇÃO", TIPO DE INSCRIÇÃO E CNPJ PRF, CNPJ FORNECEDOR
+    # data_atual = datetime.date.today()
+    # valor_a_preencher_dinamico = data_atual.strftime("%m/%Y") # Ex: "09/2025"
+    with passo("preencher_cabecalho"):
+        await preencher_secao(
+            frame_locator,
+            {
+                "periodo_apuracao": periodo,
+                "tipo_inscricao_estabelecimento": "1",
+                "numero_inscricao_cnpj": cnpj_estabelecimento,
+                "cnpj_prestador": cnpj_fornecedor_nf,
+            },
+            selects=("tipo_inscricao_estabelecimento",),
+        )
+    print("Período de apuração, CNPJ PRF e CNPJ do Prestador preenchidos com sucesso!")
+    # -----------------------------------------------------
+    # CONFIRMAÇÃO BOTÃO "CONTINUAR"
+    testid_do_botao = "botao_continuar"
+    botao_continuar = frame_locator.locator(f'[data-testid="{testid_do_botao}"]')
+    with passo("botao_continuar"):
+        await clicar_e_aguardar_resposta(botao_continuar, testid_do_botao)
+    print("Botão 'Continuar' clicado com sucesso!")
+    # -----------------------------------------------------
+    # SELECIONANDO OS CAMPOS "INDICATIVO DE PRESTAÇÃO DE SERVIÇOS" E "PRESTADOR É CONTRIBUINTE"
+    with passo("preencher_indicativos"):
+        await preencher_secao(
+            frame_locator,
+            {"indicativo_obra": "0", "indicativo_cprb": "0"},
+            selects=("indicativo_obra", "indicativo_cprb"),
+        )
+    print(
+        "Opções dos campos 'Indicativo de Obra' e 'Indicativo CPRB' selecionadas com sucesso!"
+    )
+
+
+async def incluir_nota_fiscal(frame_locator, cadastro_atual, indice_nf):
+    """
+    Inclui uma nota fiscal no evento aberto e o respetivo tipo de serviço.
+    indice_nf é a posição da nota no evento (0 para a primeira), usada no
+    data-testid do link de inclusão do tipo de serviço dessa nota.
+    """
+    # usando as chaves do dicionário (os nomes das colunas)
+    num_nf_principal = cadastro_atual.get("NUMERO DA NF")
+    serie_nf = cadastro_atual.get("SERIE NF")
+    data_emissao_nf = cadastro_atual.get("DATA DE EMISSAO NF")
+    valor_bruto_nf = cadastro_atual.get("VALOR BRUTO")
+    valor_retencao_nf = cadastro_atual.get("VALOR DA RETENÇÃO")
+    # -----------------------------------------------------
+    # CLICANDO EM INCLUIR NOTAS FISCAIS
+    testid_do_link_correto = "botao_inclusao_nfs"
+    link_incluir_nova_nf = frame_locator.get_by_test_id(testid_do_link_correto)
+    with passo("botao_inclusao_nfs"):
+        await link_incluir_nova_nf.click()
+    print("Link '[Incluir Nova]' da seção 'Notas fiscais' clicado com sucesso!")
+    # -----------------------------------------------------
+    # INCLUINDO DADOS DA NOTA FISCAL
+    with passo("preencher_nf"):
+        await preencher_secao(
+            frame_locator,
+            {
+                "serie": serie_nf,
+                "numero_documento": num_nf_principal,
+                "data_emissao_nf": data_emissao_nf,
+                "valor_bruto": valor_bruto_nf,
+            },
+        )
+    print("\nTodos os campos da nota fiscal foram preenchidos com sucesso!")
+    testid_do_botao_salvar = "botao_salvar_nfs"
+    botao_salvar = frame_locator.locator(f'[data-testid="{testid_do_botao_salvar}"]')
+    with passo("botao_salvar_nfs"):
+        await clicar_e_aguardar_resposta(botao_salvar, testid_do_botao_salvar)
+    print("Dados salvos com sucesso e a página foi atualizada!")
+    # -----------------------------------------------------
+    # CLICANDO EM INCLUIR NOVO TIPO DE SERVIÇO (DA NOTA NA POSIÇÃO indice_nf)
+    testid_do_link_tipo_servico = f"botao_inclusao_info_tp_serv_{indice_nf}"
+    link_incluir_novo_tipo_servico = frame_locator.get_by_test_id(
+        testid_do_link_tipo_servico
+    )
+    with passo("botao_inclusao_info_tp_serv"):
+        await link_incluir_novo_tipo_servico.click()
+    print("Link '[Incluir Novo]' da seção 'Serviços tomados' clicado com sucesso!")
+    # -----------------------------------------------------
+    # PREENCHENDO DADOS DO TIPO DE SERVIÇO E VALORES DA RETENÇÃO
+    valor_padrao_servico = "100000002"
+    with passo("preencher_tipo_servico"):
+        await preencher_secao(
+            frame_locator,
+            {
+                "tipo_servico": valor_padrao_servico,
+                "valor_base_ret": valor_bruto_nf,
+                "valor_retencao": valor_retencao_nf,
+            },
+            selects=("tipo_servico",),
+        )
+    print("\nTipo de serviço e campos de valores preenchidos com sucesso!")
+    # -----------------------------------------------------
+    # SALVANDO O FORMULÁRIO DO TIPO DE SERVIÇO
+    testid_botao = "botao_salvar_info_tpserv"
+    botao_salvar_servico = frame_locator.locator(f'[data-testid="{testid_botao}"]')
+    with passo("botao_salvar_info_tpserv"):
+        await clicar_e_aguardar_resposta(botao_salvar_servico, testid_botao)
+    print("Botão 'Salvar' do serviço foi clicado.")
+
+
+async def salvar_rascunho(frame_locator):
+    """Grava o evento aberto como rascunho."""
+    # -----------------------------------------------------
+    # SALVANDO COMO RASCUNHO
+    testid_salvar_rascunho = "botao_salvar_rascunho"
+    botao_salvar_rascunho = frame_locator.locator(
+        f'[data-testid="{testid_salvar_rascunho}"]'
+    )
+    with passo("botao_salvar_rascunho"):
+        try:
+            await clicar_e_aguardar_resposta(
+                botao_salvar_rascunho, testid_salvar_rascunho
+            )
+        except Exception as e:
+            raise RascunhoIncerto(
+                f"{e} O rascunho pode ter sido gravado: confira no portal."
+            ) from e
+    print("Botão 'Salvar rascunho' apareceu e foi clicado com sucesso!")
+    # -----------------------------------------------------
+
+
+async def registrar_evento_r2010(
+    page,
+    cadastros,
+    periodo=PERIODO_APURACAO,
+    cnpj_estabelecimento=CNPJ_ESTABELECIMENTO,
+):
+    """
+    Cria um único evento R2010 (rascunho) com todas as notas recebidas.
+
+    Recebe a página já autenticada, com o EFD-Reinf aberto no iframe #frmApp,
+    e a lista de notas (linhas do relatório) de um mesmo fornecedor. O evento é
+    aberto uma vez, as notas são incluídas uma a uma e o rascunho é salvo no fim.
+    """
+    print("Localizando o iframe com id='frmApp'...")
+    frame_locator = page.frame_locator("#frmApp")
+    print("Iframe localizado com sucesso!")
+
+    numeros = ", ".join(str(c.get("NUMERO DA NF")) for c in cadastros)
+    with registro(f"NF {numeros}"), passo("evento_r2010"):
+        await abrir_evento_r2010(
+            frame_locator,
+            cadastros[0].get("CNPJ FORNECEDOR"),
+            periodo,
+            cnpj_estabelecimento,
+        )
+        for indice_nf, cadastro_atual in enumerate(cadastros):
+            await incluir_nota_fiscal(frame_locator, cadastro_atual, indice_nf)
+        await salvar_rascunho(frame_locator)
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import time
+import urllib.request
+
+from playwright.async_api import Error as PlaywrightError
+
+# --- CONFIGURAÇÃO ---
+# Estado guardado entre execuções: URL do EFD-Reinf e se o perfil já foi
+# escolhido nesta sessão. Os cookies duradouros ficam no perfil do Chrome
+# (USER_DATA_DIR); os de sessão expiram com ele, como o portal espera.
+CAMINHO_ESTADO_SESSAO = "sessao_reinf.json"
+# Com True, os cookies da sessão também são gravados (em texto simples!) e
+# repostos num Chrome novo. ATENÇÃO: dão acesso à sessão do e-CAC e contornam
+# a expiração dos cookies de sessão; só ligue numa máquina de uso exclusivo.
+GUARDAR_COOKIES = False
+# Tempo máximo (s) à espera que um Chrome acabado de abrir aceite ligações CDP
+TEMPO_MAXIMO_CDP = 15
+INTERVALO_CDP = 0.1
+# Tempo máximo (ms) à espera do #frmApp ao abrir diretamente o URL do EFD-Reinf
+TEMPO_ATALHO_REINF = 10000
+
+
+def versao_cdp(porta):
+    """Resposta de /json/version do Chrome na porta indicada, ou None se não houver."""
+    try:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{porta}/json/version", timeout=0.5
+        ) as resposta:
+            return json.load(resposta)
+    except (OSError, ValueError):
+        return None
+
+
+async def aguardar_cdp(porta, tempo_maximo=TEMPO_MAXIMO_CDP):
+    """Consulta o endpoint CDP até o Chrome responder (em vez de uma pausa fixa)."""
+    limite = time.monotonic() + tempo_maximo
+    while True:
+        versao = await asyncio.to_thread(versao_cdp, porta)
+        if versao:
+            return versao
+        if time.monotonic() > limite:
+            raise TimeoutError(
+                f"O Chrome não respondeu na porta {porta} em {tempo_maximo} s."
+            )
+        await asyncio.sleep(INTERVALO_CDP)
+
+
+class SessaoReinf:
+    """
+    Reaproveita o Chrome e a sessão do e-CAC entre execuções:
+
+    - se já houver um Chrome com a porta de depuração aberta, liga-se a ele;
+      senão abre um e espera o endpoint CDP responder
+    - se uma aba já estiver no EFD-Reinf, continua dessa aba
+    - senão abre diretamente o URL do EFD-Reinf da última execução e só faz o
+      caminho completo (login, perfil, menus) se a sessão tiver expirado
+    """
+
+    def __init__(self, porta, iniciar_chrome, caminho_estado=CAMINHO_ESTADO_SESSAO):
+        self.porta = porta
+        self.iniciar_chrome = iniciar_chrome
+        self.caminho_estado = caminho_estado
+        self.estado = {}
+        if os.path.exists(caminho_estado):
+            with open(caminho_estado, encoding="utf-8") as ficheiro:
+                self.estado = json.load(ficheiro)
+
+    def _gravar_estado(self):
+        with open(self.caminho_estado, "w", encoding="utf-8") as ficheiro:
+            json.dump(self.estado, ficheiro, ensure_ascii=False, indent=1)
+
+    async def conectar(self, playwright):
+        """Liga o Playwright ao Chrome (existente ou novo) e devolve (browser, context, page)."""
+        versao = await asyncio.to_thread(versao_cdp, self.porta)
+        chrome_novo = versao is None
+        if chrome_novo:
+            self.iniciar_chrome()
+            versao = await aguardar_cdp(self.porta)
+        else:
+            print(f"Chrome já aberto na porta {self.porta}: reaproveitando a sessão.")
+
+        # O id do processo do Chrome muda a cada arranque
+        id_navegador = versao["webSocketDebuggerUrl"].rsplit("/", 1)[-1]
+        repor_cookies = chrome_novo and GUARDAR_COOKIES and self.estado.get("cookies")
+        if self.estado.get("navegador") != id_navegador and not repor_cookies:
+            # Sessão nova no portal: o perfil tem de ser escolhido outra vez
+            self.estado["perfil_escolhido"] = False
+        self.estado["navegador"] = id_navegador
+
+        print("Conectando o Playwright ao Chrome...")
+        browser = await playwright.chromium.connect_over_cdp(
+            f"http://127.0.0.1:{self.porta}"
+        )
+        context = browser.contexts[0]
+        if repor_cookies:
+            await context.add_cookies(self.estado["cookies"])
+            print("Cookies da sessão anterior repostos.")
+        page = context.pages[0] if context.pages else await context.new_page()
+        return browser, context, page
+
+    async def abrir_reinf(self, context, page, entrar_no_reinf):
+        """
+        Devolve uma aba com o EFD-Reinf (iframe #frmApp) aberto, pelo caminho
+        mais curto possível. entrar_no_reinf(page, perfil_escolhido) faz o
+        caminho completo pelo e-CAC.
+        """
+        for pagina in context.pages:
+            if await pagina.locator("#frmApp").count():
+                print("O EFD-Reinf já está aberto numa aba: continuando dessa aba.")
+                await self._lembrar(context, pagina)
+                return pagina
+
+        url_reinf = self.estado.get("url_reinf")
+        if url_reinf:
+            print("Abrindo diretamente o EFD-Reinf da última execução...")
+            try:
+                await page.goto(url_reinf)
+                await page.locator("#frmApp").wait_for(
+                    state="attached", timeout=TEMPO_ATALHO_REINF
+                )
+                print("Sessão ainda válida: EFD-Reinf aberto sem novo login.")
+                await self._lembrar(context, page)
+                return page
+            except PlaywrightError as e:
+                # Tempo esgotado, redirecionamento para o login ou erro de navegação
+                motivo = (str(e).splitlines() or ["erro de navegação"])[0]
+                print(
+                    f"A sessão expirou ({motivo}): seguindo pelo caminho completo "
+                    "do e-CAC."
+                )
+
+        await entrar_no_reinf(page, self.estado.get("perfil_escolhido", False))
+        await page.locator("#frmApp").wait_for(state="attached")
+        self.estado["perfil_escolhido"] = True
+        await self._lembrar(context, page)
+        return page
+
+    async def _lembrar(self, context, page):
+        """Guarda o URL do EFD-Reinf (e, se pedido, os cookies) para a próxima execução."""
+        self.estado["url_reinf"] = page.url
+        if GUARDAR_COOKIES:
+            self.estado["cookies"] = (await context.storage_state())["cookies"]
+        else:
+            # Não deixa no disco cookies gravados por versões anteriores
+            self.estado.pop("cookies", None)
+        self._gravar_estado()
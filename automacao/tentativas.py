@@ -0,0 +1,132 @@
+import asyncio
+import json
+import random
+from datetime import datetime
+
+from automacao.r2010 import TESTID_MENU_PRINCIPAL, RascunhoIncerto
+from rastreamento import passo
+
+# --- CONFIGURAÇÃO ---
+# Tentativas por evento R2010 (a primeira incluída) antes de o desistir
+MAX_TENTATIVAS = 3
+# Espera (s) antes da segunda tentativa; dobra a cada nova falha, até ESPERA_MAXIMA
+ESPERA_INICIAL = 2.0
+ESPERA_MAXIMA = 60.0
+# Tempo máximo (ms) para a aba voltar a mostrar o menu do EFD-Reinf
+TEMPO_RECUPERACAO = 30000
+# Notas que falharam em todas as tentativas, uma linha JSON por evento, para
+# conferir e reprocessar depois
+CAMINHO_FALHAS = "notas_com_falha.jsonl"
+
+
+def espera_da_tentativa(tentativa, espera_inicial=ESPERA_INICIAL):
+    """
+    Espera (s) depois da falha número `tentativa`: cresce exponencialmente e
+    leva uma variação aleatória, para que várias abas não repitam ao mesmo tempo.
+    """
+    espera = min(espera_inicial * 2 ** (tentativa - 1), ESPERA_MAXIMA)
+    return espera * random.uniform(0.5, 1.0)
+
+
+async def voltar_ao_menu(pagina):
+    """
+    Põe a aba num estado conhecido: recarrega o EFD-Reinf (o formulário a meio
+    é descartado, nada foi salvo como rascunho) e espera o menu principal, de
+    onde registrar_evento_r2010 volta a entrar no R2010.
+    """
+    with passo("recuperar_aba"):
+        await pagina.reload()
+        menu_principal = pagina.frame_locator("#frmApp").locator(
+            f'[data-testid="{TESTID_MENU_PRINCIPAL}"]'
+        )
+        await menu_principal.wait_for(state="visible", timeout=TEMPO_RECUPERACAO)
+
+
+class ListaFalhas:
+    """
+    Eventos que falharam em todas as tentativas ("dead-letter"). Ficam em
+    memória para o resumo final e, se houver caminho, são gravados logo no
+    ficheiro JSONL, para não se perderem se a execução parar a meio.
+    """
+
+    def __init__(self, caminho=CAMINHO_FALHAS):
+        self.caminho = caminho
+        self.eventos = []
+
+    def adicionar(self, cadastros, erro, tentativas):
+        falha = {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "erro": str(erro),
+            "tentativas": tentativas,
+            "notas": cadastros,
+        }
+        self.eventos.append(falha)
+        if self.caminho:
+            with open(self.caminho, "a", encoding="utf-8") as ficheiro:
+                linha = json.dumps(falha, ensure_ascii=False, default=str)
+                ficheiro.write(linha + "\n")
+
+    def imprimir_resumo(self):
+        if not self.eventos:
+            return
+        total = sum(len(falha["notas"]) for falha in self.eventos)
+        destino = f" (gravadas em {self.caminho})" if self.caminho else ""
+        print(f"\n{total} nota(s) falharam em todas as tentativas{destino}:")
+        for falha in self.eventos:
+            numeros = ", ".join(str(c.get("NUMERO DA NF")) for c in falha["notas"])
+            print(f"  NF {numeros}: {falha['erro']}")
+
+
+def com_tentativas(
+    registrar,
+    falhas=None,
+    max_tentativas=MAX_TENTATIVAS,
+    espera_inicial=ESPERA_INICIAL,
+    recuperar=voltar_ao_menu,
+):
+    """
+    Envolve a corrotina registrar(pagina, cadastros) com novas tentativas.
+
+    Depois de cada falha a aba é reposta num estado conhecido (recuperar) e o
+    evento é repetido após uma espera exponencial. Se todas as tentativas
+    falharem, o evento vai para a lista de falhas e o último erro é levantado,
+    para ser contado (e marcado no diário) por quem chamou.
+
+    Um RascunhoIncerto (falha ao salvar o rascunho) não é repetido: repetir
+    poderia criar um segundo rascunho. Vai logo para a lista de falhas.
+    """
+
+    async def registrar_com_tentativas(pagina, cadastros):
+        numeros = ", ".join(str(c.get("NUMERO DA NF")) for c in cadastros)
+        for tentativa in range(1, max_tentativas + 1):
+            try:
+                return await registrar(pagina, cadastros)
+            except RascunhoIncerto as e:
+                print(
+                    f"A(s) NF(s) {numeros} falharam ao salvar o rascunho ({e}). "
+                    "Sem nova tentativa."
+                )
+                if falhas is not None:
+                    falhas.adicionar(cadastros, e, tentativa)
+                raise
+            except Exception as e:
+                erro = e
+                if tentativa == max_tentativas:
+                    break
+                espera = espera_da_tentativa(tentativa, espera_inicial)
+                print(
+                    f"Falha na tentativa {tentativa}/{max_tentativas} da(s) NF(s) "
+                    f"{numeros}: {e}. Nova tentativa em {espera:.1f} s."
+                )
+            await asyncio.sleep(espera)
+            try:
+                await recuperar(pagina)
+            except Exception as e:
+                # A próxima tentativa ainda pode correr bem; se não, conta como falha
+                print(f"AVISO: não foi possível repor a aba no menu do EFD-Reinf: {e}")
+
+        if falhas is not None:
+            falhas.adicionar(cadastros, erro, max_tentativas)
+        raise erro
+
+    return registrar_com_tentativas
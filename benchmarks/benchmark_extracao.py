@@ -0,0 +1,229 @@
+import argparse  # Para ler as opções da linha de comando
+import contextlib
+import datetime
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+from benchmarks.gerar_corpus import (
+    PASTA_CORPUS,
+    QUANTIDADE_PADRAO,
+    SEMENTE_PADRAO,
+    carregar_gabarito,
+    gerar_corpus,
+)
+from benchmarks.resultados import commit_atual, gravar_resultado, resultado_anterior
+
+try:
+    import resource  # Só existe em Linux/macOS
+except ImportError:
+    resource = None
+
+# Uso (na raiz do projeto):
+#   python -m benchmarks.benchmark_extracao [--quantidade 2000] [--processos 4]
+# --- CONFIGURAÇÃO ---
+# Cada execução acrescenta uma linha a este ficheiro, com o commit medido
+CAMINHO_RESULTADOS = os.path.join("benchmarks", "resultados.jsonl")
+
+
+def _pico_memoria_mb():
+    """
+    Pico de memória residente (MB) deste processo e do maior dos seus filhos
+    já terminados (ex.: processos do pool de extração). None quando não há
+    como medir.
+    """
+    if resource is not None:
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        proprio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+        filhos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor
+        return {"processo": round(proprio, 1), "filhos": round(filhos, 1)}
+    try:
+        import psutil  # Opcional; no Windows dá o pico do próprio processo
+    except ImportError:
+        return None
+    pico = psutil.Process().memory_info().peak_wset / 2**20
+    return {"processo": round(pico, 1), "filhos": None}
+
+
+def _conferir_campo(campo, extraido, esperado):
+    if extraido is None:
+        return False
+    if campo == "TIPO DE SERVIÇO":
+        # O campo lido traz também os rótulos vizinhos; conferimos só o início
+        return extraido.startswith(esperado)
+    return extraido == esperado
+
+
+def medir_precisao(tarefas, resultados, gabarito):
+    """Fração de notas com cada campo igual ao gabarito: {campo: fração}."""
+    acertos = {}
+    for tarefa, dados in zip(tarefas, resultados):
+        esperado = gabarito[os.path.basename(tarefa[1])]
+        for campo, valor in esperado.items():
+            acertos.setdefault(campo, 0)
+            acertos[campo] += _conferir_campo(campo, dados.get(campo), valor)
+    return {campo: round(total / len(tarefas), 4) for campo, total in acertos.items()}
+
+
+def executar_medicao(pasta, num_processos):
+    """
+    Extrai todo o corpus e devolve as métricas da execução.
+
+    Corre num processo novo (ver medir_em_processo_novo), para que o pico de
+    memória medido seja só o da extração.
+    """
+    from extratores.extrator_pdf import expandir_paginas, extrair_em_ordem, listar_pdfs
+    from rastreamento import RASTREADOR
+
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        # As notas sintéticas têm uma página: uma tarefa por ficheiro
+        tarefas, _ = expandir_paginas(listar_pdfs(pasta))
+        inicio = time.perf_counter()
+        resultados = list(extrair_em_ordem(tarefas, num_processos))
+        duracao = time.perf_counter() - inicio
+
+    latencias = {
+        nome: {"p50_ms": round(p50 * 1000, 3), "p95_ms": round(p95 * 1000, 3)}
+        for nome, (_, p50, p95, _) in RASTREADOR.resumo().items()
+    }
+    return {
+        "processos": num_processos,
+        "ficheiros": len(tarefas),
+        "duracao_s": round(duracao, 3),
+        "ficheiros_por_s": round(len(tarefas) / duracao, 1),
+        "pico_memoria_mb": _pico_memoria_mb(),
+        "latencia_por_passo": latencias,
+        "tarefas": tarefas,
+        "resultados": resultados,
+    }
+
+
+def medir_em_processo_novo(pasta, num_processos):
+    """Executa executar_medicao num processo acabado de criar (spawn)."""
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+        return executor.submit(executar_medicao, pasta, num_processos).result()
+
+
+def imprimir_resultado(resultado, anterior):
+    print(f"\n--- Benchmark de extração ({resultado['commit']}) ---")
+    for modo in ("serial", "paralelo"):
+        medicao = resultado.get(modo)
+        if not medicao:
+            continue
+        linha = (
+            f"  {modo:<8} {medicao['processos']:>2} processo(s): "
+            f"{medicao['ficheiros_por_s']:>7.1f} ficheiros/s"
+        )
+        if anterior and anterior.get(modo):
+            variacao = medicao["ficheiros_por_s"] / anterior[modo]["ficheiros_por_s"]
+            linha += f" ({(variacao - 1) * 100:+.1f}% vs {anterior['commit']})"
+        memoria = medicao["pico_memoria_mb"]
+        if memoria:
+            linha += f", pico de memória {memoria['processo']} MB"
+            if memoria["filhos"]:
+                linha += f" (+ {memoria['filhos']} MB por processo do pool)"
+        print(linha)
+
+    print("\n  Latência por passo (serial, ms):")
+    latencias = resultado["serial"]["latencia_por_passo"]
+    largura = max(len(nome) for nome in latencias)
+    for nome, valores in sorted(
+        latencias.items(), key=lambda item: item[1]["p95_ms"], reverse=True
+    ):
+        print(
+            f"    {nome:<{largura}}  p50 {valores['p50_ms']:>8.3f}  "
+            f"p95 {valores['p95_ms']:>8.3f}"
+        )
+
+    print("\n  Precisão por campo:")
+    for campo, fracao in resultado["precisao"].items():
+        print(f"    {campo:<{largura}}  {fracao * 100:6.2f}%")
+
+
+def executar_benchmark(
+    pasta=PASTA_CORPUS,
+    quantidade=QUANTIDADE_PADRAO,
+    semente=SEMENTE_PADRAO,
+    num_processos=None,
+):
+    """
+    Mede a extração no corpus sintético: ficheiros/s, latência por campo,
+    pico de memória e precisão em relação ao gabarito. O corpus só é gerado de
+    novo se faltar ou se a quantidade/semente mudarem.
+    """
+    dados_gabarito = carregar_gabarito(pasta)
+    if (
+        dados_gabarito is None
+        or dados_gabarito["quantidade"] != quantidade
+        or dados_gabarito["semente"] != semente
+    ):
+        gerar_corpus(pasta, quantidade, semente)
+        dados_gabarito = carregar_gabarito(pasta)
+
+    num_processos = num_processos or os.cpu_count() or 1
+    print(f"Medindo a extração de {quantidade} notas (serial)...")
+    serial = medir_em_processo_novo(pasta, 1)
+    paralelo = None
+    if num_processos > 1:
+        print(
+            f"Medindo a extração de {quantidade} notas ({num_processos} processos)..."
+        )
+        paralelo = medir_em_processo_novo(pasta, num_processos)
+
+    tarefas = serial.pop("tarefas")
+    resultados = serial.pop("resultados")
+    precisao = medir_precisao(tarefas, resultados, dados_gabarito["notas"])
+    if paralelo:
+        # O pool tem de devolver exatamente o mesmo que a extração serial
+        paralelo.pop("tarefas")
+        paralelo["igual_ao_serial"] = paralelo.pop("resultados") == resultados
+        if not paralelo["igual_ao_serial"]:
+            print("AVISO: a extração paralela deu resultados diferentes da serial!")
+
+    resultado = {
+        "commit": commit_atual(),
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "maquina": f"{platform.node()} ({os.cpu_count()} núcleos)",
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "corpus": {"quantidade": quantidade, "semente": semente},
+        "processos": num_processos,
+        "serial": serial,
+        "paralelo": paralelo,
+        "precisao": precisao,
+    }
+    anterior = resultado_anterior(
+        CAMINHO_RESULTADOS, resultado, ("corpus", "processos")
+    )
+    imprimir_resultado(resultado, anterior)
+    gravar_resultado(CAMINHO_RESULTADOS, resultado)
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark da extração de NFS-e num corpus sintético."
+    )
+    parser.add_argument("--pasta", default=PASTA_CORPUS)
+    parser.add_argument("--quantidade", type=int, default=QUANTIDADE_PADRAO)
+    parser.add_argument("--semente", type=int, default=SEMENTE_PADRAO)
+    parser.add_argument(
+        "--processos",
+        type=int,
+        default=None,
+        help="processos na medição paralela (por omissão, todos os núcleos)",
+    )
+    argumentos = parser.parse_args()
+    executar_benchmark(
+        argumentos.pasta,
+        argumentos.quantidade,
+        argumentos.semente,
+        argumentos.processos,
+    )
@@ -0,0 +1,196 @@
+import argparse  # Para ler as opções da linha de comando
+import asyncio
+import contextlib
+import datetime
+import os
+import platform
+import random
+import re
+import time
+
+from playwright.async_api import async_playwright
+
+from automacao.abas import abrir_abas_reinf, despachar_em_abas
+from automacao.esperas import usar_esperas
+from automacao.r2010 import agrupar_por_evento, registrar_evento_r2010
+from benchmarks.gerar_corpus import (
+    SEMENTE_PADRAO,
+    gabarito_da_nota,
+    sortear_cnpj,
+    sortear_nota,
+)
+from benchmarks.portal_reinf_simulado import (
+    ESPERAS_PORTAL_SIMULADO,
+    LATENCIA_SERVIDOR_MS,
+    VARIACAO_LATENCIA_MS,
+    PortalReinfSimulado,
+)
+from benchmarks.resultados import commit_atual, gravar_resultado, resultado_anterior
+from rastreamento import RASTREADOR
+
+# Uso (na raiz do projeto):
+#   python -m benchmarks.benchmark_submissao [--quantidade 50] [--abas 4]
+# --- CONFIGURAÇÃO ---
+CAMINHO_RESULTADOS = os.path.join("benchmarks", "resultados_submissao.jsonl")
+QUANTIDADE_PADRAO = 50
+# As notas sintéticas repartem-se por este número de fornecedores (para --agrupar)
+NUM_FORNECEDORES = 10
+
+
+def cadastros_sinteticos(quantidade, semente=SEMENTE_PADRAO):
+    """Linhas do relatório (como as lidas do Excel) com valores sorteados."""
+    sorteio = random.Random(semente)
+    fornecedores = [sortear_cnpj(sorteio) for _ in range(NUM_FORNECEDORES)]
+    cadastros = []
+    for _ in range(quantidade):
+        cadastro = gabarito_da_nota(sortear_nota(sorteio))
+        cadastro["CNPJ FORNECEDOR"] = sorteio.choice(fornecedores)
+        cadastros.append(cadastro)
+    return cadastros
+
+
+def conferir_rascunhos(cadastros, rascunhos):
+    """Quantas notas chegaram ao portal simulado com todos os valores certos."""
+    digitos = lambda texto: re.sub(r"\D", "", str(texto))
+    recebidas = {}
+    for evento in rascunhos:
+        for nf in evento["nfs"]:
+            recebidas[nf["numero_documento"]] = (evento["cabecalho"], nf)
+
+    conferidas = 0
+    for cadastro in cadastros:
+        if cadastro["NUMERO DA NF"] not in recebidas:
+            continue
+        cabecalho, nf = recebidas[cadastro["NUMERO DA NF"]]
+        servico = nf["servicos"][0] if nf["servicos"] else {}
+        conferidas += (
+            digitos(cabecalho["cnpj_prestador"]) == digitos(cadastro["CNPJ FORNECEDOR"])
+            and nf["serie"] == cadastro["SERIE NF"]
+            and nf["data_emissao_nf"] == cadastro["DATA DE EMISSAO NF"]
+            and nf["valor_bruto"] == cadastro["VALOR BRUTO"]
+            and servico.get("valor_retencao") == cadastro["VALOR DA RETENÇÃO"]
+        )
+    return conferidas
+
+
+async def _iterar(lista_de_eventos):
+    for cadastros in lista_de_eventos:
+        yield cadastros
+
+
+async def medir_submissao(portal, cadastros, num_abas, agrupar):
+    """Regista todas as notas no portal simulado e devolve (resumo, duração)."""
+    if agrupar:
+        lista_de_eventos = agrupar_por_evento(cadastros)
+    else:
+        lista_de_eventos = [[cadastro] for cadastro in cadastros]
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            context = await browser.new_context()
+            page = await context.new_page()
+            await page.goto(portal.url)
+            await page.locator("#frmApp").wait_for(state="attached")
+            paginas = await abrir_abas_reinf(context, page, num_abas)
+
+            inicio = time.perf_counter()
+            # As mensagens de cada passo não interessam aqui, só o resumo
+            with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                resumo = await despachar_em_abas(
+                    paginas, _iterar(lista_de_eventos), registrar_evento_r2010
+                )
+            return resumo, time.perf_counter() - inicio
+        finally:
+            await browser.close()
+
+
+def executar_benchmark(
+    quantidade=QUANTIDADE_PADRAO,
+    num_abas=1,
+    agrupar=False,
+    latencia_ms=LATENCIA_SERVIDOR_MS,
+    variacao_ms=VARIACAO_LATENCIA_MS,
+):
+    """
+    Mede a Fase 2 (preenchimento do R2010) de ponta a ponta, num Chromium
+    headless contra o EFD-Reinf simulado: notas/minuto, latência de cada passo
+    e quantas notas chegaram ao portal com os valores certos.
+    """
+    cadastros = cadastros_sinteticos(quantidade)
+    usar_esperas(ESPERAS_PORTAL_SIMULADO)
+    with PortalReinfSimulado(
+        porta=0, latencia_ms=latencia_ms, variacao_ms=variacao_ms
+    ) as portal:
+        resumo, duracao = asyncio.run(
+            medir_submissao(portal, cadastros, num_abas, agrupar)
+        )
+        conferidas = conferir_rascunhos(cadastros, portal.rascunhos())
+
+    latencias = {
+        nome: {"p50_ms": round(p50 * 1000, 1), "p95_ms": round(p95 * 1000, 1)}
+        for nome, (_, p50, p95, _) in RASTREADOR.resumo().items()
+    }
+    resultado = {
+        "commit": commit_atual(),
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "maquina": f"{platform.node()} ({os.cpu_count()} núcleos)",
+        "python": platform.python_version(),
+        "portal": {"latencia_ms": latencia_ms, "variacao_ms": variacao_ms},
+        "quantidade": quantidade,
+        "abas": num_abas,
+        "agrupar": agrupar,
+        "duracao_s": round(duracao, 2),
+        "notas_por_minuto": round(quantidade / duracao * 60, 1),
+        "sucesso": resumo["sucesso"],
+        "falha": resumo["falha"],
+        "conferidas": conferidas,
+        "latencia_por_passo": latencias,
+    }
+
+    anterior = resultado_anterior(
+        CAMINHO_RESULTADOS, resultado, ("portal", "quantidade", "abas", "agrupar")
+    )
+    print(f"\n--- Benchmark de submissão ({resultado['commit']}) ---")
+    linha = (
+        f"  {quantidade} notas, {num_abas} aba(s): "
+        f"{resultado['notas_por_minuto']:.1f} notas/minuto"
+    )
+    if anterior:
+        variacao = resultado["notas_por_minuto"] / anterior["notas_por_minuto"]
+        linha += f" ({(variacao - 1) * 100:+.1f}% vs {anterior['commit']})"
+    print(linha)
+    print(
+        f"  {resumo['sucesso']} com sucesso, {resumo['falha']} com erro, "
+        f"{conferidas} conferidas no portal"
+    )
+    print("\n  Latência por passo (ms):")
+    largura = max((len(nome) for nome in latencias), default=0)
+    for nome, valores in sorted(
+        latencias.items(), key=lambda item: item[1]["p95_ms"], reverse=True
+    ):
+        print(
+            f"    {nome:<{largura}}  p50 {valores['p50_ms']:>8.1f}  "
+            f"p95 {valores['p95_ms']:>8.1f}"
+        )
+    gravar_resultado(CAMINHO_RESULTADOS, resultado)
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark do preenchimento do R2010 no EFD-Reinf simulado."
+    )
+    parser.add_argument("--quantidade", type=int, default=QUANTIDADE_PADRAO)
+    parser.add_argument("--abas", type=int, default=1)
+    parser.add_argument("--agrupar", action="store_true")
+    parser.add_argument("--latencia", type=int, default=LATENCIA_SERVIDOR_MS)
+    parser.add_argument("--variacao", type=int, default=VARIACAO_LATENCIA_MS)
+    argumentos = parser.parse_args()
+    executar_benchmark(
+        argumentos.quantidade,
+        argumentos.abas,
+        argumentos.agrupar,
+        argumentos.latencia,
+        argumentos.variacao,
+    )
@@ -0,0 +1,358 @@
+import argparse  # Para ler as opções da linha de comando
+import datetime
+import functools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+# --- CONFIGURAÇÃO ---
+PASTA_CORPUS = os.path.join("benchmarks", "corpus")
+QUANTIDADE_PADRAO = 2000
+# Mesma semente -> mesmo corpus, para que os resultados sejam comparáveis entre commits
+SEMENTE_PADRAO = 42
+NOME_GABARITO = "gabarito.json"
+
+# Layout da NFS-e de Boa Vista, copiado das notas reais em nf/boa_vista.
+# Cada linha: (x, linha de base, tamanho da fonte, negrito, alinhado à direita, texto)
+# Com alinhamento à direita, x é a margem direita do texto. Os campos entre
+# chavetas são sorteados para cada nota (ver sortear_nota).
+LAYOUT_BOA_VISTA = [
+    (376.1, 31.7, 10, True, False, "Nota Fiscal de Serviços Eletrônica"),
+    (117.0, 38.5, 10, True, False, "Prefeitura Municipal de Boa Vista"),
+    (117.0, 51.0, 8, False, False, "Rua Coronel Pinto, 188"),
+    (117.0, 61.5, 8, False, False, "Centro - BOA VISTA - RR      CEP: 69301-150"),
+    (117.0, 72.0, 8, False, False, "CNPJ: 05.943.030/0001-55"),
+    (359.2, 42.7, 7, False, False, "Número da Nota"),
+    (421.6, 52.7, 10, True, False, "{numero}"),
+    (359.2, 64.5, 7, False, False, "Data e Hora de Emissão"),
+    (370.6, 76.0, 10, True, False, "{data}  {hora}"),
+    (359.2, 87.7, 7, False, False, "Data do Fato Gerador"),
+    (416.2, 99.3, 10, True, False, "{data}"),
+    (360.0, 111.0, 7, False, False, "Código de Verificação"),
+    (384.4, 119.9, 8, True, False, "{codigo}"),
+    (250.4, 133.5, 10, True, False, "Dados do(s) Serviço(s)"),
+    (54.0, 143.2, 7, False, False, "Exigibilidade do ISS / Natureza da Operação"),
+    (54.0, 151.9, 7, True, False, "Exigível"),
+    (243.8, 143.2, 7, False, False, "Local da Prestação"),
+    (243.8, 151.9, 7, True, False, "BOA VISTA/RR - BRASIL"),
+    (417.8, 143.2, 7, False, False, "Local da Incidência"),
+    (417.8, 151.9, 7, True, False, "BOA VISTA/RR"),
+    (241.2, 165.0, 10, True, False, "Prestador do(s) Serviço(s)"),
+    (131.2, 179.2, 8, False, False, "Nome/Razão Social:"),
+    (210.0, 177.6, 8, True, False, "{prestador}"),
+    (131.2, 188.7, 8, False, False, "Nome Fantasia:"),
+    (131.2, 200.2, 8, False, False, "Endereço:"),
+    (210.0, 198.6, 8, True, False, "{endereco}"),
+    (210.0, 209.1, 8, True, False, "CENTRO BOA VISTA - RR     CEP: {cep}"),
+    (131.2, 221.2, 8, False, False, "CPF/CNPJ:"),
+    (210.0, 220.4, 8, True, False, "{cnpj}"),
+    (323.2, 221.2, 8, False, False, "Insc. Municipal:"),
+    (381.8, 220.4, 8, True, False, "{inscricao}"),
+    (131.2, 231.7, 8, False, False, "Telefone:"),
+    (210.0, 230.9, 8, True, False, "{telefone}"),
+    (323.2, 231.7, 8, False, False, "E-mail:"),
+    (381.8, 230.9, 8, True, False, "{email}"),
+    (244.8, 247.5, 10, True, False, "Tomador do(s) Serviço(s)"),
+    (54.0, 261.0, 8, False, False, "Nome/Razão Social:"),
+    (137.2, 260.2, 8, True, False, "MINISTERIO DA JUSTIÇA"),
+    (54.0, 272.7, 8, False, False, "Nome Fantasia:"),
+    (
+        137.2,
+        272.9,
+        8,
+        True,
+        False,
+        "SUPERINTENDENCIA REG. DA POL. RODOV. FEDERAL EM RORAIMA",
+    ),
+    (54.0, 285.8, 8, False, False, "Endereço:"),
+    (137.2, 284.9, 8, True, False, "PROFESSOR DIOMEDES SOUTO MAIOR, 764"),
+    (137.2, 295.4, 8, True, False, "São Vicente BOA VISTA - RR     CEP: 69303-450"),
+    (54.0, 307.2, 8, False, False, "CPF/CNPJ:"),
+    (137.2, 307.4, 8, True, False, "00.394.494/0137-00"),
+    (241.5, 307.2, 8, False, False, "Insc. Municipal:"),
+    (54.0, 321.0, 8, False, False, "Telefone:"),
+    (241.5, 321.0, 8, False, False, "E-mail:"),
+    (231.4, 334.5, 10, True, False, "Discriminação do(s) Serviço(s)"),
+    (54.0, 347.3, 8, False, False, "{discriminacao}"),
+    (54.0, 368.3, 8, False, False, "{postos} POSTOS 44H SEMANAIS"),
+    (54.0, 410.3, 8, False, False, "TOTAL R$ {valor_bruto}"),
+    (54.0, 431.3, 8, False, False, "CONTRATO:{contrato}"),
+    (54.0, 452.3, 8, False, False, "PERÍODO:{periodo}"),
+    # Mesma ordem das notas reais: o texto dos campos vem antes dos rótulos
+    (54.0, 566.0, 8, True, False, "{cnae}"),
+    (54.0, 545.7, 8, True, False, "{item_lc116}"),
+    (54.0, 536.1, 7, False, False, "Classificação do Serviço (LEI 116/2003)"),
+    (54.0, 575.8, 7, False, False, "Valor do(s) Serviço(s)"),
+    (177.8, 575.8, 7, False, False, "Valor Dedução"),
+    (305.2, 575.8, 7, False, False, "Desconto Incondicionado"),
+    (442.5, 575.8, 7, False, False, "Base de Cálculo ISS"),
+    (169.1, 584.7, 8, True, True, "{valor_bruto}"),
+    (297.8, 584.7, 8, True, True, "0,00"),
+    (436.3, 584.7, 8, True, True, "0,00"),
+    (558.6, 584.7, 8, True, True, "{valor_bruto}"),
+    (54.0, 595.3, 7, False, False, "Alíquota ISS (%)"),
+    (177.8, 595.3, 7, False, False, "Valor do ISS"),
+    (305.2, 595.3, 7, False, False, "Valor ISS Retido"),
+    (442.5, 595.3, 7, False, False, "Desconto Condicionado"),
+    (
+        54.0,
+        556.3,
+        7,
+        False,
+        False,
+        "Classificação Nacional de Atividades Econômicas (CNAE 2.1)",
+    ),
+    (153.4, 605.0, 8, True, False, "{aliquota_iss}"),
+    (281.0, 605.0, 8, True, False, "0,00"),
+    (436.3, 605.0, 8, True, True, "{valor_iss}"),
+    (558.5, 605.0, 8, True, True, "0,00"),
+    (263.0, 616.3, 8, True, False, "Retenções Federais"),
+    (54.0, 626.1, 7, False, False, "Imposto de Renda"),
+    (135.0, 626.1, 7, False, False, "PIS"),
+    (221.2, 626.1, 7, False, False, "COFINS"),
+    (305.2, 626.1, 7, False, False, "CSLL"),
+    (396.8, 626.1, 7, False, False, "INSS"),
+    (486.0, 626.1, 7, False, False, "Outras Retenções"),
+    (125.0, 635.0, 8, True, True, "0,00"),
+    (212.0, 635.0, 8, True, True, "0,00"),
+    (298.3, 635.0, 8, True, True, "0,00"),
+    (392.3, 635.0, 8, True, True, "0,00"),
+    (478.8, 635.0, 8, True, True, "{valor_inss}"),
+    (558.0, 635.0, 8, True, True, "0,00"),
+    (294.6, 645.6, 8, True, False, "Total"),
+    (221.0, 655.3, 7, False, False, "Total do(s) Serviço(s)"),
+    (385.2, 655.3, 7, False, False, "Total Líquido"),
+    (380.3, 662.7, 8, True, True, "{valor_bruto}"),
+    (558.3, 662.7, 8, True, True, "{valor_liquido}"),
+    (267.1, 673.3, 8, True, False, "Outras Informações"),
+    (
+        54.0,
+        686.8,
+        8,
+        False,
+        False,
+        "O ISS desta NFS-e será recolhido pelo tomador do(s) serviço(s) "
+        "(MINISTERIO DA JUSTIÇA) através de substituição tributária",
+    ),
+    (54.0, 728.8, 8, False, False, "BANCO DO BRASIL"),
+    (
+        130.4,
+        812.0,
+        8,
+        True,
+        False,
+        "Favor verificar a autenticidade deste documento fiscal no site "
+        "https://boavista.saatri.com.br",
+    ),
+]
+# Faixas cinzentas dos títulos das secções e moldura do cabeçalho
+FAIXAS_BOA_VISTA = [
+    (48.75, 123.75, 560.0, 135.75),
+    (49.5, 155.25, 560.8, 166.5),
+    (49.5, 237.75, 560.0, 249.75),
+    (48.75, 324.75, 560.25, 336.0),
+]
+AREA_BRASAO = (52.5, 27.75, 112.5, 85.5)
+
+# (CNAE, item da LC 116/2003) dos serviços mais comuns nas notas da PRF
+SERVICOS = [
+    (
+        "7810800 - Seleção e agenciamento de mão-de-obra",
+        "17.04 - Recrutamento, agenciamento, seleção e colocação de mão-de-obra.",
+    ),
+    (
+        "7820500 - Locação de mão-de-obra temporária",
+        "17.04 - Recrutamento, agenciamento, seleção e colocação de mão-de-obra.",
+    ),
+    (
+        "8011101 - Atividades de vigilância e segurança privada",
+        "11.02 - Vigilância, segurança ou monitoramento de bens, pessoas e semoventes.",
+    ),
+    (
+        "8121400 - Limpeza em prédios e em domicílios",
+        "7.10 - Limpeza, manutenção e conservação de vias e logradouros públicos.",
+    ),
+]
+PALAVRAS_EMPRESA = [
+    "EXTREMO",
+    "NORTE",
+    "RORAIMA",
+    "AMAZONIA",
+    "CABURAI",
+    "SERVICOS",
+    "LIMPEZA",
+    "SEGURANCA",
+    "VIGILANCIA",
+    "CONSERVACAO",
+    "TERCEIRIZACAO",
+    "MACUXI",
+]
+RUAS = ["RUA FACULDADE CATHEDRAL", "AV. CAPITAO ENE GARCEZ", "RUA CORONEL PINTO"]
+
+
+def formatar_moeda(valor):
+    """1234.5 -> '1.234,50' (formato usado nas notas)."""
+    return f"{valor:,.2f}".translate(str.maketrans(",.", ".,"))
+
+
+def sortear_cnpj(sorteio):
+    """CNPJ aleatório com dígitos verificadores válidos, já formatado."""
+    digitos = [sorteio.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    for pesos in (
+        [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2],
+        [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2],
+    ):
+        resto = sum(d * p for d, p in zip(digitos, pesos)) % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    texto = "".join(map(str, digitos))
+    return f"{texto[:2]}.{texto[2:5]}.{texto[5:8]}/{texto[8:12]}-{texto[12:]}"
+
+
+def sortear_nota(sorteio):
+    """Sorteia os valores variáveis de uma nota de Boa Vista."""
+    data = datetime.date(2025, 1, 1) + datetime.timedelta(days=sorteio.randrange(365))
+    cnae, item_lc116 = sorteio.choice(SERVICOS)
+    valor_bruto = round(sorteio.uniform(300, 250000), 2)
+    valor_inss = round(valor_bruto * 0.11, 2)
+    aliquota_iss = sorteio.choice([2.0, 3.0, 5.0])
+    letras = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    nome = " ".join(sorteio.sample(PALAVRAS_EMPRESA, 3)) + " LTDA"
+    return {
+        "numero": f"{sorteio.randint(1, 99999999):08d}",
+        "data": data.strftime("%d/%m/%Y"),
+        "hora": f"{sorteio.randrange(24):02d}:{sorteio.randrange(60):02d}:{sorteio.randrange(60):02d}",
+        "codigo": "".join(sorteio.choices(letras, k=8))
+        + "-"
+        + "".join(sorteio.choices(letras, k=6)),
+        "prestador": nome,
+        "endereco": f"{sorteio.choice(RUAS)}, {sorteio.randint(1, 3000)}",
+        "cep": f"693{sorteio.randint(0, 99):02d}-{sorteio.randint(0, 999):03d}",
+        "cnpj": sortear_cnpj(sorteio),
+        "inscricao": f"{sorteio.randint(0, 9999999):07d}",
+        "telefone": f"(95) 9{sorteio.randint(0, 999):03d}-{sorteio.randint(0, 9999):04d}",
+        "email": nome.split()[0] + "@EMAIL.COM",
+        "discriminacao": "PRESTAÇÃO DE SERVIÇOS DE " + nome.split()[1],
+        "postos": f"{sorteio.randint(1, 20):02d}",
+        "contrato": f"{sorteio.randint(1, 30)}/{data.year - sorteio.randint(0, 3)}",
+        "periodo": f"01/{data.month:02d}/{data.year} Á 28/{data.month:02d}/{data.year}",
+        "cnae": cnae,
+        "item_lc116": item_lc116,
+        "valor_bruto": formatar_moeda(valor_bruto),
+        "aliquota_iss": formatar_moeda(aliquota_iss),
+        "valor_iss": formatar_moeda(round(valor_bruto * aliquota_iss / 100, 2)),
+        "valor_inss": formatar_moeda(valor_inss),
+        "valor_liquido": formatar_moeda(valor_bruto - valor_inss),
+    }
+
+
+def gabarito_da_nota(valores):
+    """Valores que o extrator de Boa Vista deve devolver para esta nota."""
+    return {
+        "NUMERO DA NF": valores["numero"],
+        "CODIGO DE VERIFICAÇÃO": valores["codigo"],
+        "CNPJ FORNECEDOR": valores["cnpj"],
+        "DATA DE EMISSAO NF": valores["data"],
+        "VALOR BRUTO": valores["valor_bruto"],
+        # O campo lido traz também os rótulos vizinhos; conferimos só o início
+        "TIPO DE SERVIÇO": f"{valores['cnae']} {valores['item_lc116']}",
+        "VALOR DA RETENÇÃO": valores["valor_inss"],
+        "SERIE NF": "1",
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _recursos_de_desenho():
+    """Brasão e fontes, criados uma vez por processo (não passam entre processos)."""
+    brasao = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 150, 150), False)
+    brasao.clear_with(200)
+    return brasao, {False: fitz.Font("helv"), True: fitz.Font("hebo")}
+
+
+def desenhar_nota(tarefa):
+    """
+    Desenha uma NFS-e com o layout de Boa Vista e grava-a no caminho indicado.
+    tarefa é um tuplo (valores sorteados, caminho do PDF).
+    """
+    valores, caminho_pdf = tarefa
+    brasao, fontes = _recursos_de_desenho()
+    with fitz.open() as documento:
+        pagina = documento.new_page(width=595, height=842)
+        for faixa in FAIXAS_BOA_VISTA:
+            pagina.draw_rect(fitz.Rect(faixa), color=None, fill=(0.85, 0.85, 0.85))
+        pagina.insert_image(fitz.Rect(AREA_BRASAO), pixmap=brasao)
+        # Um único TextWriter escreve todo o texto de uma vez (insert_text por
+        # linha reescreve o conteúdo da página a cada chamada)
+        escritor = fitz.TextWriter(pagina.rect)
+        for x, linha_base, tamanho, negrito, direita, modelo in LAYOUT_BOA_VISTA:
+            texto = modelo.format(**valores)
+            fonte = fontes[negrito]
+            if direita:
+                x -= fonte.text_length(texto, fontsize=tamanho)
+            escritor.append((x, linha_base), texto, font=fonte, fontsize=tamanho)
+        escritor.write_text(pagina)
+        documento.save(caminho_pdf, garbage=3, deflate=True)
+
+
+def gerar_corpus(
+    pasta=PASTA_CORPUS, quantidade=QUANTIDADE_PADRAO, semente=SEMENTE_PADRAO
+):
+    """
+    Gera `quantidade` notas de Boa Vista em pasta/boa_vista (a mesma estrutura
+    da pasta nf/) e grava o gabarito com os valores esperados de cada nota.
+    Devolve o gabarito: {nome do ficheiro: {campo: valor}}.
+    """
+    pasta_cidade = os.path.join(pasta, "boa_vista")
+    os.makedirs(pasta_cidade, exist_ok=True)
+    for nome_arquivo in os.listdir(pasta_cidade):
+        if nome_arquivo.lower().endswith(".pdf"):
+            os.remove(os.path.join(pasta_cidade, nome_arquivo))
+
+    # O sorteio é feito todo aqui, por ordem, para que a semente defina o corpus;
+    # só o desenho dos PDFs é repartido pelos processos
+    sorteio = random.Random(semente)
+    gabarito = {}
+    tarefas = []
+    for indice in range(quantidade):
+        valores = sortear_nota(sorteio)
+        nome_arquivo = f"NF_{indice:06d}.pdf"
+        tarefas.append((valores, os.path.join(pasta_cidade, nome_arquivo)))
+        gabarito[nome_arquivo] = gabarito_da_nota(valores)
+
+    num_processos = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=num_processos) as executor:
+        tamanho_lote = max(1, quantidade // (num_processos * 4))
+        for _ in executor.map(desenhar_nota, tarefas, chunksize=tamanho_lote):
+            pass
+
+    with open(os.path.join(pasta, NOME_GABARITO), "w", encoding="utf-8") as ficheiro:
+        json.dump(
+            {"semente": semente, "quantidade": quantidade, "notas": gabarito},
+            ficheiro,
+            ensure_ascii=False,
+            indent=1,
+        )
+    print(f"Corpus com {quantidade} notas gerado em '{pasta_cidade}'.")
+    return gabarito
+
+
+def carregar_gabarito(pasta=PASTA_CORPUS):
+    """Lê o gabarito do corpus, ou None se o corpus ainda não foi gerado."""
+    caminho = os.path.join(pasta, NOME_GABARITO)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding="utf-8") as ficheiro:
+        return json.load(ficheiro)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Gera NFS-e sintéticas de Boa Vista com gabarito."
+    )
+    parser.add_argument("--pasta", default=PASTA_CORPUS)
+    parser.add_argument("--quantidade", type=int, default=QUANTIDADE_PADRAO)
+    parser.add_argument("--semente", type=int, default=SEMENTE_PADRAO)
+    argumentos = parser.parse_args()
+    gerar_corpus(argumentos.pasta, argumentos.quantidade, argumentos.semente)
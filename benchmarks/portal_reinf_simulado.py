@@ -0,0 +1,420 @@
+import argparse  # Para ler as opções da linha de comando
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- CONFIGURAÇÃO ---
+PORTA_PORTAL_SIMULADO = 8765
+# Atraso (ms) de cada chamada ao "servidor" do Reinf, com uma variação aleatória
+# de +/- VARIACAO_LATENCIA_MS, para medir a automação em condições parecidas
+# com as do portal real
+LATENCIA_SERVIDOR_MS = 300
+VARIACAO_LATENCIA_MS = 100
+# Endpoints que confirmam cada botão neste portal (ver ESPERAS_REINF em
+# automacao/esperas.py): a automação espera por eles com usar_esperas()
+ESPERAS_PORTAL_SIMULADO = {
+    "botao_continuar": (("POST",), r"/api/eventos/?(?:\?.*)?$"),
+    "botao_salvar_nfs": (("POST",), r"/api/eventos/[^/?]+/nfs/?(?:\?.*)?$"),
+    "botao_salvar_info_tpserv": (
+        ("POST",),
+        r"/api/eventos/[^/?]+/nfs/[^/?]+/servicos/?(?:\?.*)?$",
+    ),
+    "botao_salvar_rascunho": (
+        ("POST",),
+        r"/api/eventos/[^/?]+/rascunho/?(?:\?.*)?$",
+    ),
+}
+
+# Página principal: só o iframe #frmApp, como no EFD-Reinf real
+_PAGINA_PRINCIPAL = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head><meta charset="utf-8"><title>EFD-Reinf (simulado)</title></head>
+<body>
+  <h1>EFD-Reinf - portal simulado</h1>
+  <iframe id="frmApp" src="/reinf/app" style="width: 100%; height: 90vh"></iframe>
+</body>
+</html>
+"""
+
+# Aplicação dentro do iframe: os mesmos data-testid usados em automacao/r2010.py.
+# Cada botão que no portal real fala com o servidor faz aqui um fetch() POST
+# para a API simulada, e a secção seguinte só aparece depois da resposta.
+_PAGINA_APLICACAO = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>R2010 (simulado)</title>
+<style>
+  section, #submenu { border: 1px solid #999; margin: 6px; padding: 6px; }
+  label { display: block; margin: 2px 0; }
+</style>
+</head>
+<body>
+<nav id="menu">
+  <a href="#" data-testid="menu_retencoes_previdenciarias_series_r2000_e_r3000">
+    Retenções e outras informações (Séries R-2000 e R-3000)</a>
+  <div id="submenu" hidden>
+    <a href="#" data-testid="menu_retencao_contribuicao_previdenciaria_tomadores_de_servicos_r2010">
+      Retenção Contribuição Previdenciária - Tomadores de Serviços (R-2010)</a>
+  </div>
+</nav>
+<p id="mensagem"></p>
+
+<section id="secao_lista" hidden>
+  <button type="button" data-testid="botao_evento_incluir_novo">+ Incluir novo evento</button>
+</section>
+
+<section id="secao_cabecalho" hidden>
+  <label>Período de apuração <input data-testid="periodo_apuracao"></label>
+  <label>Tipo de inscrição
+    <select data-testid="tipo_inscricao_estabelecimento">
+      <option value=""></option><option value="1">CNPJ</option><option value="4">CNO</option>
+    </select></label>
+  <label>Inscrição do estabelecimento <input data-testid="numero_inscricao_cnpj"></label>
+  <label>CNPJ do prestador <input data-testid="cnpj_prestador"></label>
+  <button type="button" data-testid="botao_continuar">Continuar</button>
+</section>
+
+<section id="secao_evento" hidden>
+  <label>Indicativo de obra
+    <select data-testid="indicativo_obra">
+      <option value=""></option><option value="0">Não é obra</option>
+      <option value="1">Empreitada total</option><option value="2">Empreitada parcial</option>
+    </select></label>
+  <label>Prestador é contribuinte da CPRB
+    <select data-testid="indicativo_cprb">
+      <option value=""></option><option value="0">Não</option><option value="1">Sim</option>
+    </select></label>
+  <h3>Notas fiscais <a href="#" data-testid="botao_inclusao_nfs">[Incluir Nova]</a></h3>
+  <ol id="lista_nfs"></ol>
+  <button type="button" data-testid="botao_salvar_rascunho">Salvar rascunho</button>
+</section>
+
+<section id="secao_nf" hidden>
+  <label>Série <input data-testid="serie"></label>
+  <label>Número do documento <input data-testid="numero_documento"></label>
+  <label>Data de emissão <input data-testid="data_emissao_nf"></label>
+  <label>Valor bruto <input data-testid="valor_bruto"></label>
+  <button type="button" data-testid="botao_salvar_nfs">Salvar</button>
+</section>
+
+<section id="secao_tpserv" hidden>
+  <label>Tipo de serviço
+    <select data-testid="tipo_servico">
+      <option value=""></option>
+      <option value="100000001">Limpeza, conservação ou zeladoria</option>
+      <option value="100000002">Vigilância ou segurança</option>
+      <option value="100000003">Construção civil</option>
+    </select></label>
+  <label>Base de cálculo da retenção <input data-testid="valor_base_ret"></label>
+  <label>Valor da retenção <input data-testid="valor_retencao"></label>
+  <button type="button" data-testid="botao_salvar_info_tpserv">Salvar</button>
+</section>
+
+<script>
+const campo = (testid) => document.querySelector(`[data-testid="${testid}"]`);
+const mostrar = (id, visivel = true) => { document.getElementById(id).hidden = !visivel; };
+const valores = (testids) => Object.fromEntries(testids.map((t) => [t, campo(t).value]));
+const limpar = (testids) => { for (const t of testids) campo(t).value = ""; };
+const aoClicar = (testid, acao) => campo(testid).addEventListener("click", (e) => {
+  e.preventDefault();
+  acao(e);
+});
+
+const CAMPOS_CABECALHO = ["periodo_apuracao", "tipo_inscricao_estabelecimento",
+  "numero_inscricao_cnpj", "cnpj_prestador"];
+const CAMPOS_INDICATIVOS = ["indicativo_obra", "indicativo_cprb"];
+const CAMPOS_NF = ["serie", "numero_documento", "data_emissao_nf", "valor_bruto"];
+const CAMPOS_TPSERV = ["tipo_servico", "valor_base_ret", "valor_retencao"];
+const SECOES = ["secao_lista", "secao_cabecalho", "secao_evento", "secao_nf", "secao_tpserv"];
+
+let idEvento = null;
+let indiceNf = null;
+
+async function enviar(url, dados) {
+  const resposta = await fetch(url, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(dados),
+  });
+  const corpo = await resposta.json();
+  if (!resposta.ok) {
+    document.getElementById("mensagem").textContent = `Erro: ${corpo.erro}`;
+    throw new Error(corpo.erro);
+  }
+  return corpo;
+}
+
+// Os campos são limpos no clique (antes da chamada ao servidor) e nunca depois
+// da resposta, para não apagar o que a automação já preencheu entretanto.
+campo("menu_retencoes_previdenciarias_series_r2000_e_r3000")
+  .addEventListener("mouseenter", () => mostrar("submenu"));
+aoClicar("menu_retencao_contribuicao_previdenciaria_tomadores_de_servicos_r2010", () => {
+  mostrar("submenu", false);
+  for (const secao of SECOES) mostrar(secao, false);
+  document.getElementById("mensagem").textContent = "";
+  mostrar("secao_lista");
+});
+aoClicar("botao_evento_incluir_novo", () => {
+  limpar(CAMPOS_CABECALHO);
+  mostrar("secao_cabecalho");
+});
+aoClicar("botao_continuar", async () => {
+  limpar(CAMPOS_INDICATIVOS);
+  document.getElementById("lista_nfs").replaceChildren();
+  const resposta = await enviar("/api/eventos", valores(CAMPOS_CABECALHO));
+  idEvento = resposta.id;
+  mostrar("secao_evento");
+});
+aoClicar("botao_inclusao_nfs", () => {
+  limpar(CAMPOS_NF);
+  mostrar("secao_nf");
+});
+aoClicar("botao_salvar_nfs", async () => {
+  const dados = valores(CAMPOS_NF);
+  const resposta = await enviar(`/api/eventos/${idEvento}/nfs`, dados);
+  mostrar("secao_nf", false);
+  const item = document.createElement("li");
+  item.textContent = `NF ${dados.numero_documento} - R$ ${dados.valor_bruto} `;
+  const link = document.createElement("a");
+  link.href = "#";
+  link.textContent = "[Incluir Novo]";
+  link.dataset.testid = `botao_inclusao_info_tp_serv_${resposta.indice}`;
+  link.addEventListener("click", (e) => {
+    e.preventDefault();
+    indiceNf = resposta.indice;
+    limpar(CAMPOS_TPSERV);
+    mostrar("secao_tpserv");
+  });
+  item.append(link);
+  document.getElementById("lista_nfs").append(item);
+});
+aoClicar("botao_salvar_info_tpserv", async () => {
+  await enviar(`/api/eventos/${idEvento}/nfs/${indiceNf}/servicos`, valores(CAMPOS_TPSERV));
+  mostrar("secao_tpserv", false);
+});
+aoClicar("botao_salvar_rascunho", async () => {
+  await enviar(`/api/eventos/${idEvento}/rascunho`, valores(CAMPOS_INDICATIVOS));
+  document.getElementById("mensagem").textContent = "Rascunho salvo com sucesso.";
+});
+</script>
+</body>
+</html>
+"""
+
+
+class ErroValidacao(Exception):
+    """Dados recusados pela API simulada (respondidos com HTTP 422)."""
+
+
+class PortalReinfSimulado:
+    """
+    Imitação local do EFD-Reinf (R2010) para medir e testar a automação sem o
+    portal real nem login: serve a página com o iframe #frmApp e uma pequena
+    API que guarda os eventos recebidos, com latência configurável.
+
+    Uso:
+        with PortalReinfSimulado(latencia_ms=300) as portal:
+            await page.goto(portal.url)
+            ...
+            print(portal.rascunhos())
+    """
+
+    def __init__(
+        self,
+        porta=PORTA_PORTAL_SIMULADO,
+        latencia_ms=LATENCIA_SERVIDOR_MS,
+        variacao_ms=VARIACAO_LATENCIA_MS,
+    ):
+        self.latencia_ms = latencia_ms
+        self.variacao_ms = variacao_ms
+        self.eventos = {}
+        self._trava = threading.Lock()
+        self._servidor = ThreadingHTTPServer(
+            ("127.0.0.1", porta), _criar_manipulador(self)
+        )
+        self._servidor.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._servidor.server_port}/reinf"
+
+    def iniciar(self):
+        """Começa a servir numa thread à parte e devolve o próprio portal."""
+        self._thread = threading.Thread(
+            target=self._servidor.serve_forever, daemon=True
+        )
+        self._thread.start()
+        print(
+            f"Portal EFD-Reinf simulado em {self.url} "
+            f"(latência {self.latencia_ms} ± {self.variacao_ms} ms)."
+        )
+        return self
+
+    def parar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *excecao):
+        self.parar()
+
+    def rascunhos(self):
+        """Eventos gravados como rascunho, pela ordem de criação."""
+        with self._trava:
+            return [evento for evento in self.eventos.values() if evento["rascunho"]]
+
+    def esperar_latencia(self):
+        atraso = self.latencia_ms + random.uniform(-self.variacao_ms, self.variacao_ms)
+        time.sleep(max(0.0, atraso) / 1000)
+
+    # --- Operações da API simulada ---
+
+    def criar_evento(self, dados):
+        _exigir(dados, ("periodo_apuracao", "numero_inscricao_cnpj", "cnpj_prestador"))
+        if dados.get("tipo_inscricao_estabelecimento") != "1":
+            raise ErroValidacao("Tipo de inscrição do estabelecimento inválido.")
+        with self._trava:
+            id_evento = len(self.eventos) + 1
+            self.eventos[id_evento] = {
+                "id": id_evento,
+                "cabecalho": dados,
+                "nfs": [],
+                "rascunho": False,
+            }
+        return {"id": id_evento}
+
+    def incluir_nf(self, id_evento, dados):
+        _exigir(dados, ("serie", "numero_documento", "data_emissao_nf", "valor_bruto"))
+        with self._trava:
+            nfs = self._evento(id_evento)["nfs"]
+            nfs.append({**dados, "servicos": []})
+            return {"indice": len(nfs) - 1}
+
+    def incluir_servico(self, id_evento, indice_nf, dados):
+        _exigir(dados, ("tipo_servico", "valor_base_ret", "valor_retencao"))
+        with self._trava:
+            nfs = self._evento(id_evento)["nfs"]
+            if indice_nf >= len(nfs):
+                raise ErroValidacao(f"Nota {indice_nf} não existe no evento.")
+            nfs[indice_nf]["servicos"].append(dados)
+        return {"ok": True}
+
+    def salvar_rascunho(self, id_evento, dados):
+        _exigir(dados, ("indicativo_obra", "indicativo_cprb"))
+        with self._trava:
+            evento = self._evento(id_evento)
+            if not evento["nfs"]:
+                raise ErroValidacao("O evento não tem notas fiscais.")
+            if any(not nf["servicos"] for nf in evento["nfs"]):
+                raise ErroValidacao("Há notas sem tipo de serviço.")
+            evento["indicativos"] = dados
+            evento["rascunho"] = True
+        return {"ok": True}
+
+    def _evento(self, id_evento):
+        if id_evento not in self.eventos:
+            raise ErroValidacao(f"Evento {id_evento} não existe.")
+        return self.eventos[id_evento]
+
+
+def _exigir(dados, campos):
+    faltando = [nome for nome in campos if not str(dados.get(nome) or "").strip()]
+    if faltando:
+        raise ErroValidacao(f"Campos obrigatórios em falta: {', '.join(faltando)}")
+
+
+# Rotas da API: (regex do caminho, função que recebe o portal, os grupos e o JSON)
+_ROTAS_API = [
+    (r"/api/eventos", lambda portal, dados: portal.criar_evento(dados)),
+    (
+        r"/api/eventos/(\d+)/nfs",
+        lambda portal, dados, id_evento: portal.incluir_nf(int(id_evento), dados),
+    ),
+    (
+        r"/api/eventos/(\d+)/nfs/(\d+)/servicos",
+        lambda portal, dados, id_evento, indice: portal.incluir_servico(
+            int(id_evento), int(indice), dados
+        ),
+    ),
+    (
+        r"/api/eventos/(\d+)/rascunho",
+        lambda portal, dados, id_evento: portal.salvar_rascunho(int(id_evento), dados),
+    ),
+]
+
+
+def _criar_manipulador(portal):
+    """Classe de pedidos HTTP ligada a este portal (o http.server cria uma por pedido)."""
+
+    class ManipuladorPortal(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path in ("/", "/reinf"):
+                self._responder(200, _PAGINA_PRINCIPAL, "text/html")
+            elif self.path == "/reinf/app":
+                self._responder(200, _PAGINA_APLICACAO, "text/html")
+            elif self.path == "/api/rascunhos":
+                self._responder(200, json.dumps(portal.rascunhos()), "application/json")
+            else:
+                self._responder(
+                    404, json.dumps({"erro": "Não encontrado"}), "application/json"
+                )
+
+        def do_POST(self):
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            try:
+                dados = json.loads(self.rfile.read(tamanho) or b"{}")
+            except json.JSONDecodeError:
+                dados = None
+            portal.esperar_latencia()
+            for padrao, operacao in _ROTAS_API:
+                combinacao = re.fullmatch(padrao, self.path)
+                if combinacao:
+                    break
+            else:
+                self._responder(
+                    404, json.dumps({"erro": "Não encontrado"}), "application/json"
+                )
+                return
+            try:
+                if not isinstance(dados, dict):
+                    raise ErroValidacao("Corpo do pedido inválido.")
+                corpo = operacao(portal, dados, *combinacao.groups())
+                self._responder(200, json.dumps(corpo), "application/json")
+            except ErroValidacao as e:
+                self._responder(422, json.dumps({"erro": str(e)}), "application/json")
+
+        def _responder(self, estado, texto, tipo):
+            conteudo = texto.encode("utf-8")
+            self.send_response(estado)
+            self.send_header("Content-Type", f"{tipo}; charset=utf-8")
+            self.send_header("Content-Length", str(len(conteudo)))
+            self.end_headers()
+            self.wfile.write(conteudo)
+
+        def log_message(self, *argumentos):
+            pass  # Sem uma linha no terminal por pedido
+
+    return ManipuladorPortal
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve o EFD-Reinf simulado.")
+    parser.add_argument("--porta", type=int, default=PORTA_PORTAL_SIMULADO)
+    parser.add_argument("--latencia", type=int, default=LATENCIA_SERVIDOR_MS)
+    parser.add_argument("--variacao", type=int, default=VARIACAO_LATENCIA_MS)
+    argumentos = parser.parse_args()
+    portal = PortalReinfSimulado(
+        argumentos.porta, argumentos.latencia, argumentos.variacao
+    ).iniciar()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        portal.parar()
@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+
+
+def commit_atual():
+    """Hash curto do commit em uso; '+alterado' se houver mudanças por gravar."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        alterado = subprocess.run(["git", "diff", "--quiet", "HEAD"]).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+    return commit + ("+alterado" if alterado else "")
+
+
+def resultado_anterior(caminho, resultado, chaves):
+    """
+    Último resultado gravado em `caminho` de outro commit e com os mesmos
+    valores nas `chaves` (ex.: tamanho do corpus), ou None.
+    """
+    if not os.path.exists(caminho):
+        return None
+    anterior = None
+    with open(caminho, encoding="utf-8") as ficheiro:
+        for linha in ficheiro:
+            registo = json.loads(linha)
+            if registo["commit"] != resultado["commit"] and all(
+                registo.get(chave) == resultado[chave] for chave in chaves
+            ):
+                anterior = registo
+    return anterior
+
+
+def gravar_resultado(caminho, resultado):
+    """Acrescenta o resultado como uma linha JSON ao ficheiro de resultados."""
+    with open(caminho, "a", encoding="utf-8") as ficheiro:
+        ficheiro.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+    print(f"\nResultado acrescentado a '{caminho}'.")
@@ -0,0 +1,202 @@
+import json  # Formato JSONL: uma nota por linha
+import os  # Para trocar o ficheiro temporário pelo final
+import re  # Para comparar só os dígitos do CNPJ e do número na chave da nota
+import sqlite3  # Base de dados local, já incluída no Python
+
+# --- CONFIGURAÇÃO ---
+# Ficheiro que passa as notas da Fase 1 (extração) para a Fase 2 (EFD-Reinf).
+# O formato vem da extensão: ".jsonl", ".sqlite3" (ou ".db") e ".parquet"
+# (este precisa do pacote pyarrow). Um ".xlsx" também pode ser lido, por
+# exemplo um relatório corrigido à mão.
+CAMINHO_REGISTOS = "notas_extraidas.jsonl"
+# Notas por lote ao gravar em Parquet
+LOTE_PARQUET = 5000
+
+# Ordem das colunas do relatório (e das colunas fixas nos formatos tabulares)
+ORDEM_COLUNAS = [
+    "NUMERO DA NF",
+    "MUNICIPIO DA NF",
+    "CODIGO DE VERIFICAÇÃO",
+    "CNPJ FORNECEDOR",
+    "SERIE NF",
+    "DATA DE EMISSAO NF",
+    "VALOR BRUTO",
+    "TIPO DE SERVIÇO",
+    "VALOR DA RETENÇÃO",
+    "STATUS DA EXECUÇÃO",
+    "ARQUIVO",
+    "PAGINA",
+]
+
+
+def chave_nf(cadastro):
+    """
+    Identifica uma nota por (CNPJ do fornecedor, número, código de verificação).
+    O número vem como "00002099" da extração e como 2099 do Excel, por isso
+    comparamos apenas os dígitos, sem zeros à esquerda.
+    """
+    cnpj = re.sub(r"\D", "", str(cadastro.get("CNPJ FORNECEDOR") or ""))
+    numero = re.sub(r"\D", "", str(cadastro.get("NUMERO DA NF") or "")).lstrip("0")
+    codigo = str(cadastro.get("CODIGO DE VERIFICAÇÃO") or "").strip().upper()
+    return f"{cnpj}|{numero}|{codigo}"
+
+
+def _formato(caminho):
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == ".db":
+        return ".sqlite3"
+    if extensao not in (".jsonl", ".sqlite3", ".parquet", ".xlsx"):
+        raise ValueError(
+            f"Formato não suportado para '{caminho}': use .jsonl, .sqlite3 ou .parquet."
+        )
+    return extensao
+
+
+class EscritorRegistos:
+    """
+    Grava as notas uma a uma, à medida que a extração as entrega, sem guardar
+    o lote inteiro em memória.
+
+    Escreve num ficheiro temporário que só substitui o final ao fechar sem
+    erro: a Fase 2 nunca lê um ficheiro gravado a meio.
+    """
+
+    def __init__(self, caminho=CAMINHO_REGISTOS):
+        self.caminho = caminho
+        self.formato = _formato(caminho)
+        if self.formato == ".xlsx":
+            raise ValueError(
+                "O Excel é só uma exportação: grave as notas em .jsonl, .sqlite3 "
+                "ou .parquet."
+            )
+        self.caminho_temporario = caminho + ".tmp"
+        self.total = 0
+        if os.path.exists(self.caminho_temporario):
+            os.remove(self.caminho_temporario)
+
+        if self.formato == ".jsonl":
+            self._ficheiro = open(self.caminho_temporario, "w", encoding="utf-8")
+        elif self.formato == ".sqlite3":
+            self._conexao = sqlite3.connect(self.caminho_temporario)
+            self._conexao.execute(
+                "CREATE TABLE registos (ordem INTEGER PRIMARY KEY, dados TEXT NOT NULL)"
+            )
+        else:
+            try:
+                import pyarrow  # Opcional: só é preciso para o formato Parquet
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError(
+                    "O formato Parquet precisa do pacote pyarrow "
+                    "(pip install pyarrow). Use .jsonl ou .sqlite3 sem ele."
+                )
+            self._pyarrow = pyarrow
+            self._escritor_parquet = None
+            self._lote = []
+
+    def adicionar(self, registo):
+        if self.formato == ".jsonl":
+            self._ficheiro.write(json.dumps(registo, ensure_ascii=False) + "\n")
+        elif self.formato == ".sqlite3":
+            self._conexao.execute(
+                "INSERT INTO registos (dados) VALUES (?)",
+                (json.dumps(registo, ensure_ascii=False),),
+            )
+        else:
+            self._lote.append(registo)
+            if len(self._lote) >= LOTE_PARQUET:
+                self._gravar_lote_parquet()
+        self.total += 1
+
+    def _gravar_lote_parquet(self):
+        if self._escritor_parquet is None:
+            # Colunas fixas do relatório primeiro, depois as extra da primeira nota
+            colunas = ORDEM_COLUNAS + [
+                c for c in self._lote[0] if c not in ORDEM_COLUNAS
+            ]
+            self._esquema = self._pyarrow.schema(
+                [(coluna, self._pyarrow.string()) for coluna in colunas]
+            )
+            self._escritor_parquet = self._pyarrow.parquet.ParquetWriter(
+                self.caminho_temporario, self._esquema
+            )
+        colunas = {
+            coluna: [
+                None if registo.get(coluna) is None else str(registo[coluna])
+                for registo in self._lote
+            ]
+            for coluna in self._esquema.names
+        }
+        self._escritor_parquet.write_table(
+            self._pyarrow.table(colunas, schema=self._esquema)
+        )
+        self._lote = []
+
+    def _fechar(self):
+        if self.formato == ".jsonl":
+            self._ficheiro.close()
+        elif self.formato == ".sqlite3":
+            self._conexao.commit()
+            self._conexao.close()
+        else:
+            if self._lote:
+                self._gravar_lote_parquet()
+            if self._escritor_parquet is not None:
+                self._escritor_parquet.close()
+            else:
+                # Nenhuma nota: grava um Parquet vazio com as colunas do relatório
+                esquema = self._pyarrow.schema(
+                    [(coluna, self._pyarrow.string()) for coluna in ORDEM_COLUNAS]
+                )
+                self._pyarrow.parquet.write_table(
+                    esquema.empty_table(), self.caminho_temporario
+                )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_excecao, *excecao):
+        self._fechar()
+        if tipo_excecao is None:
+            os.replace(self.caminho_temporario, self.caminho)
+        else:
+            os.remove(self.caminho_temporario)
+
+
+def iterar_registos(caminho=CAMINHO_REGISTOS):
+    """
+    Gerador que lê as notas uma a uma (dicionários com os nomes das colunas),
+    sem carregar o ficheiro inteiro em memória.
+    """
+    formato = _formato(caminho)
+    if formato == ".jsonl":
+        with open(caminho, encoding="utf-8") as ficheiro:
+            for linha in ficheiro:
+                if linha.strip():
+                    yield json.loads(linha)
+    elif formato == ".sqlite3":
+        conexao = sqlite3.connect(caminho)
+        try:
+            for (dados,) in conexao.execute(
+                "SELECT dados FROM registos ORDER BY ordem"
+            ):
+                yield json.loads(dados)
+        finally:
+            conexao.close()
+    elif formato == ".parquet":
+        import pyarrow.parquet  # Opcional: só é preciso para o formato Parquet
+
+        for lote in pyarrow.parquet.ParquetFile(caminho).iter_batches():
+            yield from lote.to_pylist()
+    else:
+        import openpyxl  # Já instalado com o pandas para o relatório Excel
+
+        livro = openpyxl.load_workbook(caminho, read_only=True)
+        try:
+            linhas = livro.active.iter_rows(values_only=True)
+            cabecalho = next(linhas, None) or ()
+            for linha in linhas:
+                if any(valor is not None for valor in linha):
+                    yield dict(zip(cabecalho, linha))
+        finally:
+            livro.close()
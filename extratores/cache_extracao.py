@@ -0,0 +1,83 @@
+import hashlib  # Para calcular a impressão digital (hash) de cada PDF
+import json  # Para guardar o dicionário de dados como texto
+import sqlite3  # Base de dados local, já incluída no Python
+from datetime import datetime
+
+# --- CONFIGURAÇÃO ---
+CAMINHO_CACHE = "cache_extracao.sqlite3"
+# Grava no disco a cada N resultados novos, para não perder tudo se o processo cair
+INTERVALO_GRAVACAO = 50
+
+
+def calcular_hash(caminho_do_pdf):
+    """
+    Calcula o SHA-256 do conteúdo do ficheiro. Se o PDF for substituído por outro
+    com o mesmo nome, o hash muda e a nota volta a ser extraída.
+    """
+    sha256 = hashlib.sha256()
+    with open(caminho_do_pdf, "rb") as ficheiro:
+        for bloco in iter(lambda: ficheiro.read(1024 * 1024), b""):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+
+class CacheExtracao:
+    """
+    Guarda os dados já extraídos de cada PDF numa base SQLite local.
+
+    A chave é (hash do conteúdo, versão do extrator, cidade): mudar a versão do
+    extrator invalida automaticamente tudo o que foi extraído com a lógica antiga.
+    Uso:
+        with CacheExtracao(versao="2") as cache:
+            dados = cache.obter(hash_pdf, "boa_vista")
+    """
+
+    def __init__(self, versao, caminho=CAMINHO_CACHE):
+        self.versao = versao
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS extracoes (
+                hash TEXT NOT NULL,
+                versao TEXT NOT NULL,
+                cidade TEXT NOT NULL,
+                dados TEXT NOT NULL,
+                extraido_em TEXT NOT NULL,
+                PRIMARY KEY (hash, versao, cidade)
+            )
+            """)
+        self._pendentes = 0
+
+    def obter(self, hash_pdf, cidade):
+        """Devolve a lista de notas guardada para este PDF, ou None se ainda não existir."""
+        linha = self.conexao.execute(
+            "SELECT dados FROM extracoes WHERE hash = ? AND versao = ? AND cidade = ?",
+            (hash_pdf, self.versao, cidade),
+        ).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def guardar(self, hash_pdf, cidade, dados):
+        """Guarda (ou substitui) o resultado da extração deste PDF (lista de notas)."""
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO extracoes VALUES (?, ?, ?, ?, ?)",
+            (
+                hash_pdf,
+                self.versao,
+                cidade,
+                json.dumps(dados, ensure_ascii=False),
+                datetime.now().isoformat(timespec="seconds"),
+            ),
+        )
+        self._pendentes += 1
+        if self._pendentes >= INTERVALO_GRAVACAO:
+            self.conexao.commit()
+            self._pendentes = 0
+
+    def fechar(self):
+        self.conexao.commit()
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
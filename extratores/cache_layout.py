@@ -0,0 +1,74 @@
+import fitz  # PyMuPDF
+
+# --- CONFIGURAÇÃO ---
+# Reaproveita as posições das âncoras de notas anteriores do mesmo modelo
+USAR_CACHE_LAYOUT = True
+# Diferença máxima (em pontos) para uma âncora contar como "no mesmo sítio"
+TOLERANCIA_LAYOUT = 0.5
+# Variantes de layout guardadas por modelo (ex.: notas com e sem retenção)
+MAX_LAYOUTS_POR_MODELO = 8
+
+
+class CacheLayout:
+    """
+    Cache das posições das âncoras ("Número da Nota", "Retenções Federais"...)
+    de cada modelo de NFS-e.
+
+    Todas as notas de um mesmo modelo municipal têm as âncoras nas mesmas
+    coordenadas. A primeira nota procura-as na página inteira e o layout
+    (nome -> fitz.Rect) fica guardado; as seguintes só conferem a impressão
+    digital, umas poucas âncoras procuradas no retângulo já conhecido, e se
+    todas baterem usam as posições guardadas. Se alguma falhar, volta-se à
+    procura completa e o novo layout é aprendido.
+
+    O cache vive em memória: cada processo da extração aprende com a sua
+    primeira nota de cada modelo.
+    """
+
+    def __init__(
+        self, tolerancia=TOLERANCIA_LAYOUT, max_layouts=MAX_LAYOUTS_POR_MODELO
+    ):
+        self.tolerancia = tolerancia
+        self.max_layouts = max_layouts
+        # modelo -> lista de layouts, o último que bateu primeiro
+        self._layouts = {}
+
+    def _confere(self, pagina, layout, impressao):
+        """True se todas as âncoras da impressão digital estão onde o layout diz."""
+        for nome, texto in impressao.items():
+            area = layout[nome]
+            folga = self.tolerancia
+            areas = pagina.buscar(
+                texto,
+                clip=fitz.Rect(
+                    area.x0 - folga, area.y0 - folga, area.x1 + folga, area.y1 + folga
+                ),
+            )
+            if not areas or any(abs(a - b) > folga for a, b in zip(areas[0], area)):
+                return False
+        return True
+
+    def ancoras(self, modelo, pagina, localizar, impressao):
+        """
+        Devolve o dicionário nome -> fitz.Rect (ou None) das âncoras da página.
+
+        - localizar(pagina): procura completa das âncoras do modelo
+        - impressao: {nome: texto} das âncoras conferidas para reconhecer o layout
+        """
+        layouts = self._layouts.setdefault(modelo, [])
+        for posicao, layout in enumerate(layouts):
+            if self._confere(pagina, layout, impressao):
+                layouts.insert(0, layouts.pop(posicao))
+                return layout
+
+        ancoras = localizar(pagina)
+        # Só layouts completos são aprendidos: uma nota sem alguma âncora
+        # (página de continuação, outro modelo) não deve servir de referência
+        if all(area is not None for area in ancoras.values()):
+            layouts.insert(0, ancoras)
+            del layouts[self.max_layouts :]
+        return ancoras
+
+
+# Cache partilhado por todas as extrações do processo
+CACHE_LAYOUT = CacheLayout()
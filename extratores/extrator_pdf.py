@@ -1,209 +1,362 @@
 import fitz  # PyMuPDF
 import os  # Para navegar em pastas e ficheiros
-import pandas  # Para criar e gerir o ficheiro Excel
 import re  # Para ajudar a limpar textos (expressões regulares)
+import time  # Para medir a velocidade da extração
+from contextlib import nullcontext  # Relatório Excel opcional no mesmo "with"
+from concurrent.futures import ProcessPoolExecutor  # Para extrair PDFs em paralelo
+
+from extratores.armazenamento import (  # Passagem das notas para a Fase 2
+    CAMINHO_REGISTOS,
+    EscritorRegistos,
+)
+from extratores.cache_extracao import CacheExtracao, calcular_hash
+from extratores.indice_notas import IndiceNotas  # Notas repetidas noutros PDFs
+from extratores.indice_pagina import IndicePagina  # Índice do texto de cada página
+from extratores.modelo_nfse import (
+    obter_modelo,
+    versao_modelos,
+)  # Modelos de extração por cidade
+from extratores.relatorio_excel import (  # Exportação para conferência
+    EXPORTAR_EXCEL,
+    NOME_ARQUIVO_EXCEL,
+    RelatorioExcel,
+)
+from rastreamento import RASTREADOR, passo, registro  # Medição do tempo de cada campo
+
+# --- CONFIGURAÇÃO ---
+# Número de processos usados na extração. None usa todos os núcleos da máquina;
+# 1 desliga o paralelismo e lê os PDFs um a um no processo principal.
+NUM_PROCESSOS_EXTRACAO = None
+# Reaproveita os dados de PDFs que não mudaram desde a última execução
+USAR_CACHE_EXTRACAO = True
+# Versão da lógica de extração. AUMENTE este número sempre que alterar a forma
+# como algum campo é lido, para que o cache antigo deixe de ser usado. (Mudanças
+# nos modelos em extratores/modelos/ já invalidam o cache sozinhas.)
+VERSAO_EXTRATOR = "3"
+# Marca como duplicada a nota que já foi extraída de outro PDF (noutra pasta ou
+# noutra execução), para não ser enviada duas vezes (ver extratores/indice_notas.py)
+USAR_INDICE_NOTAS = True
 
 
 # ==============================================================================
-# FUNÇÃO DE EXTRAÇÃO ESPECIALIZADA PARA NOTAS DE BOA VISTA
+# EXTRAÇÃO PELO MODELO DA CIDADE (extratores/modelos/<cidade>.json)
 # ==============================================================================
-def extrair_dados_boa_vista(caminho_do_pdf):
+def extrair_dados_modelo(modelo, caminho_do_pdf, indice_pagina=0):
     """
-    Extrai todos os dados necessários de uma NFS-e do município de Boa Vista.
-    Recebe o caminho completo do ficheiro PDF e retorna um dicionário com os dados.
+    Extrai todos os dados necessários de uma NFS-e seguindo o modelo da cidade
+    (ver extratores/modelo_nfse.py). Recebe o caminho completo do ficheiro PDF
+    e o índice da página (0 para a primeira) e retorna um dicionário com os dados.
     """
     try:
-        pagina = fitz.open(caminho_do_pdf).load_page(0)
+        with passo("abrir PDF e indexar página"), fitz.open(
+            caminho_do_pdf
+        ) as documento:
+            # Lê o texto da página uma única vez; todos os campos consultam este índice
+            pagina = IndicePagina(documento.load_page(indice_pagina))
     except Exception as e:
         print(
             f"  AVISO: Não foi possível abrir o ficheiro {os.path.basename(caminho_do_pdf)}. Erro: {e}"
         )
         return {"STATUS DA EXECUÇÃO": f"Erro ao abrir PDF: {e}"}
 
-    dados = {}
+    dados = modelo.extrair(pagina)
 
-    # Função auxiliar para extrair texto de uma área
-    def extrair_texto(pagina, area):
-        texto = pagina.get_text("text", clip=area).strip()
-        return texto
+    # Define o status final da execução para este ficheiro
+    dados["STATUS DA EXECUÇÃO"] = "Sucesso"
 
-    # --- Extração de cada campo ---
+    return dados
 
-    # 1. NÚMERO DA NF
-    areas = pagina.search_for("Número da Nota")
-    if areas:
-        area_clip = fitz.Rect(
-            areas[0].x0, areas[0].y1, areas[0].x1 + 60, areas[0].y1 + 15
-        )
-        dados["NUMERO DA NF"] = extrair_texto(pagina, area_clip)
 
-    # 2. CÓDIGO DE VERIFICAÇÃO
-    areas = pagina.search_for("Código de Verificação")
-    if areas:
-        area_clip = fitz.Rect(
-            areas[0].x0, areas[0].y1, areas[0].x1 + 150, areas[0].y1 + 20
-        )
-        texto = extrair_texto(pagina, area_clip)
-        dados["CODIGO DE VERIFICAÇÃO"] = texto.split()[0] if texto else None
-
-    # 3. CNPJ FORNECEDOR (Prestador)
-    areas = pagina.search_for("Prestador do(s) Serviço(s)")
-    if areas:
-        # Procuramos por 'CPF/CNPJ:' na área abaixo de 'Prestador'
-        area_busca_cnpj = fitz.Rect(
-            areas[0].x0 - 150, areas[0].y1, areas[0].x1 + 100, areas[0].y1 + 100
-        )
-        areas_cnpj = pagina.search_for("CPF/CNPJ:", clip=area_busca_cnpj)
-        if areas_cnpj:
-            area_clip = fitz.Rect(
-                areas_cnpj[0].x0 + 50,
-                areas_cnpj[0].y1 - 10,
-                areas_cnpj[0].x1 + 130,
-                areas_cnpj[0].y1,
+# ==============================================================================
+# FUNÇÕES AUXILIARES DO ORQUESTRADOR
+# ==============================================================================
+def listar_pdfs(pasta_raiz):
+    """
+    Percorre a estrutura nf/cidade/ e devolve a lista de tarefas de extração.
+    Cada tarefa é um tuplo (nome_cidade, caminho_completo_pdf), em ordem alfabética,
+    para que o relatório final tenha sempre a mesma ordem de linhas.
+    """
+    tarefas = []
+    for nome_cidade in sorted(os.listdir(pasta_raiz)):
+        pasta_cidade = os.path.join(pasta_raiz, nome_cidade)
+
+        if os.path.isdir(pasta_cidade):
+            print(f"\nProcessando pasta da cidade: {nome_cidade}...")
+
+            for nome_arquivo in sorted(os.listdir(pasta_cidade)):
+                if nome_arquivo.lower().endswith(".pdf"):
+                    caminho_completo_pdf = os.path.join(pasta_cidade, nome_arquivo)
+                    tarefas.append((nome_cidade, caminho_completo_pdf))
+
+    return tarefas
+
+
+def contar_paginas(caminho_completo_pdf):
+    """Número de páginas do PDF (1 se não abrir: o erro aparece na extração)."""
+    try:
+        with fitz.open(caminho_completo_pdf) as documento:
+            return max(1, documento.page_count)
+    except Exception:
+        return 1
+
+
+def expandir_paginas(tarefas):
+    """
+    Transforma as tarefas por ficheiro em tarefas por página
+    (nome_cidade, caminho_completo_pdf, indice_pagina), para que as páginas de
+    um PDF com muitas notas sejam repartidas pelos processos da extração.
+    Devolve (tarefas_por_pagina, paginas_por_ficheiro).
+    """
+    tarefas_por_pagina = []
+    paginas_por_ficheiro = []
+    for nome_cidade, caminho_completo_pdf in tarefas:
+        total_paginas = contar_paginas(caminho_completo_pdf)
+        paginas_por_ficheiro.append(total_paginas)
+        for indice_pagina in range(total_paginas):
+            tarefas_por_pagina.append(
+                (nome_cidade, caminho_completo_pdf, indice_pagina)
             )
-            dados["CNPJ FORNECEDOR"] = extrair_texto(pagina, area_clip)
+    return tarefas_por_pagina, paginas_por_ficheiro
 
-    # 4. DATA DE EMISSÃO NF
-    areas = pagina.search_for("Data e Hora de Emissão")
-    if areas:
-        area_clip = fitz.Rect(
-            areas[0].x0, areas[0].y1, areas[0].x1 - 12, areas[0].y1 + 10
-        )
-        texto_data = extrair_texto(pagina, area_clip)
-        # Extrai apenas a data (primeira parte do texto)
-        dados["DATA DE EMISSAO NF"] = texto_data.split()[0] if texto_data else None
-
-    # 5. VALOR BRUTO (Valor do(s) Serviço(s))
-    areas = pagina.search_for("Valor do(s) Serviço(s)")
-    if areas:
-        area_clip = fitz.Rect(
-            areas[0].x1 - 50, areas[0].y0 + 8, areas[0].x1 + 50, areas[0].y1 + 10
+
+def extrair_pdf(tarefa):
+    """
+    Extrai os dados de uma página de um PDF, escolhendo a função correta para a
+    cidade. tarefa é (nome_cidade, caminho_completo_pdf, indice_pagina).
+    As medições de tempo feitas durante a extração ficam associadas ao ficheiro
+    (e à página, a partir da segunda).
+
+    Devolve None para as páginas seguintes à primeira que não têm o
+    "Número da Nota" (continuação da nota anterior, anexos...).
+    """
+    nome_cidade, caminho_completo_pdf, indice_pagina = tarefa
+    nome_registro = os.path.basename(caminho_completo_pdf)
+    if indice_pagina:
+        nome_registro += f" (página {indice_pagina + 1})"
+    with registro(nome_registro):
+        dados_extraidos = _extrair_pdf_da_cidade(
+            nome_cidade, caminho_completo_pdf, indice_pagina
         )
-        dados["VALOR BRUTO"] = extrair_texto(pagina, area_clip)
+    if indice_pagina and not dados_extraidos.get("NUMERO DA NF"):
+        return None
+    return dados_extraidos
 
-    # 6. TIPO DE SERVIÇO
-    areas = pagina.search_for("Classificação do Serviço")
-    if areas:
-        area_clip = fitz.Rect(
-            areas[0].x0, areas[0].y1, pagina.rect.width, areas[0].y1 + 40
+
+def _extrair_pdf_da_cidade(nome_cidade, caminho_completo_pdf, indice_pagina=0):
+    # --- PONTO DE DECISÃO: O MODELO DA CIDADE (um JSON em extratores/modelos/) ---
+    modelo = obter_modelo(nome_cidade)
+    if modelo is not None:
+        dados_extraidos = extrair_dados_modelo(
+            modelo, caminho_completo_pdf, indice_pagina
         )
-        dados["TIPO DE SERVIÇO"] = extrair_texto(pagina, area_clip).replace("\n", " ")
-
-    # 5. VALOR DA RETENÇÃO (Valor do(s) Serviço(s))
-    areas = pagina.search_for("Retenções Federais")
-    if areas:
-        # Procuramos por 'CPF/CNPJ:' na área abaixo de 'Prestador'
-        area_busca_cnpj = fitz.Rect(
-            areas[0].x0 - 150, areas[0].y1, areas[0].x1 + 150, areas[0].y1 + 50
+    else:
+        print(
+            f"  AVISO: Nenhum modelo de extração definido para a cidade '{nome_cidade}' "
+            f"(crie extratores/modelos/{nome_cidade}.json)."
         )
-        areas_cnpj = pagina.search_for("INSS", clip=area_busca_cnpj)
-        if areas_cnpj:
-            area_clip = fitz.Rect(
-                areas_cnpj[0].x0,
-                areas_cnpj[0].y1,
-                areas_cnpj[0].x1 + 70,
-                areas_cnpj[0].y1 + 10,
-            )
-            dados["VALOR DA RETENÇÃO"] = extrair_texto(pagina, area_clip)
+        dados_extraidos = {"STATUS DA EXECUÇÃO": "Cidade não configurada"}
 
-    # 8. SÉRIE NF - Este campo não foi encontrado no modelo de NF de Boa Vista
-    dados["SERIE NF"] = "1"
+    if dados_extraidos:
+        # Adiciona dados que dependem do contexto (fora do PDF)
+        dados_extraidos["MUNICIPIO DA NF"] = nome_cidade
+        dados_extraidos["ARQUIVO"] = caminho_completo_pdf
+        dados_extraidos["PAGINA"] = indice_pagina + 1
 
-    # Define o status final da execução para este ficheiro
-    dados["STATUS DA EXECUÇÃO"] = "Sucesso"
+    return dados_extraidos
 
-    return dados
 
+def extrair_pdf_rastreado(tarefa):
+    """
+    Versão de extrair_pdf para os processos do pool: devolve também as medições
+    de tempo feitas no processo filho, para juntá-las ao perfil do processo principal.
+    """
+    # Descarta o que o processo filho herdou do principal (fork) ou de tarefas
+    # anteriores, que já foram devolvidas
+    RASTREADOR.retirar_spans()
+    dados_extraidos = extrair_pdf(tarefa)
+    return dados_extraidos, RASTREADOR.retirar_spans()
 
-# ==============================================================================
-# FUNÇÃO PRINCIPAL (ORQUESTRADOR)
-# ==============================================================================
-def executar_extracao_pdf():
+
+def extrair_em_ordem(tarefas, num_processos):
     """
-    Função principal que orquestra todo o processo de leitura e gravação.
+    Gerador que extrai as tarefas (uma por página, ver expandir_paginas) e
+    devolve os resultados (na ordem das tarefas) à medida que ficam prontos.
     """
-    pasta_raiz = "nf"
-    if not os.path.isdir(pasta_raiz):
-        print(
-            f"Erro: A pasta '{pasta_raiz}' não foi encontrada. Por favor, crie-a e organize os PDFs."
-        )
+    if num_processos == 1:
+        for tarefa in tarefas:
+            print(f"  Lendo ficheiro: {os.path.basename(tarefa[1])}")
+            yield extrair_pdf(tarefa)
         return
 
-    todos_os_dados = []
+    print(f"\nExtraindo {len(tarefas)} páginas com {num_processos} processos...")
+    # Lotes maiores reduzem a troca de mensagens entre processos
+    tamanho_lote = max(1, len(tarefas) // (num_processos * 4))
+    with ProcessPoolExecutor(max_workers=num_processos) as executor:
+        # executor.map devolve os resultados na ordem das tarefas
+        for tarefa, (dados_extraidos, spans) in zip(
+            tarefas,
+            executor.map(extrair_pdf_rastreado, tarefas, chunksize=tamanho_lote),
+        ):
+            print(f"  Lido ficheiro: {os.path.basename(tarefa[1])}")
+            RASTREADOR.incorporar(spans)
+            yield dados_extraidos
+
+
+def iterar_extracao_pdf(
+    num_processos=NUM_PROCESSOS_EXTRACAO,
+    usar_cache=USAR_CACHE_EXTRACAO,
+    tarefas=None,
+    usar_indice=USAR_INDICE_NOTAS,
+    pasta_raiz="nf",
+):
+    """
+    Gerador que percorre a pasta nf/ (pasta_raiz) e devolve os dados de cada PDF assim que
+    ficam prontos, sem esperar pelo lote inteiro. Com tarefas (lista de
+    (nome_cidade, caminho_completo_pdf)), extrai só esses ficheiros, sem
+    percorrer a pasta (usado pelo modo vigia).
 
-    print("Iniciando o processamento de Notas Fiscais...")
+    Cada página com uma NFS-e dá um registo próprio (com ARQUIVO e PAGINA), por
+    isso um PDF com várias notas devolve várias notas.
 
-    # Navega pela estrutura de pastas: nf/cidade/
-    for nome_cidade in os.listdir(pasta_raiz):
-        pasta_cidade = os.path.join(pasta_raiz, nome_cidade)
+    Com num_processos > 1 as páginas são lidas em paralelo num pool de processos
+    (a extração com o MuPDF ocupa CPU, não disco). Os resultados mantêm a ordem
+    dos ficheiros e das páginas, independentemente de qual processo termina primeiro.
 
-        if os.path.isdir(pasta_cidade):
-            print(f"\nProcessando pasta da cidade: {nome_cidade}...")
+    Com usar_cache, só os PDFs novos ou alterados são extraídos; os restantes
+    vêm do cache local (ver extratores/cache_extracao.py).
 
-            # Itera sobre cada ficheiro na pasta da cidade
-            for nome_arquivo in os.listdir(pasta_cidade):
-                if nome_arquivo.lower().endswith(".pdf"):
-                    caminho_completo_pdf = os.path.join(pasta_cidade, nome_arquivo)
-                    print(f"  Lendo ficheiro: {nome_arquivo}")
-
-                    dados_extraidos = None
-
-                    # --- PONTO DE DECISÃO: CHAMA A FUNÇÃO CORRETA PARA A CIDADE ---
-                    if nome_cidade == "boa_vista":
-                        dados_extraidos = extrair_dados_boa_vista(caminho_completo_pdf)
-                    # elif nome_cidade == "manaus":
-                    #     dados_extraidos = extrair_dados_manaus(caminho_completo_pdf)
-                    # Adicione outras cidades aqui no futuro
-                    else:
-                        print(
-                            f"  AVISO: Nenhum script de extração definido para a cidade '{nome_cidade}'."
-                        )
-                        dados_extraidos = {
-                            "STATUS DA EXECUÇÃO": "Cidade não configurada"
-                        }
-
-                    if dados_extraidos:
-                        # Adiciona dados que dependem do contexto (fora do PDF)
-                        dados_extraidos["MUNICIPIO DA NF"] = nome_cidade
-                        todos_os_dados.append(dados_extraidos)
-
-    # --- EXPORTAÇÃO PARA EXCEL ---
-    if not todos_os_dados:
-        print("\nNenhum dado foi extraído. O ficheiro Excel não será gerado.")
+    Com usar_indice, a nota que já veio de outro PDF fica com o STATUS DA
+    EXECUÇÃO "Duplicada de <ficheiro>" e não é enviada na Fase 2.
+    """
+    if tarefas is None and not os.path.isdir(pasta_raiz):
+        print(
+            f"Erro: A pasta '{pasta_raiz}' não foi encontrada. Por favor, crie-a e organize os PDFs."
+        )
         return
 
-    print("\nConsolidando dados e gerando o ficheiro Excel...")
-
-    df = pandas.DataFrame(todos_os_dados)
+    print("Iniciando o processamento de Notas Fiscais...")
+    inicio = time.perf_counter()
+
+    if tarefas is None:
+        tarefas = listar_pdfs(pasta_raiz)
+    cache = (
+        CacheExtracao(f"{VERSAO_EXTRATOR}+{versao_modelos()}") if usar_cache else None
+    )
+    indice_notas = IndiceNotas() if usar_indice else None
+
+    # Separa o que já está no cache do que precisa de ser extraído
+    resultados_em_cache = {}
+    hashes = {}
+    if cache:
+        for indice, (nome_cidade, caminho_completo_pdf) in enumerate(tarefas):
+            hashes[indice] = calcular_hash(caminho_completo_pdf)
+            dados_em_cache = cache.obter(hashes[indice], nome_cidade)
+            if dados_em_cache is not None:
+                resultados_em_cache[indice] = dados_em_cache
+        print(
+            f"\n{len(resultados_em_cache)} de {len(tarefas)} ficheiros já estavam no cache."
+        )
+    indices_a_extrair = [i for i in range(len(tarefas)) if i not in resultados_em_cache]
+    tarefas_por_pagina, paginas_por_ficheiro = expandir_paginas(
+        [tarefas[i] for i in indices_a_extrair]
+    )
+    paginas_do_ficheiro = dict(zip(indices_a_extrair, paginas_por_ficheiro))
 
-    # Define a ordem exata das colunas que você pediu
-    ordem_colunas = [
-        "NUMERO DA NF",
-        "MUNICIPIO DA NF",
-        "CODIGO DE VERIFICAÇÃO",
-        "CNPJ FORNECEDOR",
-        "SERIE NF",
-        "DATA DE EMISSAO NF",
-        "VALOR BRUTO",
-        "TIPO DE SERVIÇO",
-        "VALOR DA RETENÇÃO",
-        "STATUS DA EXECUÇÃO",
-    ]
+    if num_processos is None:
+        num_processos = os.cpu_count() or 1
+    num_processos = max(1, min(num_processos, len(tarefas_por_pagina)))
 
-    # Garante que todas as colunas existam, preenchendo com "Não Encontrado" se faltar
-    for col in ordem_colunas:
-        if col not in df.columns:
-            df[col] = "Não Encontrado"
+    try:
+        extraidos = extrair_em_ordem(tarefas_por_pagina, num_processos)
+        # Junta cache e extração nova mantendo a ordem original dos ficheiros
+        for indice, tarefa in enumerate(tarefas):
+            if indice in resultados_em_cache:
+                notas_do_ficheiro = resultados_em_cache[indice]
+                # O cache é por conteúdo: uma cópia do PDF noutro caminho
+                # reaproveita as notas, mas a origem é este ficheiro
+                for dados_extraidos in notas_do_ficheiro:
+                    dados_extraidos["ARQUIVO"] = tarefa[1]
+            else:
+                notas_do_ficheiro = [
+                    dados_extraidos
+                    for dados_extraidos in (
+                        next(extraidos) for _ in range(paginas_do_ficheiro[indice])
+                    )
+                    if dados_extraidos
+                ]
+                # Só guardamos sucessos: PDFs com erro voltam a ser tentados
+                if cache and all(
+                    dados_extraidos.get("STATUS DA EXECUÇÃO") == "Sucesso"
+                    for dados_extraidos in notas_do_ficheiro
+                ):
+                    cache.guardar(hashes[indice], tarefa[0], notas_do_ficheiro)
+
+            for dados_extraidos in notas_do_ficheiro:
+                if indice_notas:
+                    indice_notas.marcar_duplicada(dados_extraidos)
+                yield dados_extraidos
+    finally:
+        if cache:
+            cache.fechar()
+        if indice_notas:
+            indice_notas.fechar()
+
+    duracao = time.perf_counter() - inicio
+    if tarefas:
+        print(
+            f"\n{len(tarefas)} ficheiros processados em {duracao:.2f} s "
+            f"({len(tarefas) / duracao:.1f} ficheiros/s, {len(indices_a_extrair)} extraídos "
+            f"({len(tarefas_por_pagina)} páginas) com {num_processos} processo(s), "
+            f"{len(resultados_em_cache)} do cache)."
+        )
+    if indice_notas and indice_notas.duplicadas:
+        print(
+            f"{indice_notas.duplicadas} nota(s) repetida(s) de outros PDFs marcada(s) "
+            "como duplicada(s)."
+        )
 
-    df = df[ordem_colunas]  # Reordena o DataFrame
 
-    try:
-        df.to_excel("relatorio_consolidado_nf.xlsx", index=False)
+# ==============================================================================
+# FUNÇÃO PRINCIPAL (ORQUESTRADOR)
+# ==============================================================================
+def gravar_extracao(
+    dados_extraidos, caminho_registos=CAMINHO_REGISTOS, exportar_excel=EXPORTAR_EXCEL
+):
+    """
+    Grava cada nota no ficheiro de registos e, se pedido, no relatório Excel
+    assim que chega. Devolve o número de notas gravadas.
+    """
+    relatorio = RelatorioExcel() if exportar_excel else nullcontext()
+    with EscritorRegistos(caminho_registos) as escritor, relatorio:
+        for dados in dados_extraidos:
+            escritor.adicionar(dados)
+            if exportar_excel:
+                relatorio.adicionar(dados)
+    print(f"\n{escritor.total} notas gravadas em '{caminho_registos}'.")
+    if exportar_excel and relatorio.total:
         print(
-            "\nSucesso! O ficheiro 'relatorio_consolidado_nf.xlsx' foi criado na pasta principal."
+            f"Sucesso! O ficheiro '{NOME_ARQUIVO_EXCEL}' foi criado na pasta principal."
         )
-    except Exception as e:
-        print(f"\nErro ao salvar o ficheiro Excel: {e}")
+    return escritor.total
+
+
+def executar_extracao_pdf(
+    num_processos=NUM_PROCESSOS_EXTRACAO,
+    usar_cache=USAR_CACHE_EXTRACAO,
+    caminho_registos=CAMINHO_REGISTOS,
+    exportar_excel=EXPORTAR_EXCEL,
+    pasta_raiz="nf",
+):
+    """
+    Função principal que orquestra todo o processo de leitura e gravação.
+    Extrai todos os PDFs, grava as notas no ficheiro de registos e exporta o
+    relatório Excel no fim.
+    """
+    return gravar_extracao(
+        iterar_extracao_pdf(num_processos, usar_cache, pasta_raiz=pasta_raiz),
+        caminho_registos,
+        exportar_excel,
+    )
 
 
 # --- PONTO DE ENTRADA DO SCRIPT ---
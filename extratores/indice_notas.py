@@ -0,0 +1,105 @@
+import os  # Para comparar caminhos e ver se o ficheiro de origem ainda existe
+import sqlite3  # Base de dados local, já incluída no Python
+from datetime import datetime
+
+from extratores.armazenamento import chave_nf
+
+# --- CONFIGURAÇÃO ---
+CAMINHO_INDICE_NOTAS = "indice_notas.sqlite3"
+# Início do STATUS DA EXECUÇÃO das notas repetidas (a validação não as envia)
+PREFIXO_DUPLICADA = "Duplicada de"
+
+
+def _caminho_curto(caminho):
+    """
+    Caminho relativo à pasta atual, para a mensagem. No Windows não há caminho
+    relativo entre unidades diferentes (ex.: PDFs em D:, script em C:): fica o
+    caminho completo.
+    """
+    try:
+        return os.path.relpath(caminho)
+    except ValueError:
+        return caminho
+
+
+def _origem(registo):
+    """(caminho absoluto do PDF, página) de onde a nota foi extraída."""
+    arquivo = registo.get("ARQUIVO") or ""
+    return os.path.normcase(os.path.abspath(arquivo)), int(registo.get("PAGINA") or 1)
+
+
+def nota_duplicada(registo):
+    """True se a extração marcou a nota como repetida de outra."""
+    return str(registo.get("STATUS DA EXECUÇÃO") or "").startswith(PREFIXO_DUPLICADA)
+
+
+class IndiceNotas:
+    """
+    Índice persistente (SQLite) das notas já extraídas, de todas as pastas e
+    execuções: (CNPJ do fornecedor, número, código de verificação) -> ficheiro
+    e página onde a nota apareceu primeiro.
+
+    A mesma nota noutro ficheiro (ex.: gravada com dois nomes) é marcada como
+    duplicada. Voltar a extrair o mesmo ficheiro não conta como duplicado, e se
+    o ficheiro de origem já não existir (foi apagado ou mudou de nome) a nota
+    passa a pertencer ao novo ficheiro.
+    """
+
+    def __init__(self, caminho=CAMINHO_INDICE_NOTAS):
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS notas (
+                chave TEXT PRIMARY KEY,
+                arquivo TEXT NOT NULL,
+                pagina INTEGER NOT NULL,
+                registrado_em TEXT NOT NULL
+            )
+            """)
+        self.duplicadas = 0
+
+    def origem_anterior(self, registo):
+        """
+        Regista a nota e devolve None, ou devolve "ficheiro (página N)" da
+        primeira ocorrência se ela for repetida.
+        """
+        chave = chave_nf(registo)
+        cnpj, numero, _ = chave.split("|")
+        if not (cnpj and numero):
+            return None  # Sem chave: a validação rejeita a nota
+
+        origem = _origem(registo)
+        linha = self.conexao.execute(
+            "SELECT arquivo, pagina FROM notas WHERE chave = ?", (chave,)
+        ).fetchone()
+        if linha is not None and linha != origem and os.path.exists(linha[0]):
+            return f"{_caminho_curto(linha[0])} (página {linha[1]})"
+
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO notas VALUES (?, ?, ?, ?)",
+            (chave, *origem, datetime.now().isoformat(timespec="seconds")),
+        )
+        return None
+
+    def marcar_duplicada(self, registo):
+        """Marca no STATUS DA EXECUÇÃO se a nota (extraída com sucesso) é repetida."""
+        if registo.get("STATUS DA EXECUÇÃO") != "Sucesso":
+            return
+        origem = self.origem_anterior(registo)
+        if origem:
+            self.duplicadas += 1
+            registo["STATUS DA EXECUÇÃO"] = f"{PREFIXO_DUPLICADA} {origem}"
+            print(
+                f"  AVISO: a NF {registo.get('NUMERO DA NF')} de "
+                f"{os.path.basename(registo.get('ARQUIVO') or '')} já foi extraída de "
+                f"{origem}. Não será enviada."
+            )
+
+    def fechar(self):
+        self.conexao.commit()
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
@@ -0,0 +1,127 @@
+import bisect  # Para localizar rapidamente as linhas por coordenada vertical
+import re  # Para procurar as âncoras ignorando maiúsculas e espaços repetidos
+
+import fitz  # PyMuPDF
+
+
+class IndicePagina:
+    """
+    Índice em memória do texto de uma página de PDF.
+
+    A página é lida uma única vez (get_text("rawdict")) e guardamos cada linha
+    com os caracteres e as suas coordenadas. A partir daí, a procura de âncoras
+    e a leitura de texto dentro de um retângulo são feitas sobre este índice,
+    sem voltar a analisar a página no MuPDF a cada campo.
+
+    As regras imitam as do PyMuPDF:
+      - buscar() funciona como pagina.search_for(): ignora maiúsculas e aceita
+        qualquer quantidade de espaços entre as palavras;
+      - extrair_texto() equivale a pagina.get_text("text", clip=area), mas um
+        caractere só entra se o centro do seu retângulo estiver dentro da área.
+        O MuPDF usa o contorno real de cada letra, o que não temos no índice;
+        pelo centro, uma linha vizinha que só encosta na área não é incluída.
+    """
+
+    def __init__(self, pagina):
+        self.largura = pagina.rect.width
+        self.altura = pagina.rect.height
+
+        # Cada linha: (x0, y0, x1, y1, caracteres, texto),
+        # com caracteres = [(x0, y0, x1, y1, c), ...] e texto = a linha já montada
+        self.linhas = []
+        # TEXTFLAGS_TEXT: mesmas opções do get_text("text"), sem decodificar imagens
+        for bloco in pagina.get_text("rawdict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]:
+            if bloco["type"] != 0:  # Ignora blocos de imagem
+                continue
+            for linha in bloco["lines"]:
+                caracteres = [
+                    (*caractere["bbox"], caractere["c"])
+                    for span in linha["spans"]
+                    for caractere in span["chars"]
+                ]
+                if caracteres:
+                    self.linhas.append(
+                        (
+                            min(c[0] for c in caracteres),
+                            min(c[1] for c in caracteres),
+                            max(c[2] for c in caracteres),
+                            max(c[3] for c in caracteres),
+                            caracteres,
+                            "".join(c[4] for c in caracteres),
+                        )
+                    )
+
+        # Índice espacial simples: linhas ordenadas pelo topo (y0) para busca binária
+        self._ordem_vertical = sorted(
+            range(len(self.linhas)), key=lambda i: self.linhas[i][1]
+        )
+        self._topos = [self.linhas[i][1] for i in self._ordem_vertical]
+        # Altura da linha mais alta, para saber até onde recuar na busca binária
+        self._maior_altura = max(
+            (linha[3] - linha[1] for linha in self.linhas), default=0
+        )
+
+    @staticmethod
+    def _sobrepoe(a, b):
+        """Mesmo critério do MuPDF: retângulos que apenas se tocam não se sobrepõem."""
+        return not (a[0] >= b[2] or a[1] >= b[3] or a[2] <= b[0] or a[3] <= b[1])
+
+    def _linhas_na_area(self, area):
+        """Devolve, em ordem de leitura, as linhas cujo retângulo se sobrepõe à área."""
+        inicio = bisect.bisect_left(self._topos, area[1] - self._maior_altura)
+        fim = bisect.bisect_left(self._topos, area[3])
+        indices = sorted(
+            i
+            for i in self._ordem_vertical[inicio:fim]
+            if self._sobrepoe(self.linhas[i], area)
+        )
+        return [self.linhas[i] for i in indices]
+
+    def buscar(self, texto, clip=None):
+        """
+        Procura um texto na página e devolve a lista de fitz.Rect onde ele aparece.
+        Com clip, só os caracteres que se sobrepõem ao retângulo são considerados.
+        """
+        padrao = re.compile(
+            r"\s+".join(re.escape(palavra) for palavra in texto.split()),
+            re.IGNORECASE,
+        )
+        if clip is not None:
+            clip = tuple(clip)
+        linhas = self.linhas if clip is None else self._linhas_na_area(clip)
+
+        areas = []
+        for linha in linhas:
+            caracteres, texto_linha = linha[4], linha[5]
+            if clip is not None:
+                caracteres = [c for c in caracteres if self._sobrepoe(c, clip)]
+                texto_linha = "".join(c[4] for c in caracteres)
+            for ocorrencia in padrao.finditer(texto_linha):
+                encontrados = caracteres[ocorrencia.start() : ocorrencia.end()]
+                areas.append(
+                    fitz.Rect(
+                        min(c[0] for c in encontrados),
+                        min(c[1] for c in encontrados),
+                        max(c[2] for c in encontrados),
+                        max(c[3] for c in encontrados),
+                    )
+                )
+        return areas
+
+    @staticmethod
+    def _centro_dentro(caractere, area):
+        centro_x = (caractere[0] + caractere[2]) / 2
+        centro_y = (caractere[1] + caractere[3]) / 2
+        return area[0] <= centro_x <= area[2] and area[1] <= centro_y <= area[3]
+
+    def extrair_texto(self, area):
+        """Devolve o texto dentro da área, já sem espaços nas pontas."""
+        area = tuple(area)
+        partes = []
+        for linha in self._linhas_na_area(area):
+            texto_linha = "".join(
+                c[4] for c in linha[4] if self._centro_dentro(c, area)
+            )
+            if texto_linha:
+                partes.append(texto_linha)
+        return "\n".join(partes).strip()
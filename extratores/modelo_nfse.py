@@ -0,0 +1,219 @@
+import hashlib  # Para a versão dos modelos, usada no cache da extração
+import json  # Os modelos das cidades são ficheiros JSON
+import os  # Para listar a pasta dos modelos
+
+import fitz  # PyMuPDF
+
+from extratores.cache_layout import CACHE_LAYOUT, USAR_CACHE_LAYOUT
+from rastreamento import passo  # Medição do tempo de cada campo
+
+# --- CONFIGURAÇÃO ---
+# Um ficheiro <cidade>.json por município; o nome é o da pasta nf/<cidade>/
+PASTA_MODELOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "modelos")
+
+# Referências que cada coordenada de uma área pode usar: as bordas da âncora
+# (x0, y0, x1, y1) ou as medidas da página (largura, altura)
+_REFERENCIAS = {"x0": 0, "y0": 1, "x1": 2, "y1": 3, "largura": 4, "altura": 5}
+
+# Tratamento do texto lido na área de cada campo
+TRATAMENTOS = {
+    "texto": lambda texto: texto,
+    "primeira_palavra": lambda texto: texto.split()[0] if texto else None,
+    "linha_unica": lambda texto: texto.replace("\n", " "),
+}
+
+
+class ModeloNFSe:
+    """
+    Modelo de extração de uma cidade, lido de um JSON com:
+
+      - "ancoras": nome -> {"texto": ...}, procuradas na página inteira; ou
+        {"texto": ..., "dentro_de": outra âncora, "area": [...]}, procuradas
+        só na área à volta da outra (âncoras secundárias)
+      - "impressao": âncoras conferidas para reconhecer um layout já visto
+        (ver extratores/cache_layout.py)
+      - "campos": coluna -> {"ancora": ..., "area": [...], "tratamento": ...}
+      - "fixos": coluna -> valor, para campos que não existem no PDF
+
+    Cada "area" tem quatro coordenadas (x0, y0, x1, y1), cada uma
+    [referência, deslocamento]: ["y1", 15] é 15 pontos abaixo da borda
+    inferior da âncora, ["largura", 0] é a borda direita da página.
+
+    O JSON é validado e compilado uma vez (em tuplos de índices), por isso
+    todas as cidades são extraídas com o mesmo custo por campo.
+    """
+
+    def __init__(self, cidade, definicao):
+        self.cidade = cidade
+        self.descricao = definicao.get("descricao", cidade)
+
+        self.ancoras = []  # (nome, texto)
+        self.ancoras_secundarias = []  # (nome, texto, âncora de referência, área)
+        for nome, ancora in definicao["ancoras"].items():
+            if "dentro_de" in ancora:
+                referencia = ancora["dentro_de"]
+                if referencia not in {n for n, _ in self.ancoras} | {
+                    n for n, *_ in self.ancoras_secundarias
+                }:
+                    self._erro(
+                        f"a âncora '{nome}' depende de '{referencia}', "
+                        "que não foi definida antes"
+                    )
+                self.ancoras_secundarias.append(
+                    (nome, ancora["texto"], referencia, self._compilar_area(ancora))
+                )
+            else:
+                self.ancoras.append((nome, ancora["texto"]))
+        nomes = {nome for nome, _ in self.ancoras}
+
+        self.impressao = {}
+        for nome in definicao.get("impressao", []):
+            if nome not in nomes:
+                self._erro(f"a impressão usa '{nome}', que não é uma âncora principal")
+            self.impressao[nome] = dict(self.ancoras)[nome]
+
+        todas = nomes | {nome for nome, *_ in self.ancoras_secundarias}
+        self.campos = []  # (coluna, âncora, área, tratamento)
+        for coluna, campo in definicao["campos"].items():
+            if campo["ancora"] not in todas:
+                self._erro(
+                    f"o campo '{coluna}' usa a âncora '{campo['ancora']}', que não existe"
+                )
+            tratamento = campo.get("tratamento", "texto")
+            if tratamento not in TRATAMENTOS:
+                self._erro(f"tratamento desconhecido no campo '{coluna}': {tratamento}")
+            self.campos.append(
+                (
+                    coluna,
+                    campo["ancora"],
+                    self._compilar_area(campo),
+                    TRATAMENTOS[tratamento],
+                )
+            )
+        self.fixos = dict(definicao.get("fixos", {}))
+
+    def _erro(self, mensagem):
+        raise ValueError(f"Modelo '{self.cidade}': {mensagem}.")
+
+    def _compilar_area(self, especificacao):
+        area = especificacao.get("area")
+        if not isinstance(area, list) or len(area) != 4:
+            self._erro(f"área inválida: {area!r} (são precisas 4 coordenadas)")
+        try:
+            return tuple(
+                (_REFERENCIAS[referencia], float(deslocamento))
+                for referencia, deslocamento in area
+            )
+        except (KeyError, TypeError, ValueError):
+            self._erro(
+                f"área inválida: {area!r} (use [referência, deslocamento] com "
+                f"referência em {', '.join(_REFERENCIAS)})"
+            )
+
+    @staticmethod
+    def area(area_compilada, ancora, pagina):
+        """fitz.Rect da área, a partir do retângulo da âncora e da página."""
+        medidas = (*ancora, pagina.largura, pagina.altura)
+        return fitz.Rect(
+            *(medidas[indice] + deslocamento for indice, deslocamento in area_compilada)
+        )
+
+    def localizar_ancoras(self, pagina):
+        """
+        Procura todas as âncoras do modelo na página (IndicePagina) e devolve
+        nome -> fitz.Rect (None se a âncora não existir).
+        """
+        ancoras = {}
+        for nome, texto in self.ancoras:
+            areas = pagina.buscar(texto)
+            ancoras[nome] = areas[0] if areas else None
+        for nome, texto, referencia, area in self.ancoras_secundarias:
+            ancoras[nome] = None
+            if ancoras[referencia]:
+                areas = pagina.buscar(
+                    texto, clip=self.area(area, ancoras[referencia], pagina)
+                )
+                ancoras[nome] = areas[0] if areas else None
+        return ancoras
+
+    def ancoras_da_pagina(self, pagina):
+        """Âncoras da página, pelo cache de layout se estiver ligado."""
+        if USAR_CACHE_LAYOUT:
+            return CACHE_LAYOUT.ancoras(
+                self.cidade, pagina, self.localizar_ancoras, self.impressao
+            )
+        return self.localizar_ancoras(pagina)
+
+    def areas_dos_campos(self, pagina, ancoras):
+        """coluna -> fitz.Rect da área de extração (None se faltar a âncora)."""
+        return {
+            coluna: (
+                self.area(area, ancoras[ancora], pagina) if ancoras[ancora] else None
+            )
+            for coluna, ancora, area, _ in self.campos
+        }
+
+    def areas_de_busca(self, pagina, ancoras):
+        """nome -> fitz.Rect onde cada âncora secundária é procurada (ou None)."""
+        return {
+            nome: (
+                self.area(area, ancoras[referencia], pagina)
+                if ancoras[referencia]
+                else None
+            )
+            for nome, _, referencia, area in self.ancoras_secundarias
+        }
+
+    def extrair(self, pagina):
+        """Lê os campos do modelo numa página já indexada (IndicePagina)."""
+        with passo("localizar âncoras"):
+            ancoras = self.ancoras_da_pagina(pagina)
+
+        dados = {}
+        for coluna, ancora, area, tratamento in self.campos:
+            with passo(f"extrair {coluna}"):
+                if ancoras[ancora]:
+                    texto = pagina.extrair_texto(
+                        self.area(area, ancoras[ancora], pagina)
+                    )
+                    dados[coluna] = tratamento(texto)
+        dados.update(self.fixos)
+        return dados
+
+
+def carregar_modelos(pasta=PASTA_MODELOS):
+    """Lê e compila todos os modelos da pasta: nome_cidade -> ModeloNFSe."""
+    modelos = {}
+    for nome_arquivo in sorted(os.listdir(pasta)):
+        cidade, extensao = os.path.splitext(nome_arquivo)
+        if extensao.lower() != ".json":
+            continue
+        with open(os.path.join(pasta, nome_arquivo), encoding="utf-8") as ficheiro:
+            modelos[cidade] = ModeloNFSe(cidade, json.load(ficheiro))
+    return modelos
+
+
+def versao_modelos(pasta=PASTA_MODELOS):
+    """
+    Impressão digital curta do conteúdo de todos os modelos. Entra na versão
+    do cache da extração: alterar um JSON faz as notas voltarem a ser extraídas.
+    """
+    sha256 = hashlib.sha256()
+    for nome_arquivo in sorted(os.listdir(pasta)):
+        if nome_arquivo.lower().endswith(".json"):
+            sha256.update(nome_arquivo.encode("utf-8"))
+            with open(os.path.join(pasta, nome_arquivo), "rb") as ficheiro:
+                sha256.update(ficheiro.read())
+    return sha256.hexdigest()[:12]
+
+
+# Modelos compilados, carregados uma vez por processo na primeira extração
+_MODELOS = None
+
+
+def obter_modelo(nome_cidade):
+    """Modelo compilado da cidade, ou None se ela não tiver modelo."""
+    global _MODELOS
+    if _MODELOS is None:
+        _MODELOS = carregar_modelos()
+    return _MODELOS.get(nome_cidade)
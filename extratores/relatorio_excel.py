@@ -0,0 +1,124 @@
+import csv  # Cópia parcial do relatório, legível mesmo se a execução parar a meio
+import os  # Para gravar em disco (fsync) e apagar a cópia parcial no fim
+
+from openpyxl import Workbook  # Já instalado com o pandas para o relatório Excel
+
+from extratores.armazenamento import ORDEM_COLUNAS
+from extratores.indice_notas import nota_duplicada
+
+# --- CONFIGURAÇÃO ---
+NOME_ARQUIVO_EXCEL = "relatorio_consolidado_nf.xlsx"
+# As notas passam para a Fase 2 pelo ficheiro CAMINHO_REGISTOS (ver
+# extratores/armazenamento.py). O Excel é só uma exportação para conferência.
+EXPORTAR_EXCEL = True
+# A cada quantas linhas a cópia parcial (CSV) é gravada em disco
+LINHAS_POR_GRAVACAO = 500
+# Coluna com o resultado da Fase 2, lido do diário de submissão
+COLUNA_STATUS_ENVIO = "STATUS DO ENVIO"
+VALOR_EM_FALTA = "Não Encontrado"
+
+
+def caminho_parcial(caminho_excel):
+    """Cópia parcial em CSV que acompanha o Excel enquanto ele é escrito."""
+    return os.path.splitext(caminho_excel)[0] + ".parcial.csv"
+
+
+def status_envio(diario, registo):
+    """Texto da coluna de status: o estado da nota no diário (e o erro, se houver)."""
+    if nota_duplicada(registo):
+        # A chave é a mesma da nota original: o diário fala do envio dela
+        return f"não enviada ({registo['STATUS DA EXECUÇÃO']})"
+    situacao = diario.situacao(registo)
+    if situacao is None:
+        return "não enviada"
+    estado, mensagem = situacao
+    return f"{estado}: {mensagem}" if mensagem else estado
+
+
+class RelatorioExcel:
+    """
+    Escreve o relatório Excel linha a linha, em modo streaming (write-only do
+    openpyxl): as linhas vão para o disco e a memória não cresce com o lote.
+
+    Um .xlsx só fica legível depois de fechado, por isso as mesmas linhas vão
+    também para uma cópia parcial em CSV, gravada em disco a cada
+    LINHAS_POR_GRAVACAO linhas. Se a execução parar a meio, o CSV guarda o
+    que já foi processado; ao fechar sem erro, é apagado.
+
+    Com um diário de submissão, cada linha leva a coluna STATUS DO ENVIO.
+    """
+
+    def __init__(self, caminho_excel=NOME_ARQUIVO_EXCEL, diario=None):
+        self.caminho_excel = caminho_excel
+        self.diario = diario
+        self.colunas = list(ORDEM_COLUNAS)
+        if diario is not None:
+            self.colunas.append(COLUNA_STATUS_ENVIO)
+        self.total = 0
+
+        self._livro = Workbook(write_only=True)
+        self._folha = self._livro.create_sheet()
+        self._folha.append(self.colunas)
+
+        self.caminho_parcial = caminho_parcial(caminho_excel)
+        self._parcial = open(
+            self.caminho_parcial, "w", encoding="utf-8-sig", newline=""
+        )
+        self._csv = csv.writer(self._parcial, delimiter=";")
+        self._csv.writerow(self.colunas)
+
+    def adicionar(self, registo):
+        linha = [
+            VALOR_EM_FALTA if registo.get(coluna) is None else registo[coluna]
+            for coluna in ORDEM_COLUNAS
+        ]
+        if self.diario is not None:
+            linha.append(status_envio(self.diario, registo))
+        self._folha.append(linha)
+        self._csv.writerow(linha)
+        self.total += 1
+        if self.total % LINHAS_POR_GRAVACAO == 0:
+            self._gravar_parcial()
+
+    def _gravar_parcial(self):
+        self._parcial.flush()
+        os.fsync(self._parcial.fileno())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_excecao, *excecao):
+        if tipo_excecao is not None:
+            # Fica a cópia parcial, com tudo o que foi processado até ao erro
+            self._gravar_parcial()
+            self._parcial.close()
+            return
+        self._parcial.close()
+        if self.total:
+            self._livro.save(self.caminho_excel)
+        os.remove(self.caminho_parcial)
+
+
+def salvar_relatorio_excel(
+    todos_os_dados, caminho_excel=NOME_ARQUIVO_EXCEL, diario=None
+):
+    """
+    Consolida os dicionários extraídos (lista ou iterável) num ficheiro Excel.
+    Com um diário, acrescenta o status de envio de cada nota no EFD-Reinf.
+    """
+    print("\nConsolidando dados e gerando o ficheiro Excel...")
+    try:
+        with RelatorioExcel(caminho_excel, diario) as relatorio:
+            for dados in todos_os_dados:
+                relatorio.adicionar(dados)
+    except Exception as e:
+        print(f"\nErro ao salvar o ficheiro Excel: {e}")
+        return
+
+    if relatorio.total:
+        print(
+            f"\nSucesso! O ficheiro '{caminho_excel}' foi criado na pasta principal "
+            f"({relatorio.total} linhas)."
+        )
+    else:
+        print("\nNenhum dado foi extraído. O ficheiro Excel não será gerado.")
@@ -0,0 +1,251 @@
+import csv  # Para gravar as notas rejeitadas e os motivos
+import itertools  # Para ler as notas em lotes
+
+import numpy as np
+import pandas as pd
+
+from extratores.armazenamento import chave_nf
+from extratores.indice_notas import PREFIXO_DUPLICADA, nota_duplicada
+
+# --- CONFIGURAÇÃO ---
+# Notas rejeitadas antes do envio, com o motivo, para corrigir e reenviar
+CAMINHO_REJEITADAS = "notas_rejeitadas.csv"
+# Notas validadas de cada vez (as regras correm sobre o lote inteiro)
+LOTE_VALIDACAO = 5000
+# Campos sem os quais o formulário do R2010 não pode ser preenchido
+CAMPOS_OBRIGATORIOS = [
+    "NUMERO DA NF",
+    "CNPJ FORNECEDOR",
+    "SERIE NF",
+    "DATA DE EMISSAO NF",
+    "VALOR BRUTO",
+    "VALOR DA RETENÇÃO",
+]
+# Valores que contam como campo em falta (ex.: o preenchimento do relatório Excel)
+VALORES_EM_FALTA = {"", "Não Encontrado", "nan", "None"}
+
+_PESOS_CNPJ_1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+_PESOS_CNPJ_2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+_FORMATO_MOEDA = r"^(?:\d{1,3}(?:\.\d{3})*|\d+),\d{2}$"
+
+
+def _texto(df, coluna):
+    """Coluna como texto sem espaços nas pontas; None/NaN e afins viram ""."""
+    if coluna not in df:
+        return pd.Series("", index=df.index)
+    texto = df[coluna].fillna("").astype(str).str.strip()
+    return texto.mask(texto.isin(VALORES_EM_FALTA), "")
+
+
+def cnpj_valido(digitos):
+    """
+    Confere os dígitos verificadores de uma série de CNPJs (só dígitos).
+    Devolve uma série booleana; tudo é calculado de uma vez com numpy.
+    """
+    valido = pd.Series(False, index=digitos.index)
+    com_14 = digitos.str.fullmatch(r"\d{14}")
+    if not com_14.any():
+        return valido
+    texto = "".join(digitos[com_14]).encode("ascii")
+    matriz = np.frombuffer(texto, dtype=np.uint8).reshape(-1, 14).astype(int) - 48
+
+    resto = matriz[:, :12] @ _PESOS_CNPJ_1 % 11
+    dv1 = np.where(resto < 2, 0, 11 - resto)
+    resto = matriz[:, :13] @ _PESOS_CNPJ_2 % 11
+    dv2 = np.where(resto < 2, 0, 11 - resto)
+    # CNPJs com os 14 dígitos iguais passam na conta, mas não existem
+    repetidos = (matriz == matriz[:, :1]).all(axis=1)
+    valido[com_14] = (dv1 == matriz[:, 12]) & (dv2 == matriz[:, 13]) & ~repetidos
+    return valido
+
+
+def valor_em_reais(texto):
+    """Converte "1.234,56" em 1234.56 (NaN se o formato não for de moeda)."""
+    no_formato = texto.str.fullmatch(_FORMATO_MOEDA)
+    numeros = texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    return pd.to_numeric(numeros.where(no_formato), errors="coerce").astype(float)
+
+
+def formatar_moeda(valores):
+    """1234.5 -> "1.234,50" (formato do relatório e do portal)."""
+    return valores.map(
+        lambda valor: f"{valor:,.2f}".replace(",", "_")
+        .replace(".", ",")
+        .replace("_", ".")
+    )
+
+
+def validar_e_normalizar(df):
+    """
+    Valida todas as notas do DataFrame de uma vez e devolve (normalizados,
+    motivos).
+
+    - normalizados: os campos que vão para o formulário no formato padrão
+      (número, CNPJ 00.000.000/0000-00, data dd/mm/aaaa sem a hora e valores
+      1.234,56); só têm sentido nas notas válidas
+    - motivos: texto das regras que falharam em cada nota ("" nas válidas)
+    """
+    motivos = pd.Series("", index=df.index)
+
+    def rejeitar(falha, motivo):
+        nonlocal motivos
+        motivos = motivos.mask(falha, motivos + motivo + "; ")
+
+    texto = {
+        campo: _texto(df, campo)
+        for campo in CAMPOS_OBRIGATORIOS + ["STATUS DA EXECUÇÃO"]
+    }
+    em_falta = {campo: texto[campo] == "" for campo in CAMPOS_OBRIGATORIOS}
+    for campo in CAMPOS_OBRIGATORIOS:
+        rejeitar(em_falta[campo], f"{campo} em falta")
+
+    numero = texto["NUMERO DA NF"]
+    rejeitar(
+        ~em_falta["NUMERO DA NF"] & ~numero.str.fullmatch(r"\d+"),
+        "NUMERO DA NF inválido",
+    )
+
+    digitos_cnpj = texto["CNPJ FORNECEDOR"].str.replace(r"\D", "", regex=True)
+    rejeitar(
+        ~em_falta["CNPJ FORNECEDOR"] & ~cnpj_valido(digitos_cnpj),
+        "CNPJ FORNECEDOR inválido",
+    )
+
+    # Só a data: a hora que às vezes vem a seguir é descartada
+    data = texto["DATA DE EMISSAO NF"].str.extract(
+        r"^(\d{2}/\d{2}/\d{4})", expand=False
+    )
+    data_invalida = pd.to_datetime(data, format="%d/%m/%Y", errors="coerce").isna()
+    rejeitar(
+        ~em_falta["DATA DE EMISSAO NF"] & data_invalida, "DATA DE EMISSAO NF inválida"
+    )
+
+    bruto = valor_em_reais(texto["VALOR BRUTO"])
+    retencao = valor_em_reais(texto["VALOR DA RETENÇÃO"])
+    rejeitar(~em_falta["VALOR BRUTO"] & bruto.isna(), "VALOR BRUTO inválido")
+    rejeitar(
+        ~em_falta["VALOR DA RETENÇÃO"] & retencao.isna(), "VALOR DA RETENÇÃO inválido"
+    )
+    rejeitar(bruto <= 0, "VALOR BRUTO não é positivo")
+    rejeitar(retencao > bruto, "VALOR DA RETENÇÃO maior que o VALOR BRUTO")
+
+    motivos = motivos.str.removesuffix("; ")
+    # Se a própria extração falhou, esse é o único motivo que interessa
+    status = texto["STATUS DA EXECUÇÃO"]
+    sem_sucesso = status != "Sucesso"
+    duplicada = status.str.startswith(PREFIXO_DUPLICADA)
+    motivos = motivos.mask(sem_sucesso, "extração sem sucesso: " + status)
+    motivos = motivos.mask(duplicada, status)
+    validas = motivos == ""
+
+    normalizados = pd.DataFrame(
+        {
+            "NUMERO DA NF": numero,
+            "CNPJ FORNECEDOR": digitos_cnpj.str.replace(
+                r"^(\d{2})(\d{3})(\d{3})(\d{4})(\d{2})$", r"\1.\2.\3/\4-\5", regex=True
+            ),
+            "DATA DE EMISSAO NF": data,
+            "VALOR BRUTO": formatar_moeda(bruto.where(validas, 0)),
+            "VALOR DA RETENÇÃO": formatar_moeda(retencao.where(validas, 0)),
+        }
+    )
+    return normalizados, motivos
+
+
+class ValidadorRegistos:
+    """
+    Etapa entre a extração e a Fase 2: as notas inválidas são rejeitadas logo,
+    com o motivo, sem gastar tempo no navegador.
+
+    As rejeitadas ficam em memória para o resumo final, são gravadas em
+    CAMINHO_REJEITADAS e, com um diário de submissão, marcadas nele como
+    "rejeitada" (aparecem assim na coluna de status do relatório).
+
+    Também é a última verificação de duplicados antes do envio: a mesma nota
+    (mesma chave do diário) só passa uma vez por execução, mesmo que o
+    ficheiro de registos a traga repetida. As duplicadas não mexem no diário,
+    que pertence à nota original.
+    """
+
+    def __init__(self, caminho_rejeitadas=CAMINHO_REJEITADAS, diario=None):
+        self.caminho_rejeitadas = caminho_rejeitadas
+        self.diario = diario
+        self.rejeitadas = []
+        self.total = 0
+        self._chaves_aceites = set()
+
+    def validar(self, cadastros):
+        """Devolve só as notas válidas (normalizadas) da lista recebida."""
+        if not cadastros:
+            return []
+        self.total += len(cadastros)
+        normalizados, motivos = validar_e_normalizar(pd.DataFrame(cadastros))
+        validas = []
+        for cadastro, campos, motivo in zip(
+            cadastros, normalizados.to_dict(orient="records"), motivos
+        ):
+            if motivo:
+                self._rejeitar(
+                    cadastro, motivo, marcar_no_diario=not nota_duplicada(cadastro)
+                )
+                continue
+            chave = chave_nf(cadastro)
+            if chave in self._chaves_aceites:
+                self._rejeitar(
+                    cadastro,
+                    f"{PREFIXO_DUPLICADA} outra nota desta execução",
+                    marcar_no_diario=False,
+                )
+                continue
+            self._chaves_aceites.add(chave)
+            validas.append({**cadastro, **campos})
+        return validas
+
+    def filtrar(self, cadastros, tamanho_lote=LOTE_VALIDACAO):
+        """Gerador: valida as notas em lotes e devolve só as válidas."""
+        cadastros = iter(cadastros)
+        while lote := list(itertools.islice(cadastros, tamanho_lote)):
+            yield from self.validar(lote)
+
+    def _rejeitar(self, cadastro, motivo, marcar_no_diario=True):
+        self.rejeitadas.append((cadastro, motivo))
+        print(f"NF {cadastro.get('NUMERO DA NF')} rejeitada antes do envio: {motivo}")
+        # Sem CNPJ, número nem código a chave fica vazia ("||") e todas essas
+        # notas cairiam na mesma linha do diário: ficam só no CSV de rejeitadas
+        if (
+            marcar_no_diario
+            and self.diario is not None
+            and chave_nf(cadastro).strip("|")
+        ):
+            self.diario.rejeitar(cadastro, motivo)
+
+    def finalizar(self):
+        """Grava as notas rejeitadas (se houver) e mostra o resumo."""
+        if not self.rejeitadas:
+            if self.total:
+                print(f"\nValidação: as {self.total} notas estão válidas.")
+            return
+        if self.caminho_rejeitadas:
+            colunas = list(
+                dict.fromkeys(
+                    chave for cadastro, _ in self.rejeitadas for chave in cadastro
+                )
+            )
+            with open(
+                self.caminho_rejeitadas, "w", encoding="utf-8-sig", newline=""
+            ) as ficheiro:
+                escritor = csv.DictWriter(
+                    ficheiro, colunas + ["MOTIVO DA REJEIÇÃO"], delimiter=";"
+                )
+                escritor.writeheader()
+                for cadastro, motivo in self.rejeitadas:
+                    escritor.writerow({**cadastro, "MOTIVO DA REJEIÇÃO": motivo})
+        destino = (
+            f" (gravadas em {self.caminho_rejeitadas})"
+            if self.caminho_rejeitadas
+            else ""
+        )
+        print(
+            f"\nValidação: {len(self.rejeitadas)} de {self.total} notas rejeitadas "
+            f"antes do envio{destino}."
+        )
@@ -0,0 +1,166 @@
+import asyncio
+import os  # Para ler o tamanho e a data de cada PDF
+import time
+
+try:
+    # Opcional: avisos do sistema operativo (inotify no Linux, ReadDirectoryChangesW
+    # no Windows). Sem ele, a pasta é consultada de tempos a tempos.
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# --- CONFIGURAÇÃO ---
+# Um PDF só é extraído depois de ficar este tempo (s) sem mudar de tamanho nem
+# de data: dá tempo a que a cópia para a pasta termine
+ESPERA_ESTABILIDADE = 2.0
+# De quanto em quanto tempo (s) os PDFs pendentes são conferidos
+INTERVALO_CONFERENCIA = 0.5
+# Sem watchdog: de quanto em quanto tempo (s) as pastas das cidades são listadas
+INTERVALO_VARREDURA = 5.0
+# Máximo de PDFs entregues de uma vez à extração
+TAMANHO_LOTE_VIGIA = 20
+
+
+def _assinatura(caminho):
+    """(tamanho, data de modificação) do ficheiro, ou None se ele já não existir."""
+    try:
+        estado = os.stat(caminho)
+    except OSError:
+        return None
+    return (estado.st_size, estado.st_mtime_ns)
+
+
+class _AvisosDoSistema(FileSystemEventHandler):
+    """Passa os avisos do watchdog (numa thread própria) para o loop do asyncio."""
+
+    def __init__(self, loop, marcar):
+        self.loop = loop
+        self.marcar = marcar
+
+    def on_created(self, evento):
+        self.loop.call_soon_threadsafe(self.marcar, evento.src_path)
+
+    def on_modified(self, evento):
+        self.loop.call_soon_threadsafe(self.marcar, evento.src_path)
+
+    def on_moved(self, evento):
+        self.loop.call_soon_threadsafe(self.marcar, evento.dest_path)
+
+
+class VigiaPasta:
+    """
+    Vigia a estrutura nf/<cidade>/ e entrega, em pequenos lotes, os PDFs que
+    chegam ou mudam, depois de ficarem estáveis (ver ESPERA_ESTABILIDADE).
+
+    Usa os avisos do sistema operativo quando o pacote watchdog está
+    instalado; senão, lista as pastas das cidades a cada INTERVALO_VARREDURA
+    segundos, comparando só o tamanho e a data de cada PDF. Os PDFs que já
+    estão na pasta ao arrancar também são entregues (o cache da extração e o
+    diário de submissão evitam repetir o que já foi feito).
+    """
+
+    def __init__(
+        self,
+        pasta_raiz="nf",
+        espera=ESPERA_ESTABILIDADE,
+        tamanho_lote=TAMANHO_LOTE_VIGIA,
+        usar_watchdog=True,
+    ):
+        self.pasta_raiz = os.path.abspath(pasta_raiz)
+        self.espera = espera
+        self.tamanho_lote = tamanho_lote
+        self.usar_watchdog = usar_watchdog and Observer is not None
+        # caminho -> (assinatura, instante da última mudança)
+        self._pendentes = {}
+        # caminho -> assinatura do PDF já entregue
+        self._entregues = {}
+
+    def _tarefa(self, caminho):
+        """(nome_cidade, caminho) se for um PDF de nf/<cidade>/, senão None."""
+        pasta, nome_arquivo = os.path.split(os.path.abspath(caminho))
+        if not nome_arquivo.lower().endswith(".pdf"):
+            return None
+        if os.path.dirname(pasta) != self.pasta_raiz:
+            return None
+        return (os.path.basename(pasta), caminho)
+
+    def _marcar(self, caminho):
+        if self._tarefa(caminho) is None:
+            return
+        assinatura = _assinatura(caminho)
+        if assinatura is None or assinatura == self._entregues.get(caminho):
+            return
+        anterior = self._pendentes.get(caminho)
+        if anterior is None or anterior[0] != assinatura:
+            self._pendentes[caminho] = (assinatura, time.monotonic())
+
+    def _varrer(self):
+        """Lista nf/<cidade>/ e marca os PDFs novos ou alterados."""
+        try:
+            pastas = list(os.scandir(self.pasta_raiz))
+        except OSError:
+            return
+        for pasta in pastas:
+            if not pasta.is_dir():
+                continue
+            for entrada in os.scandir(pasta.path):
+                self._marcar(entrada.path)
+
+    def _prontos(self):
+        """Retira dos pendentes os PDFs estáveis há pelo menos `espera` segundos."""
+        agora = time.monotonic()
+        prontos = []
+        for caminho, (assinatura, desde) in list(self._pendentes.items()):
+            if agora - desde < self.espera:
+                continue
+            atual = _assinatura(caminho)
+            if atual is None:
+                del self._pendentes[caminho]  # Apagado antes de ficar pronto
+            elif atual != assinatura:
+                self._pendentes[caminho] = (atual, agora)  # Ainda a ser copiado
+            else:
+                del self._pendentes[caminho]
+                self._entregues[caminho] = atual
+                prontos.append(self._tarefa(caminho))
+        return sorted(prontos)
+
+    async def lotes(self):
+        """
+        Gerador assíncrono sem fim: entrega listas de tarefas
+        (nome_cidade, caminho_completo_pdf), no máximo tamanho_lote de cada vez.
+        """
+        os.makedirs(self.pasta_raiz, exist_ok=True)
+        observador = None
+        if self.usar_watchdog:
+            observador = Observer()
+            avisos = _AvisosDoSistema(asyncio.get_running_loop(), self._marcar)
+            observador.schedule(avisos, self.pasta_raiz, recursive=True)
+            observador.start()
+            print(f"Vigiando a pasta '{self.pasta_raiz}' (avisos do sistema).")
+        else:
+            print(
+                f"Vigiando a pasta '{self.pasta_raiz}' (consulta a cada "
+                f"{INTERVALO_VARREDURA:.0f} s; instale o watchdog para avisos imediatos)."
+            )
+
+        # Os PDFs que já lá estão entram logo como pendentes
+        self._varrer()
+        ultima_varredura = time.monotonic()
+        try:
+            while True:
+                await asyncio.sleep(INTERVALO_CONFERENCIA)
+                if (
+                    observador is None
+                    and time.monotonic() - ultima_varredura >= INTERVALO_VARREDURA
+                ):
+                    self._varrer()
+                    ultima_varredura = time.monotonic()
+                prontos = self._prontos()
+                for inicio in range(0, len(prontos), self.tamanho_lote):
+                    yield prontos[inicio : inicio + self.tamanho_lote]
+        finally:
+            if observador:
+                observador.stop()
+                observador.join()
@@ -0,0 +1,227 @@
+"""
+Linha de comando da macro, com uma fase por subcomando:
+
+    python linha_comando.py extrair  --pasta nf --registos notas_extraidas.jsonl
+    python linha_comando.py enviar   --periodo 09/2025 --cnpj-estabelecimento 00394494013700
+    python linha_comando.py executar --periodo 09/2025 --streaming
+
+- extrair: só a Fase 1 (PDFs -> ficheiro de notas e relatório Excel), sem
+  Playwright nem Chrome
+- enviar: só a Fase 2, a partir do ficheiro de notas já gravado (ex.: repetir
+  o envio depois de uma falha, sem voltar a extrair)
+- executar: as duas fases, como o processador_nf.py
+
+Os pacotes pesados (Playwright, pandas, PyMuPDF) só são importados pelo
+subcomando que precisa deles, por isso a ajuda e a extração arrancam depressa.
+As opções omitidas usam a configuração dos próprios módulos.
+"""
+
+import argparse  # Para ler as opções da linha de comando
+import re  # Para conferir o período e o CNPJ
+
+
+def periodo_apuracao(texto):
+    """Confere o período no formato MM/AAAA do EFD-Reinf."""
+    if not re.fullmatch(r"(0[1-9]|1[0-2])/\d{4}", texto.strip()):
+        raise argparse.ArgumentTypeError(f"'{texto}' não é um período MM/AAAA.")
+    return texto.strip()
+
+
+def cnpj_estabelecimento(texto):
+    """Aceita o CNPJ com ou sem pontuação e devolve só os 14 dígitos."""
+    digitos = re.sub(r"\D", "", texto)
+    if len(digitos) != 14:
+        raise argparse.ArgumentTypeError(f"'{texto}' não tem os 14 dígitos de um CNPJ.")
+    return digitos
+
+
+def inteiro_positivo(texto):
+    """Número inteiro maior ou igual a 1 (abas, processos)."""
+    try:
+        numero = int(texto)
+    except ValueError:
+        numero = 0
+    if numero < 1:
+        raise argparse.ArgumentTypeError(f"'{texto}' não é um inteiro maior que 0.")
+    return numero
+
+
+def _opcoes(argumentos, nomes):
+    """Só as opções indicadas na linha de comando (as outras ficam no padrão)."""
+    return {
+        nome: getattr(argumentos, nome)
+        for nome in nomes
+        if getattr(argumentos, nome, None) is not None
+    }
+
+
+def comando_extrair(argumentos):
+    from extratores.extrator_pdf import executar_extracao_pdf
+
+    executar_extracao_pdf(
+        **_opcoes(
+            argumentos,
+            [
+                "num_processos",
+                "usar_cache",
+                "caminho_registos",
+                "exportar_excel",
+                "pasta_raiz",
+            ],
+        )
+    )
+
+
+def _executar_processador(argumentos, extrair):
+    import asyncio
+
+    from processador_nf import main
+
+    opcoes = _opcoes(
+        argumentos,
+        [
+            "caminho_registos",
+            "periodo",
+            "cnpj_estabelecimento",
+            "num_processos",
+            "usar_cache",
+            "exportar_excel",
+            "num_abas",
+            "agrupar",
+            "retomar",
+            "simulado",
+            "modo_streaming",
+            "modo_vigia",
+        ],
+    )
+    if "pasta_raiz" in argumentos and argumentos.pasta_raiz is not None:
+        opcoes["pasta_nf"] = argumentos.pasta_raiz
+    asyncio.run(main(extrair=extrair, **opcoes))
+
+
+def comando_enviar(argumentos):
+    _executar_processador(argumentos, extrair=False)
+
+
+def comando_executar(argumentos):
+    _executar_processador(argumentos, extrair=True)
+
+
+def criar_parser():
+    # Opções partilhadas pelos subcomandos
+    pasta = argparse.ArgumentParser(add_help=False)
+    pasta.add_argument(
+        "--pasta",
+        dest="pasta_raiz",
+        help="pasta com as subpastas das cidades e os PDFs (padrão: nf)",
+    )
+    registos = argparse.ArgumentParser(add_help=False)
+    registos.add_argument(
+        "--registos",
+        dest="caminho_registos",
+        help="ficheiro de notas entre as fases: .jsonl, .sqlite3 ou .parquet "
+        "(.xlsx só para ler) (padrão: notas_extraidas.jsonl)",
+    )
+    extracao = argparse.ArgumentParser(add_help=False)
+    extracao.add_argument(
+        "--processos",
+        dest="num_processos",
+        type=inteiro_positivo,
+        help="processos da extração (padrão: todos os núcleos)",
+    )
+    extracao.add_argument(
+        "--sem-cache",
+        dest="usar_cache",
+        action="store_false",
+        default=None,
+        help="extrai todos os PDFs, mesmo os que já estão no cache",
+    )
+    extracao.add_argument(
+        "--sem-excel",
+        dest="exportar_excel",
+        action="store_false",
+        default=None,
+        help="não exporta o relatório Excel",
+    )
+    envio = argparse.ArgumentParser(add_help=False)
+    envio.add_argument(
+        "--periodo",
+        type=periodo_apuracao,
+        help="período de apuração MM/AAAA (padrão: PERIODO_APURACAO em "
+        "automacao/r2010.py)",
+    )
+    envio.add_argument(
+        "--cnpj-estabelecimento",
+        type=cnpj_estabelecimento,
+        help="CNPJ do estabelecimento tomador (padrão: CNPJ_ESTABELECIMENTO em "
+        "automacao/r2010.py)",
+    )
+    envio.add_argument(
+        "--abas", dest="num_abas", type=inteiro_positivo, help="abas em paralelo"
+    )
+    envio.add_argument(
+        "--agrupar",
+        action="store_true",
+        default=None,
+        help="um evento R2010 por fornecedor",
+    )
+    envio.add_argument(
+        "--sem-retomar",
+        dest="retomar",
+        action="store_false",
+        default=None,
+        help="reenvia também as notas que o diário já dá como enviadas",
+    )
+    envio.add_argument(
+        "--simulado",
+        action="store_true",
+        default=None,
+        help="envia para o portal local de testes, sem tocar no EFD-Reinf",
+    )
+
+    parser = argparse.ArgumentParser(
+        description="Macro de extração de NFS-e e envio de eventos R2010 ao EFD-Reinf."
+    )
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    extrair = subcomandos.add_parser(
+        "extrair",
+        parents=[pasta, registos, extracao],
+        help="só a Fase 1: extrai os PDFs para o ficheiro de notas",
+    )
+    extrair.set_defaults(funcao=comando_extrair)
+
+    enviar = subcomandos.add_parser(
+        "enviar",
+        parents=[registos, envio],
+        help="só a Fase 2: envia as notas do ficheiro de notas",
+    )
+    enviar.set_defaults(funcao=comando_enviar)
+
+    executar = subcomandos.add_parser(
+        "executar",
+        parents=[pasta, registos, extracao, envio],
+        help="as duas fases: extrai e envia",
+    )
+    modo = executar.add_mutually_exclusive_group()
+    modo.add_argument(
+        "--streaming",
+        dest="modo_streaming",
+        action="store_true",
+        default=None,
+        help="envia cada nota assim que é extraída",
+    )
+    modo.add_argument(
+        "--vigia",
+        dest="modo_vigia",
+        action="store_true",
+        default=None,
+        help="fica a vigiar a pasta e envia os PDFs que chegarem",
+    )
+    executar.set_defaults(funcao=comando_executar)
+    return parser
+
+
+if __name__ == "__main__":
+    argumentos = criar_parser().parse_args()
+    argumentos.funcao(argumentos)
@@ -0,0 +1,237 @@
+"""
+Desenha, sobre cada página de NFS-e, as âncoras e as áreas de busca e de
+extração de todos os campos, tal como o modelo da cidade as define
+(extratores/modelos/<cidade>.json), e gera um índice HTML com as imagens e
+os valores lidos.
+
+Serve para conferir de uma só vez centenas de notas depois de mudar um modelo.
+Na pasta principal do projeto:
+
+    python -m maps.depurar_areas --pasta nf --quantidade 200
+
+Cores: verde = âncora encontrada, azul tracejado = área onde uma âncora
+secundária é procurada, vermelho = área de onde o campo é extraído.
+"""
+
+import argparse  # Para ler as opções da linha de comando
+import functools
+import html  # Para escrever os valores lidos no índice sem estragar o HTML
+import os
+from concurrent.futures import ProcessPoolExecutor  # Páginas desenhadas em paralelo
+
+import fitz  # PyMuPDF
+
+from extratores.extrator_pdf import expandir_paginas, listar_pdfs
+from extratores.indice_pagina import IndicePagina
+from extratores.modelo_nfse import obter_modelo
+
+# --- CONFIGURAÇÕES ---
+PASTA_SAIDA = "depuracao_areas"
+# Resolução das imagens: baixa, só para conferir as áreas (150 para ler o texto)
+DPI_DEPURACAO = 60
+# Número de processos. None usa todos os núcleos da máquina.
+NUM_PROCESSOS_DEPURACAO = None
+
+COR_ANCORA = (0, 0.6, 0)
+COR_BUSCA = (0, 0, 1)
+COR_EXTRACAO = (1, 0, 0)
+
+
+def desenhar_pagina(tarefa, pasta_saida=PASTA_SAIDA, dpi=DPI_DEPURACAO):
+    """
+    Desenha as áreas do modelo numa página e grava a imagem PNG.
+    tarefa é (nome_cidade, caminho_completo_pdf, indice_pagina). Devolve um
+    dicionário com a imagem, os valores lidos e os campos sem âncora.
+    """
+    nome_cidade, caminho_completo_pdf, indice_pagina = tarefa
+    nome_arquivo = os.path.basename(caminho_completo_pdf)
+    resultado = {
+        "cidade": nome_cidade,
+        "arquivo": caminho_completo_pdf,
+        "pagina": indice_pagina + 1,
+        "imagem": None,
+        "campos": {},
+        "em_falta": [],
+        "erro": None,
+    }
+    modelo = obter_modelo(nome_cidade)
+    if modelo is None:
+        resultado["erro"] = "cidade sem modelo"
+        return resultado
+
+    try:
+        with fitz.open(caminho_completo_pdf) as documento:
+            pagina = documento.load_page(indice_pagina)
+            indice = IndicePagina(pagina)
+            # Procura completa, sem o cache de layout: mostra o que o modelo acha
+            ancoras = modelo.localizar_ancoras(indice)
+            areas_de_busca = modelo.areas_de_busca(indice, ancoras)
+            areas_dos_campos = modelo.areas_dos_campos(indice, ancoras)
+
+            for area in ancoras.values():
+                if area:
+                    pagina.draw_rect(area, color=COR_ANCORA, width=0.8)
+            for area in areas_de_busca.values():
+                if area:
+                    pagina.draw_rect(area, color=COR_BUSCA, width=1, dashes="[3 1]")
+            for coluna, area in areas_dos_campos.items():
+                if area is None:
+                    resultado["em_falta"].append(coluna)
+                    continue
+                pagina.draw_rect(area, color=COR_EXTRACAO, width=1.2)
+                pagina.insert_text(
+                    (area.x0, area.y0 - 1), coluna, fontsize=5, color=COR_EXTRACAO
+                )
+
+            pasta_cidade = os.path.join(pasta_saida, nome_cidade)
+            os.makedirs(pasta_cidade, exist_ok=True)
+            imagem = os.path.join(
+                pasta_cidade,
+                f"{os.path.splitext(nome_arquivo)[0]}_p{indice_pagina + 1}.png",
+            )
+            pagina.get_pixmap(dpi=dpi).save(imagem)
+    except Exception as e:
+        resultado["erro"] = str(e)
+        return resultado
+
+    resultado["imagem"] = os.path.relpath(imagem, pasta_saida)
+    resultado["campos"] = modelo.extrair(indice)
+    return resultado
+
+
+def gravar_indice_html(resultados, pasta_saida=PASTA_SAIDA):
+    """
+    Grava pasta_saida/index.html: uma grelha com a imagem de cada página e os
+    valores lidos. As páginas com campos em falta ou erros aparecem primeiro.
+    """
+    com_problemas = sum(1 for r in resultados if r["em_falta"] or r["erro"])
+    ordenados = sorted(resultados, key=lambda r: not (r["em_falta"] or r["erro"]))
+
+    cartoes = []
+    for resultado in ordenados:
+        titulo = html.escape(
+            f"{resultado['cidade']}/{os.path.basename(resultado['arquivo'])} "
+            f"(página {resultado['pagina']})"
+        )
+        linhas = "".join(
+            f"<tr><th>{html.escape(coluna)}</th><td>{html.escape(str(valor))}</td></tr>"
+            for coluna, valor in resultado["campos"].items()
+        )
+        avisos = ""
+        if resultado["em_falta"]:
+            avisos += (
+                "<p class='aviso'>Sem âncora: "
+                f"{html.escape(', '.join(resultado['em_falta']))}</p>"
+            )
+        if resultado["erro"]:
+            avisos += f"<p class='aviso'>Erro: {html.escape(resultado['erro'])}</p>"
+        imagem = (
+            f"<a href='{html.escape(resultado['imagem'])}'>"
+            f"<img loading='lazy' src='{html.escape(resultado['imagem'])}'></a>"
+            if resultado["imagem"]
+            else ""
+        )
+        classe = "cartao problema" if avisos else "cartao"
+        cartoes.append(
+            f"<div class='{classe}'><h3>{titulo}</h3>{avisos}{imagem}"
+            f"<table>{linhas}</table></div>"
+        )
+
+    conteudo = f"""<!DOCTYPE html>
+<html lang="pt">
+<head>
+<meta charset="utf-8">
+<title>Depuração das áreas de extração</title>
+<style>
+body {{ font-family: sans-serif; margin: 1em; }}
+.grelha {{ display: flex; flex-wrap: wrap; gap: 1em; }}
+.cartao {{ width: 360px; border: 1px solid #ccc; padding: 0.5em; font-size: 12px; }}
+.problema {{ border: 2px solid #c00; }}
+.aviso {{ color: #c00; font-weight: bold; }}
+img {{ width: 100%; }}
+th {{ text-align: left; padding-right: 0.5em; }}
+</style>
+</head>
+<body>
+<h1>Depuração das áreas de extração</h1>
+<p>{len(resultados)} páginas, {com_problemas} com campos em falta ou erros.
+Verde: âncora; azul tracejado: área de busca; vermelho: área de extração.</p>
+<div class="grelha">
+{chr(10).join(cartoes)}
+</div>
+</body>
+</html>
+"""
+    caminho = os.path.join(pasta_saida, "index.html")
+    with open(caminho, "w", encoding="utf-8") as ficheiro:
+        ficheiro.write(conteudo)
+    return caminho
+
+
+def depurar_areas(
+    pasta="nf",
+    quantidade=None,
+    pasta_saida=PASTA_SAIDA,
+    dpi=DPI_DEPURACAO,
+    num_processos=NUM_PROCESSOS_DEPURACAO,
+):
+    """
+    Desenha as áreas das primeiras `quantidade` notas (todas, com None) da
+    estrutura pasta/<cidade>/ e grava o índice HTML. Devolve o caminho do índice.
+    """
+    tarefas = listar_pdfs(pasta)[:quantidade]
+    tarefas_por_pagina, _ = expandir_paginas(tarefas)
+    if num_processos is None:
+        num_processos = os.cpu_count() or 1
+    num_processos = max(1, min(num_processos, len(tarefas_por_pagina)))
+
+    print(
+        f"\nDesenhando {len(tarefas_por_pagina)} páginas de {len(tarefas)} PDFs "
+        f"a {dpi} DPI com {num_processos} processo(s)..."
+    )
+    desenhar = functools.partial(desenhar_pagina, pasta_saida=pasta_saida, dpi=dpi)
+    if num_processos == 1:
+        resultados = [desenhar(tarefa) for tarefa in tarefas_por_pagina]
+    else:
+        with ProcessPoolExecutor(max_workers=num_processos) as executor:
+            tamanho_lote = max(1, len(tarefas_por_pagina) // (num_processos * 4))
+            resultados = list(
+                executor.map(desenhar, tarefas_por_pagina, chunksize=tamanho_lote)
+            )
+
+    caminho = gravar_indice_html(resultados, pasta_saida)
+    com_problemas = sum(1 for r in resultados if r["em_falta"] or r["erro"])
+    print(
+        f"\nÍndice gravado em '{caminho}' ({len(resultados)} páginas, "
+        f"{com_problemas} com campos em falta ou erros)."
+    )
+    return caminho
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Desenha as áreas de extração dos modelos sobre as NFS-e."
+    )
+    parser.add_argument("--pasta", default="nf", help="pasta com nf/<cidade>/")
+    parser.add_argument(
+        "--quantidade",
+        type=int,
+        default=None,
+        help="máximo de PDFs a desenhar (por omissão, todos)",
+    )
+    parser.add_argument("--saida", default=PASTA_SAIDA)
+    parser.add_argument("--dpi", type=int, default=DPI_DEPURACAO)
+    parser.add_argument(
+        "--processos",
+        type=int,
+        default=NUM_PROCESSOS_DEPURACAO,
+        help="processos em paralelo (por omissão, todos os núcleos)",
+    )
+    argumentos = parser.parse_args()
+    depurar_areas(
+        argumentos.pasta,
+        argumentos.quantidade,
+        argumentos.saida,
+        argumentos.dpi,
+        argumentos.processos,
+    )
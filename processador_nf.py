@@ -1,10 +1,31 @@
 import subprocess
 import os
-import time
 import asyncio
+import functools
 from playwright.async_api import async_playwright
-from extratores.leitor_excel import ler_dados_da_planilha
-from extratores.extrator_pdf import executar_extracao_pdf
+from automacao.abas import abrir_abas_reinf, despachar_em_abas, registrar_em_serie
+from automacao.esperas import usar_esperas
+from automacao.filtro_recursos import FiltroRecursos
+from automacao.diario_submissao import CAMINHO_DIARIO, DiarioSubmissao, com_diario
+from automacao.sessao import SessaoReinf
+from automacao.r2010 import (
+    CNPJ_ESTABELECIMENTO,
+    PERIODO_APURACAO,
+    agrupar_por_evento,
+    registrar_evento_r2010,
+)
+from automacao.tentativas import CAMINHO_FALHAS, ListaFalhas, com_tentativas
+from extratores.armazenamento import CAMINHO_REGISTOS, iterar_registos
+from extratores.validacao import CAMINHO_REJEITADAS, ValidadorRegistos
+from extratores.relatorio_excel import (
+    EXPORTAR_EXCEL,
+    NOME_ARQUIVO_EXCEL,
+    salvar_relatorio_excel,
+)
+from rastreamento import RASTREADOR
+
+# A extração (extratores/extrator_pdf.py, com o PyMuPDF) e o vigia da pasta só
+# são importados quando há Fase 1: "linha_comando.py enviar" não precisa deles
 
 # --- CONFIGURAÇÃO ---
 CHROME_EXECUTABLE_PATH = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
@@ -14,7 +35,30 @@ USER_DATA_DIR = (
 )
 LOGIN_URL = "https://cav.receita.fazenda.gov.br/"
 
-NOME_ARQUIVO_EXCEL = "relatorio_consolidado_nf.xlsx"
+# Ficheiros com a duração de cada passo de cada nota (JSON e/ou CSV)
+CAMINHOS_PERFIL = ["perfil_execucao.json", "perfil_execucao.csv"]
+# Modo streaming: a automação começa logo após a primeira nota extraída, em vez
+# de esperar que todos os PDFs sejam lidos. As notas continuam a ser gravadas em
+# CAMINHO_REGISTOS (e o Excel exportado) no fim.
+MODO_STREAMING = False
+# Número de abas do EFD-Reinf usadas em paralelo na mesma sessão (sem novo login).
+# Com 1, as notas são registadas uma a uma na aba principal, como antes.
+NUM_ABAS_CONCORRENTES = 1
+# Retomar: ignora as notas que o diário de submissão já marca com rascunho salvo
+MODO_RETOMAR = True
+# Agrupar: as notas do mesmo fornecedor entram num único evento R2010
+# (um só "Incluir novo evento" e um só "Salvar rascunho" por fornecedor)
+AGRUPAR_POR_FORNECEDOR = False
+# Simulado: usa o EFD-Reinf simulado (benchmarks/portal_reinf_simulado.py) num
+# Chromium headless, sem login, para medir notas/minuto offline
+MODO_SIMULADO = False
+# Filtro de pedidos do navegador (ver automacao/filtro_recursos.py): None desliga;
+# "medir" só conta o que seria bloqueado; "bloquear" corta imagens, fontes e
+# estatísticas. Mostra no fim os pedidos e bytes poupados.
+FILTRO_RECURSOS = None
+# Vigia: fica a correr e vigia a pasta nf/<cidade>/; cada PDF novo é extraído e
+# registado no EFD-Reinf segundos depois de chegar (Ctrl+C para terminar)
+MODO_VIGIA = False
 
 
 def start_chrome_with_debugging():
@@ -36,280 +80,390 @@ def start_chrome_with_debugging():
     ]
 
     print(f"Iniciando o Chrome na porta de depuração {REMOTE_DEBUGGING_PORT}...")
+    # Não esperamos aqui: a SessaoReinf consulta a porta CDP até o Chrome responder
     subprocess.Popen(command)
-    time.sleep(2)  # Pequena pausa para garantir que o navegador inicie completamente
 
 
-async def main():
+def _opcoes_extracao(num_processos, usar_cache):
+    """Só as opções dadas; as omitidas (None) ficam com as de extrator_pdf.py."""
+    opcoes = {"num_processos": num_processos, "usar_cache": usar_cache}
+    return {nome: valor for nome, valor in opcoes.items() if valor is not None}
+
+
+def extrair_para_fila(
+    loop,
+    fila_cadastros,
+    pasta_nf="nf",
+    caminho_registos=CAMINHO_REGISTOS,
+    num_processos=None,
+    usar_cache=None,
+    exportar_excel=EXPORTAR_EXCEL,
+):
     """
-    Função principal assíncrona que controla o fluxo de automação com Playwright.
+    Corre numa thread à parte: extrai os PDFs, grava cada nota no ficheiro de
+    registos e envia-a para a fila do asyncio assim que fica pronta. No fim
+    envia None para avisar que não há mais notas.
     """
-    # ==============================================================================
-    # --- FASE 1: EXECUÇÃO DA EXTRAÇÃO DOS PDFs ---
-    # ==============================================================================
-    print("--- INICIANDO FASE 1: Extraindo dados dos PDFs para o Excel ---")
+    from extratores.extrator_pdf import gravar_extracao, iterar_extracao_pdf
+
+    def enviar_para_fila(dados_extraidos):
+        for dados in dados_extraidos:
+            # A fila do asyncio não é thread-safe: o put é agendado no loop principal
+            loop.call_soon_threadsafe(fila_cadastros.put_nowait, dict(dados))
+            yield dados
+
     try:
-        executar_extracao_pdf()
-        print("--- FASE 1 CONCLUÍDA: Ficheiro Excel gerado com sucesso! ---\n")
-    except Exception as e:
-        print(f"ERRO CRÍTICO na fase de extração de PDFs: {e}")
+        gravar_extracao(
+            enviar_para_fila(
+                iterar_extracao_pdf(
+                    pasta_raiz=pasta_nf,
+                    **_opcoes_extracao(num_processos, usar_cache),
+                )
+            ),
+            caminho_registos,
+            exportar_excel,
+        )
+    finally:
+        loop.call_soon_threadsafe(fila_cadastros.put_nowait, None)
+
+
+async def vigiar_para_fila(
+    fila_cadastros,
+    vigia,
+    num_processos=None,
+    usar_cache=None,
+):
+    """
+    Modo vigia: extrai cada lote de PDFs que chega à pasta e envia as notas
+    para a fila. Só termina com um erro ou quando a tarefa é cancelada.
+    """
+    from extratores.extrator_pdf import iterar_extracao_pdf
+
+    try:
+        async for lote in vigia.lotes():
+            print(f"\n{len(lote)} PDF(s) novo(s) na pasta. Extraindo...")
+            notas = await asyncio.to_thread(
+                lambda: list(
+                    iterar_extracao_pdf(
+                        tarefas=lote, **_opcoes_extracao(num_processos, usar_cache)
+                    )
+                )
+            )
+            for dados_extraidos in notas:
+                fila_cadastros.put_nowait(dados_extraidos)
+    finally:
+        fila_cadastros.put_nowait(None)
+
+
+async def eventos_da_fila(fila_cadastros, validador):
+    """
+    Entrega as notas da fila à medida que chegam, até receber None.
+    Cada nota válida é um evento R2010 próprio (lista com uma nota).
+    """
+    while True:
+        cadastro = await fila_cadastros.get()
+        if cadastro is None:
+            return
+        validas = validador.validar([cadastro])
+        if validas:
+            yield validas
+
+
+async def eventos_da_lista(lista_de_eventos):
+    """Entrega os eventos já montados, com a mesma interface da fila."""
+    for cadastros in lista_de_eventos:
+        yield cadastros
+
+
+async def eventos_dos_registos(caminho_registos, validador):
+    """
+    Lê as notas do ficheiro de registos só quando o navegador estiver pronto
+    para a próxima (validadas em lotes). Cada nota válida é um evento R2010 próprio.
+    """
+    for cadastro in validador.filtrar(iterar_registos(caminho_registos)):
+        yield [cadastro]
+
+
+async def entrar_no_reinf(page, perfil_escolhido=False):
+    """
+    Faz o caminho do portal e-CAC até ao EFD-Reinf: espera o login manual,
+    a escolha do perfil e abre o EFD-Reinf na aba.
+
+    Se a aba já estiver autenticada e o perfil já tiver sido escolhido nesta
+    sessão (perfil_escolhido), a escolha do perfil é saltada.
+    """
+    print(f"Abrindo a página: {LOGIN_URL}")
+    await page.goto(LOGIN_URL)
+    botao_sair_locator = page.locator("#sairSeguranca")
+    ja_autenticado = await botao_sair_locator.is_visible()
+    if not ja_autenticado:
+        await botao_sair_locator.wait_for(state="visible", timeout=600000)
+
+    print("\nLogin detectado com sucesso!")
+    print(f"URL atual: {page.url}")
+
+    # -----------------------------------------------------
+    print("\nIniciando a execução da sua macro...")
+    if ja_autenticado and perfil_escolhido:
+        print("Sessão já autenticada e com perfil escolhido: saltando o perfil.")
+    else:
+        # -----------------------------------------------------
+        # ACESSANDO O BOTÃO DE PERFIL DO USUÁRIO:
+        botao_perfil = page.locator("#btnPerfil")
+        await botao_perfil.click()
+        print("Botão clicado. A janela de perfil deve estar aberta.")
+        # -----------------------------------------------------
+        # ABERTURA DA JANELA DE PREENCHIMENTO DO PERFIL
+        dialogo_perfil = page.locator("#perfilAcesso")
+        await dialogo_perfil.wait_for(state="visible")
+        print("Janela de perfil detectada.")
+        await dialogo_perfil.wait_for(state="hidden", timeout=0)
+        print("\n--- Janela de perfil fechada pelo usuário! ---")
+        print("Continuando a execução do script...")
+    # -----------------------------------------------------
+    # CLICANDO NO BOTÃO "DECLARAÇÕES E DEMONSTRATIVOS"
+    botao_declaracoes = page.locator("#btn214")
+    await botao_declaracoes.click()
+    print("Botão 'Declarações e Demonstrativos' clicado com sucesso!")
+    # -----------------------------------------------------
+    # CLICANDO NO LINK "ACESSAR EFD-REINF"
+    link_reinf = page.get_by_role("link", name="Acessar EFD-Reinf")
+    await link_reinf.click()
+    print("Link 'Acessar EFD-Reinf' clicado com sucesso!")
+
+
+async def main(
+    modo_streaming=MODO_STREAMING,
+    num_abas=NUM_ABAS_CONCORRENTES,
+    retomar=MODO_RETOMAR,
+    agrupar=AGRUPAR_POR_FORNECEDOR,
+    simulado=MODO_SIMULADO,
+    filtro_recursos=FILTRO_RECURSOS,
+    modo_vigia=MODO_VIGIA,
+    extrair=True,
+    pasta_nf="nf",
+    caminho_registos=CAMINHO_REGISTOS,
+    periodo=PERIODO_APURACAO,
+    cnpj_estabelecimento=CNPJ_ESTABELECIMENTO,
+    num_processos=None,
+    usar_cache=None,
+    exportar_excel=EXPORTAR_EXCEL,
+):
+    """
+    Função principal assíncrona que controla o fluxo de automação com Playwright.
+
+    Com extrair=False a Fase 1 é saltada e as notas já gravadas em
+    caminho_registos são enviadas (ex.: repetir só o envio). num_processos e
+    usar_cache em None ficam com a configuração de extratores/extrator_pdf.py.
+    """
+    tarefa_extracao = None
+    if not extrair:
+        if modo_streaming or modo_vigia:
+            print("AVISO: sem extração, os modos streaming e vigia não são usados.")
+            modo_streaming = modo_vigia = False
+        if not os.path.exists(caminho_registos):
+            print(
+                f"ERRO: o ficheiro de notas '{caminho_registos}' não existe. "
+                "Faça primeiro a extração dos PDFs."
+            )
+            return
+        print(f"--- FASE 1 SALTADA: usando as notas de '{caminho_registos}' ---\n")
+    elif modo_vigia:
+        # ==============================================================================
+        # --- FASE 1 EM MODO VIGIA: CADA PDF NOVO NA PASTA SEGUE PARA O NAVEGADOR ---
+        # ==============================================================================
         print(
-            "O programa será encerrado pois os dados de entrada não puderam ser gerados."
+            "--- INICIANDO MODO VIGIA: as notas seguem para o navegador ao chegar ---"
+        )
+        from extratores.vigia_pasta import VigiaPasta
+
+        fila_cadastros = asyncio.Queue()
+        tarefa_extracao = asyncio.create_task(
+            vigiar_para_fila(
+                fila_cadastros, VigiaPasta(pasta_nf), num_processos, usar_cache
+            )
         )
-        return  # Encerra a execução se a extração falhar
+    elif modo_streaming:
+        # ==============================================================================
+        # --- FASE 1 EM STREAMING: A EXTRAÇÃO CORRE EM PARALELO COM O NAVEGADOR ---
+        # ==============================================================================
+        print("--- INICIANDO FASE 1 EM STREAMING: as notas seguem para o navegador ---")
+        fila_cadastros = asyncio.Queue()
+        tarefa_extracao = asyncio.create_task(
+            asyncio.to_thread(
+                extrair_para_fila,
+                asyncio.get_running_loop(),
+                fila_cadastros,
+                pasta_nf,
+                caminho_registos,
+                num_processos,
+                usar_cache,
+                exportar_excel,
+            )
+        )
+    else:
+        # ==============================================================================
+        # --- FASE 1: EXECUÇÃO DA EXTRAÇÃO DOS PDFs ---
+        # ==============================================================================
+        print("--- INICIANDO FASE 1: Extraindo dados dos PDFs ---")
+        from extratores.extrator_pdf import executar_extracao_pdf
+
+        try:
+            executar_extracao_pdf(
+                caminho_registos=caminho_registos,
+                exportar_excel=exportar_excel,
+                pasta_raiz=pasta_nf,
+                **_opcoes_extracao(num_processos, usar_cache),
+            )
+            print("--- FASE 1 CONCLUÍDA: notas gravadas com sucesso! ---\n")
+        except Exception as e:
+            print(f"ERRO CRÍTICO na fase de extração de PDFs: {e}")
+            print(
+                "O programa será encerrado pois os dados de entrada não puderam ser gerados."
+            )
+            return  # Encerra a execução se a extração falhar
 
     # ==============================================================================
     # --- FASE 2: EXECUÇÃO DA AUTOMAÇÃO WEB ---
     # ==============================================================================
-    print("--- INICIANDO FASE 2: Lendo Excel e automatizando o navegador ---")
-    start_chrome_with_debugging()
+    print("--- INICIANDO FASE 2: Lendo as notas e automatizando o navegador ---")
 
     browser = None  # Inicializa a variável do browser
+    portal = None
+    filtro = None
+    # No modo simulado o diário fica só em memória, para não marcar como
+    # submetidas notas que nunca chegaram ao EFD-Reinf real
+    diario = DiarioSubmissao(":memory:" if simulado else CAMINHO_DIARIO)
+    falhas = ListaFalhas(None if simulado else CAMINHO_FALHAS)
+    # Notas inválidas são recusadas antes de chegar ao navegador
+    validador = ValidadorRegistos(None if simulado else CAMINHO_REJEITADAS, diario)
     try:
         async with async_playwright() as p:
-            # 2. Conecta o Playwright ao Chrome já aberto via Chrome DevTools Protocol (CDP)
-            print("Conectando o Playwright ao Chrome...")
-            endpoint_url = f"http://127.0.0.1:{REMOTE_DEBUGGING_PORT}"
-            browser = await p.chromium.connect_over_cdp(endpoint_url)
-
-            # Obtém o contexto padrão do navegador (a janela que foi aberta)
-            context = browser.contexts[0]
-            page = context.pages[0]  # Pega a primeira aba/página
-            print("Conectado com sucesso!")
+            if simulado:
+                # Portal local e navegador headless, sem login: mede a automação
+                # sem tocar no EFD-Reinf real. Importado só aqui: o portal
+                # (e o http.server) não faz falta numa execução normal
+                from benchmarks.portal_reinf_simulado import (
+                    ESPERAS_PORTAL_SIMULADO,
+                    PortalReinfSimulado,
+                )
 
-            print(f"Abrindo a página: {LOGIN_URL}")
-            await page.goto(LOGIN_URL)
-            botao_sair_locator = page.locator("#sairSeguranca")
-            await botao_sair_locator.wait_for(state="visible", timeout=600000)
+                # Os endpoints do portal simulado são conhecidos: espera por eles
+                usar_esperas(ESPERAS_PORTAL_SIMULADO)
+                portal = PortalReinfSimulado().iniciar()
+                browser = await p.chromium.launch(headless=True)
+                context = await browser.new_context()
+                page = await context.new_page()
+            else:
+                # 2. Conecta o Playwright ao Chrome via Chrome DevTools Protocol (CDP):
+                # reaproveita o Chrome já aberto na porta ou abre um novo
+                sessao = SessaoReinf(REMOTE_DEBUGGING_PORT, start_chrome_with_debugging)
+                browser, context, page = await sessao.conectar(p)
+                print("Conectado com sucesso!")
 
-            print("\nLogin detectado com sucesso!")
-            print(f"URL atual: {page.url}")
+            if filtro_recursos:
+                # Instalado antes da primeira navegação, vale também para as abas extra
+                filtro = FiltroRecursos(filtro_recursos)
+                await filtro.instalar(context)
 
+            if simulado:
+                await page.goto(portal.url)
+            else:
+                # Aba já no EFD-Reinf, atalho para o URL guardado ou caminho completo
+                page = await sessao.abrir_reinf(context, page, entrar_no_reinf)
             # -----------------------------------------------------
-            print("\nIniciando a execução da sua macro...")
-            # -----------------------------------------------------
-            # ACESSANDO O BOTÃO DE PERFIL DO USUÁRIO:
-            botao_perfil = page.locator("#btnPerfil")
-            await botao_perfil.click()
-            print("Botão clicado. A janela de perfil deve estar aberta.")
-            # -----------------------------------------------------
-            # ABERTURA DA JANELA DE PREENCHIMENTO DO PERFIL
-            dialogo_perfil = page.locator("#perfilAcesso")
-            await dialogo_perfil.wait_for(state="visible")
-            print("Janela de perfil detectada.")
-            await dialogo_perfil.wait_for(state="hidden", timeout=0)
-            print("\n--- Janela de perfil fechada pelo usuário! ---")
-            print("Continuando a execução do script...")
-            # -----------------------------------------------------
-            # CLICANDO NO BOTÃO "DECLARAÇÕES E DEMONSTRATIVOS"
-            botao_declaracoes = page.locator("#btn214")
-            await botao_declaracoes.click()
-            print("Botão 'Declarações e Demonstrativos' clicado com sucesso!")
-            # -----------------------------------------------------
-            # CLICANDO NO LINK "ACESSAR EFD-REINF"
-            link_reinf = page.get_by_role("link", name="Acessar EFD-Reinf")
-            await link_reinf.click()
-            print("Link 'Acessar EFD-Reinf' clicado com sucesso!")
-            # -----------------------------------------------------
-            # INICIANDO O LOOPING PELOS DADOS DO EXCEL
-            lista_de_cadastros = ler_dados_da_planilha(NOME_ARQUIVO_EXCEL)
-            for cadastro_atual in lista_de_cadastros:
-
-                # usando as chaves do dicionário (os nomes das colunas)
-                num_nf_principal = cadastro_atual.get("NUMERO DA NF")
-                cod_verificacao = cadastro_atual.get("CODIGO DE VERIFICAÇÃO")
-                cnpj_fornecedor_nf = cadastro_atual.get("CNPJ FORNECEDOR")
-                serie_nf = cadastro_atual.get("SERIE NF")
-                numero_nf = cadastro_atual.get("NUMERO NF")
-                data_emissao_nf = cadastro_atual.get("DATA DE EMISSAO NF")
-                valor_bruto_nf = cadastro_atual.get("VALOR BRUTO")
-                tipo_servico = cadastro_atual.get("TIPO DE SERVIÇO")
-                valor_retencao_nf = cadastro_atual.get("VALOR DA RETENÇÃO")
-                status = cadastro_atual.get("STATUS DA EXECUÇÃO")
-                # -----------------------------------------------------
-                # ABRINDO O MENU PARA ACESSAR "RETENÇÃO DE CONTRIBUIÇÃO PREVIDENCIÁRIA TOMADORES DE SERVIÇOS (R2010)"
-                print("Localizando o iframe com id='frmApp'...")
-                frame_locator = page.frame_locator("#frmApp")
-                print("Iframe localizado com sucesso!")
-                testid_menu_principal = (
-                    "menu_retencoes_previdenciarias_series_r2000_e_r3000"
-                )
-                menu_principal_locator = frame_locator.locator(
-                    f'[data-testid="{testid_menu_principal}"]'
-                )
-                await menu_principal_locator.hover()
-                print("Menu aberto com sucesso!")
-                testid_item_submenu = "menu_retencao_contribuicao_previdenciaria_tomadores_de_servicos_r2010"
-                item_submenu_locator = frame_locator.locator(
-                    f'[data-testid="{testid_item_submenu}"]'
-                )
-                await item_submenu_locator.click()
-                print(
-                    "Opção 'Retenção Contribuição Previdenciária...' clicada com sucesso!"
-                )
-                # -----------------------------------------------------
-                # ACESSANDO AO BOTÃO DE INCLUIR NOVO EVENTO
-                testid_do_botao = "botao_evento_incluir_novo"
-                botao_incluir = frame_locator.locator(
-                    f'[data-testid="{testid_do_botao}"]'
-                )
-                await botao_incluir.click()
-                print("Botão '+ Incluir novo evento' clicado com sucesso!")
-                # -----------------------------------------------------
-                # PREENCHIMENTO DO FORMULÁRIO
-                # CAMPO "PERÍODO DE APURAÇÃO"
-                valor_a_preencher = "09/2025"  # alterar depois para o usuario inserir ou pegar do mes atual
-                # data_atual = datetime.date.today()
-                # valor_a_preencher_dinamico = data_atual.strftime("%m/%Y") # Ex: "09/2025"
-                # await campo_periodo.fill(valor_a_preencher_dinamico)
-                testid_do_campo = "periodo_apuracao"
-                campo_periodo = frame_locator.locator(
-                    f'[data-testid="{testid_do_campo}"]'
-                )
-                await campo_periodo.fill(valor_a_preencher)
-                print("Campo 'Período de Apuração' preenchido com sucesso!")
-                # -----------------------------------------------------
-                # CAMPO CNPJ PRF
-                testid_do_select = "tipo_inscricao_estabelecimento"
-                select_locator = frame_locator.locator(
-                    f'[data-testid="{testid_do_select}"]'
-                )
-                valor_da_opcao = "1"
-                await select_locator.select_option(value=valor_da_opcao)
-                print("Opção selecionada com sucesso!")
-
-                cnpj_a_preencher = "00394494013700"
-                testid_do_campo = "numero_inscricao_cnpj"
-                campo_cnpj = frame_locator.locator(f'[data-testid="{testid_do_campo}"]')
-                await campo_cnpj.fill(cnpj_a_preencher)
-                print("Campo 'CNPJ' preenchido com sucesso!")
-                # -----------------------------------------------------
-                # CAMPO CNPJ FORNECEDOR
-                cnpj_prestador_a_preencher = cnpj_fornecedor_nf
-                testid_do_campo = "cnpj_prestador"
-                campo_cnpj_prestador = frame_locator.locator(
-                    f'[data-testid="{testid_do_campo}"]'
-                )
-                await campo_cnpj_prestador.fill(cnpj_prestador_a_preencher)
-                print("Campo 'CNPJ do Prestador' preenchido com sucesso!")
-                # -----------------------------------------------------
-                # CONFIRMAÇÃO BOTÃO "CONTINUAR"
-                testid_do_botao = "botao_continuar"
-                botao_continuar = frame_locator.locator(
-                    f'[data-testid="{testid_do_botao}"]'
-                )
-                await botao_continuar.click()
-                print("Botão 'Continuar' clicado com sucesso!")
-                # -----------------------------------------------------
-                # SELECIONANDO O CAMPO "INDICATIVO DE PRESTAÇÃO DE SERVIÇOS"
-                testid_do_select = "indicativo_obra"
-                select_locator = frame_locator.locator(
-                    f'[data-testid="{testid_do_select}"]'
-                )
-                valor_da_opcao = "0"
-                await select_locator.select_option(value=valor_da_opcao)
-                print("Opção selecionada com sucesso!")
-                # -----------------------------------------------------
-                # SELECIONANDO O CAMPO "PRESTADOR É CONTRIBUINTE"
-                testid_do_select_cprb = "indicativo_cprb"
-                select_cprb_locator = frame_locator.locator(
-                    f'[data-testid="{testid_do_select_cprb}"]'
-                )
-                valor_da_opcao = "0"
-                await select_cprb_locator.select_option(value=valor_da_opcao)
-                print("Opção do campo 'Indicativo CPRB' selecionada com sucesso!")
-                # -----------------------------------------------------
-                # CLICANDO EM INCLUIR NOTAS FISCAIS
-                testid_do_link_correto = "botao_inclusao_nfs"
-                link_incluir_nova_nf = frame_locator.get_by_test_id(
-                    testid_do_link_correto
-                )
-                await link_incluir_nova_nf.click()
-                print(
-                    "Link '[Incluir Nova]' da seção 'Notas fiscais' clicado com sucesso!"
-                )
-                # -----------------------------------------------------
-                # INCLUINDO DADOS DA NOTA FISCAL
-                valor_serie = serie_nf
-                valor_numero_doc = num_nf_principal
-                valor_data_emissao = data_emissao_nf
-                valor_bruto = valor_bruto_nf
-                await frame_locator.locator('[data-testid="serie"]').fill(str(valor_serie))
-                await frame_locator.locator('[data-testid="numero_documento"]').fill(
-                    str(valor_numero_doc)
-                )
-                await frame_locator.locator('[data-testid="data_emissao_nf"]').fill(
-                    str(valor_data_emissao)
-                )
-                await frame_locator.locator('[data-testid="valor_bruto"]').fill(
-                    valor_bruto
-                )
-                print("\nTodos os campos da nota fiscal foram preenchidos com sucesso!")
-                testid_do_botao_salvar = "botao_salvar_nfs"
-                botao_salvar = frame_locator.locator(
-                    f'[data-testid="{testid_do_botao_salvar}"]'
-                )
-                await botao_salvar.click()
-                #await page.wait_for_load_state("networkidle")
-                print("Dados salvos com sucesso e a página foi atualizada!")
-                # -----------------------------------------------------
-                # CLICANDO EM INCLUIR NOVO TIPO DE SERVIÇO
-                #time.sleep(3)
-                testid_do_link_tipo_servico = "botao_inclusao_info_tp_serv_0"
-                link_incluir_novo_tipo_servico = frame_locator.get_by_test_id(
-                    testid_do_link_tipo_servico
-                )
-                await link_incluir_novo_tipo_servico.click()
-                print(
-                    "Link '[Incluir Novo]' da seção 'Serviços tomados' clicado com sucesso!"
-                )
-                #await page.wait_for_load_state("networkidle")
-                # -----------------------------------------------------
-                # PREENCHENDO DADOS DO TIPO DE SERVIÇO
-                valor_padrao_servico = "100000002"
-                testid_do_select = "tipo_servico"
-                select_locator = frame_locator.locator(f'[data-testid="{testid_do_select}"]')
-                await select_locator.select_option(value=valor_padrao_servico)
-                print("Campo 'Tipo de Serviço' selecionado com sucesso!")
-                print(
-                    "\nProcesso de automação finalizado. A janela do navegador permanecerá aberta."
-                )
-                valor_base = valor_bruto_nf
-                valor_retido = valor_retencao_nf
-                testid_base = "valor_base_ret"
-                campo_base_ret = frame_locator.locator(f'[data-testid="{testid_base}"]')
-                await campo_base_ret.fill(valor_base)
-                testid_retencao = "valor_retencao"
-                campo_retencao = frame_locator.locator(f'[data-testid="{testid_retencao}"]')
-                await campo_retencao.fill(valor_retido)
-                print("\nCampos de valores preenchidos com sucesso!")
-                # -----------------------------------------------------
-                # SALVANDO O FORMULÁRIO DO TIPO DE SERVIÇO
-                testid_botao = "botao_salvar_info_tpserv"
-                botao_salvar_servico = frame_locator.locator(f'[data-testid="{testid_botao}"]')
-                await botao_salvar_servico.click()
-                print("Botão 'Salvar' do serviço foi clicado.")
-                # -----------------------------------------------------
-                # SALVANDO COMO RASCUNHO
-                testid_salvar_rascunho = "botao_salvar_rascunho"
-                botao_salvar_rascunho = frame_locator.locator(
-                    f'[data-testid="{testid_salvar_rascunho}"]'
-                )
-                await botao_salvar_rascunho.click()
-                print("Botão 'Salvar rascunho' apareceu e foi clicado com sucesso!")
-                # -----------------------------------------------------
+            # INICIANDO O LOOPING PELOS DADOS (REGISTOS OU FILA DOS MODOS STREAMING E VIGIA)
+            if modo_streaming or modo_vigia:
+                if agrupar:
+                    print(
+                        "AVISO: o agrupamento por fornecedor precisa do lote completo "
+                        "e não é usado nos modos streaming e vigia."
+                    )
+                eventos = eventos_da_fila(fila_cadastros, validador)
+            else:
+                if agrupar:
+                    # O agrupamento precisa de todas as notas de cada fornecedor
+                    lista_de_cadastros = validador.validar(
+                        list(iterar_registos(caminho_registos))
+                    )
+                    lista_de_eventos = agrupar_por_evento(
+                        lista_de_cadastros, periodo, cnpj_estabelecimento
+                    )
+                    print(
+                        f"{len(lista_de_cadastros)} notas agrupadas em "
+                        f"{len(lista_de_eventos)} eventos R2010."
+                    )
+                    eventos = eventos_da_lista(lista_de_eventos)
+                else:
+                    eventos = eventos_dos_registos(caminho_registos, validador)
+            # Cada nota passa pelo diário: estado gravado antes e depois do rascunho.
+            # Um evento que falha é repetido (com a aba reposta no menu) e, se
+            # falhar sempre, vai para a lista de falhas sem parar o lote
+            registrar_no_periodo = functools.partial(
+                registrar_evento_r2010,
+                periodo=periodo,
+                cnpj_estabelecimento=cnpj_estabelecimento,
+            )
+            registrar = com_diario(
+                diario, com_tentativas(registrar_no_periodo, falhas), retomar
+            )
+            if num_abas > 1:
+                # Cada aba extra reaproveita a sessão autenticada desta janela
+                await page.locator("#frmApp").wait_for(state="attached")
+                paginas = await abrir_abas_reinf(context, page, num_abas)
+                await despachar_em_abas(paginas, eventos, registrar)
+            else:
+                await registrar_em_serie(page, eventos, registrar)
 
     except Exception as e:
         print(f"Ocorreu um erro: {e}")
     finally:
         # Importante: 'browser.close()' ao conectar via CDP apenas desconecta o script.
         # A janela do navegador que abrimos NÃO será fechada.
+        if filtro:
+            await filtro.finalizar()
         if browser:
             await browser.close()
             print("Conexão do Playwright desconectada.")
+        if portal:
+            portal.parar()
+        if modo_vigia and tarefa_extracao:
+            # O modo vigia não termina sozinho: paramos de vigiar a pasta
+            tarefa_extracao.cancel()
+            try:
+                await tarefa_extracao
+            except asyncio.CancelledError:
+                pass
+        elif tarefa_extracao:
+            # Garante que a extração termina e as notas são gravadas mesmo após um erro
+            try:
+                await tarefa_extracao
+            except Exception as e:
+                print(f"ERRO na extração de PDFs em streaming: {e}")
+        if (
+            exportar_excel
+            and not simulado
+            and not modo_vigia
+            and os.path.exists(caminho_registos)
+            and not caminho_registos.lower().endswith(".xlsx")
+        ):
+            # Reescreve o relatório com o resultado do envio de cada nota (no modo
+            # vigia as notas não passam pelo ficheiro de registos: ver o diário;
+            # com as notas lidas de um Excel, ele não é reescrito por cima)
+            salvar_relatorio_excel(
+                iterar_registos(caminho_registos), NOME_ARQUIVO_EXCEL, diario
+            )
+        diario.fechar()
+        validador.finalizar()
+        falhas.imprimir_resumo()
+        # Perfil da execução: tempo de cada passo da extração e da automação
+        RASTREADOR.imprimir_resumo()
+        for caminho_perfil in CAMINHOS_PERFIL:
+            RASTREADOR.exportar(caminho_perfil)
 
 
 # --- Ponto de entrada do script ---
 if __name__ == "__main__":
-    # Executa a função principal assíncrona
+    # Executa a função principal assíncrona (para escolher a fase e as opções
+    # na linha de comando, use linha_comando.py)
     asyncio.run(main())
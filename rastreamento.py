@@ -0,0 +1,176 @@
+import contextvars  # Para saber a que nota pertence cada medição, mesmo com várias abas
+import csv
+import json
+import math
+import random  # Amostra das durações de cada passo para os percentis
+import time
+from contextlib import contextmanager
+
+# --- CONFIGURAÇÃO ---
+# Medições guardadas para exportar o perfil. No modo vigia a execução não tem
+# fim, por isso acima deste número as mais antigas são descartadas (o resumo
+# continua a contar todas).
+MAX_SPANS = 200_000
+# Durações guardadas por passo para calcular p50/p95 (amostra uniforme de todas)
+AMOSTRA_POR_PASSO = 10_000
+
+# Nota (ou ficheiro) em processamento no fluxo atual. Cada tarefa do asyncio tem
+# a sua cópia, por isso as abas concorrentes não misturam as medições.
+_registro_atual = contextvars.ContextVar("registro_atual", default=None)
+
+
+def _percentil(valores_ordenados, fracao):
+    """Percentil pelo método do posto mais próximo (valores já ordenados)."""
+    posicao = max(0, math.ceil(fracao * len(valores_ordenados)) - 1)
+    return valores_ordenados[posicao]
+
+
+class _Passo:
+    """Totais de um passo: quantidade, máximo e uma amostra das durações."""
+
+    def __init__(self):
+        self.quantidade = 0
+        self.maximo = 0.0
+        self.amostra = []
+
+    def adicionar(self, duracao, tamanho_amostra):
+        self.quantidade += 1
+        self.maximo = max(self.maximo, duracao)
+        if len(self.amostra) < tamanho_amostra:
+            self.amostra.append(duracao)
+        else:
+            # Amostragem de reservatório: cada duração fica com a mesma probabilidade
+            posicao = random.randrange(self.quantidade)
+            if posicao < tamanho_amostra:
+                self.amostra[posicao] = duracao
+
+
+class Rastreador:
+    """
+    Guarda a duração de cada passo nomeado da execução (um "span" por passo),
+    associada à nota em processamento, para descobrir onde o tempo é gasto.
+
+    O resumo por passo é atualizado a cada medição; a lista de spans (só para
+    exportar) fica limitada a max_spans, por isso a memória não cresce sem fim.
+
+    Uso:
+        with registro("NF 2099"):
+            with passo("botao_continuar"):
+                await botao_continuar.click()
+    """
+
+    def __init__(self, max_spans=MAX_SPANS, amostra_por_passo=AMOSTRA_POR_PASSO):
+        self.max_spans = max_spans
+        self.amostra_por_passo = amostra_por_passo
+        self.spans = []
+        self.descartados = 0
+        self._passos = {}
+
+    @contextmanager
+    def registro(self, identificador):
+        """Associa todos os passos medidos dentro do bloco à nota indicada."""
+        token = _registro_atual.set(identificador)
+        try:
+            yield
+        finally:
+            _registro_atual.reset(token)
+
+    @contextmanager
+    def passo(self, nome):
+        """Mede a duração do bloco; passos que levantam exceção ficam com ok=False."""
+        inicio = time.time()
+        contador = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.adicionar(nome, time.perf_counter() - contador, inicio, ok)
+
+    def adicionar(self, nome, duracao, inicio=None, ok=True):
+        self._guardar(
+            {
+                "registro": _registro_atual.get(),
+                "passo": nome,
+                "inicio": inicio if inicio is not None else time.time() - duracao,
+                "duracao": duracao,
+                "ok": ok,
+            }
+        )
+
+    def _guardar(self, span):
+        passo = self._passos.get(span["passo"])
+        if passo is None:
+            passo = self._passos[span["passo"]] = _Passo()
+        passo.adicionar(span["duracao"], self.amostra_por_passo)
+        self.spans.append(span)
+        # Corta em blocos (10% acima do limite) para não mover a lista a cada span
+        if len(self.spans) > self.max_spans + self.max_spans // 10:
+            excesso = len(self.spans) - self.max_spans
+            del self.spans[:excesso]
+            self.descartados += excesso
+
+    def incorporar(self, spans):
+        """Junta spans medidos noutro processo (ex.: pool de extração)."""
+        for span in spans:
+            self._guardar(span)
+
+    def retirar_spans(self):
+        """Devolve os spans guardados e esvazia a lista (o resumo não muda)."""
+        spans, self.spans = self.spans, []
+        return spans
+
+    def resumo(self):
+        """Devolve {passo: (quantidade, p50, p95, máximo)}, com durações em segundos."""
+        resumo = {}
+        for nome, passo in self._passos.items():
+            duracoes = sorted(passo.amostra)
+            resumo[nome] = (
+                passo.quantidade,
+                _percentil(duracoes, 0.50),
+                _percentil(duracoes, 0.95),
+                passo.maximo,
+            )
+        return resumo
+
+    def imprimir_resumo(self, titulo="Perfil da execução"):
+        resumo = self.resumo()
+        if not resumo:
+            return
+        print(f"\n--- {titulo} (tempos em ms) ---")
+        largura = max(len(nome) for nome in resumo)
+        print(f"  {'passo':<{largura}}  {'n':>6}  {'p50':>9}  {'p95':>9}  {'máx':>9}")
+        # Os passos mais caros (pelo p95) aparecem primeiro
+        for nome, (quantidade, p50, p95, maximo) in sorted(
+            resumo.items(), key=lambda item: item[1][2], reverse=True
+        ):
+            print(
+                f"  {nome:<{largura}}  {quantidade:>6}  {p50 * 1000:>9.1f}  "
+                f"{p95 * 1000:>9.1f}  {maximo * 1000:>9.1f}"
+            )
+
+    def exportar(self, caminho):
+        """Grava os spans guardados em JSON ou CSV, conforme a extensão do ficheiro."""
+        if caminho.lower().endswith(".csv"):
+            with open(caminho, "w", newline="", encoding="utf-8") as ficheiro:
+                escritor = csv.DictWriter(
+                    ficheiro,
+                    fieldnames=["registro", "passo", "inicio", "duracao", "ok"],
+                )
+                escritor.writeheader()
+                escritor.writerows(self.spans)
+        else:
+            with open(caminho, "w", encoding="utf-8") as ficheiro:
+                json.dump(self.spans, ficheiro, ensure_ascii=False, indent=1)
+        print(f"Perfil com {len(self.spans)} medições gravado em '{caminho}'.")
+        if self.descartados:
+            print(
+                f"  ({self.descartados} medições mais antigas descartadas; "
+                f"o limite é MAX_SPANS = {self.max_spans})"
+            )
+
+
+# Rastreador único do processo e atalhos para o usar
+RASTREADOR = Rastreador()
+registro = RASTREADOR.registro
+passo = RASTREADOR.passo